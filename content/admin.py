@@ -20,8 +20,12 @@ class LessonAdmin(admin.ModelAdmin):
 @admin.register(models.Chapter)
 class ChapterAdmin(admin.ModelAdmin):
     list_display = ('id', 'lesson', 'number', 'title', 'created_at')
+    # Lesson.__str__ reads its grade and subject.
+    list_select_related = ('lesson__grade', 'lesson__subject')
 
 
 @admin.register(models.Part)
 class PartAdmin(admin.ModelAdmin):
     list_display = ('id', 'chapter', 'number', 'title', 'mime', 'content_type', 'created_at')
+    # Chapter.__str__ reads its lesson's title.
+    list_select_related = ('chapter__lesson',)
@@ -0,0 +1,208 @@
+"""Helpers for the on-disk content tree served under STATIC_URL.
+
+Part HTML pulls in fonts, scripts and images through `src`/`href`
+attributes and CSS `url()` values, mostly as paths relative to the HTML
+file. These helpers find and rewrite those references and map between
+content URLs (`/static/10/Biology_1/...`) and files under CONTENT_ROOT.
+
+Parts are served from a copy of their authoring page whose relative
+references are made absolute (`absolute_references()`), kept under
+`_cas/pages/` at the page's own path, so the copy works from any URL.
+"""
+import hashlib
+import re
+from functools import lru_cache
+from pathlib import Path
+from urllib.parse import quote, unquote, urljoin, urlsplit
+
+from django.conf import settings
+
+
+JUNK_NAMES = {'.DS_Store', 'Thumbs.db', 'desktop.ini'}
+
+CAS_DIRNAME = '_cas'
+PAGES_DIRNAME = 'pages'
+
+# Characters browsers leave unescaped in a URL path and query (`%` keeps
+# existing escapes as they are).
+URL_SAFE = "/%!$&'()*+,;=:@~?"
+
+# Files worth precompressing, and the precompressed siblings written next to
+# them in order of preference (`page.html` -> `page.html.br`, `.gz`).
+COMPRESSIBLE_SUFFIXES = {
+    '.html', '.htm', '.css', '.js', '.mjs', '.json', '.svg', '.xml', '.txt',
+    '.ttf', '.otf', '.eot',
+}
+ENCODING_SUFFIXES = (('br', '.br'), ('gzip', '.gz'))
+
+REFERENCE_RE = re.compile(
+    r"""(?P<attr>\b(?:src|href)\s*=\s*)(?P<q>["'])(?P<ref>[^"']*)(?P=q)"""
+    r"""|(?P<css>url\(\s*)(?P<cq>["']?)(?P<cref>[^"')]*)(?P=cq)(?P<close>\s*\))""",
+    re.IGNORECASE,
+)
+
+
+def is_junk(path: Path) -> bool:
+    return path.name in JUNK_NAMES or path.name.startswith('._')
+
+
+def is_compressible(path: Path) -> bool:
+    return path.suffix.lower() in COMPRESSIBLE_SUFFIXES
+
+
+def encoded_sibling(path: Path, encoding: str) -> Path:
+    suffix = dict(ENCODING_SUFFIXES)[encoding]
+    return path.with_name(path.name + suffix)
+
+
+def content_root() -> Path:
+    return Path(getattr(settings, 'CONTENT_ROOT', Path(settings.BASE_DIR) / 'static'))
+
+
+def static_prefix() -> str:
+    return '/' + settings.STATIC_URL.strip('/') + '/'
+
+
+def iter_references(text: str):
+    """Yield every `src`/`href`/`url()` value found in HTML or CSS text."""
+    for match in REFERENCE_RE.finditer(text):
+        ref = match.group('ref') if match.group('attr') else match.group('cref')
+        yield ref.strip()
+
+
+def rewrite_references(text: str, replace) -> str:
+    """Return `text` with each reference passed through `replace(ref)`.
+
+    `replace` returns the new reference, or None to keep the original.
+    """
+    def substitute(match):
+        if match.group('attr'):
+            new = replace(match.group('ref').strip())
+            if new is None:
+                return match.group(0)
+            return f"{match.group('attr')}{match.group('q')}{new}{match.group('q')}"
+
+        new = replace(match.group('cref').strip())
+        if new is None:
+            return match.group(0)
+        return f"{match.group('css')}{match.group('cq')}{new}{match.group('cq')}{match.group('close')}"
+
+    return REFERENCE_RE.sub(substitute, text)
+
+
+def is_local_reference(ref: str) -> bool:
+    if not ref or ref.startswith(('#', '//')):
+        return False
+    return not urlsplit(ref).scheme
+
+
+def split_reference(ref: str):
+    """Split a reference into its path and any `?query`/`#fragment` suffix."""
+    for sep in ('?', '#'):
+        idx = ref.find(sep)
+        if idx != -1:
+            return ref[:idx], ref[idx:]
+    return ref, ''
+
+
+def url_to_path(url: str):
+    """Map a content URL (`/static/...`, percent-encoded) to a file path."""
+    path, _ = split_reference(url)
+    prefix = static_prefix()
+    if not path.startswith(prefix):
+        return None
+    return inside_root(content_root() / unquote(path[len(prefix):]))
+
+
+def path_to_url(path: Path) -> str:
+    rel = Path(path).resolve().relative_to(content_root().resolve())
+    return static_prefix() + '/'.join(quote(seg) for seg in rel.parts)
+
+
+def reference_path(ref: str, base: Path = None):
+    """Return the path a local reference names under CONTENT_ROOT, whether or not it exists.
+
+    Relative references are resolved against the directory of `base` (the
+    HTML or CSS file containing them); absolute ones must live under
+    STATIC_URL.
+    """
+    if not is_local_reference(ref):
+        return None
+    path, _ = split_reference(ref)
+    if not path:
+        return None
+    if path.startswith('/'):
+        return url_to_path(path)
+    if base is None:
+        return None
+    return inside_root(Path(base).parent / unquote(path))
+
+
+def resolve_reference(ref: str, base: Path = None):
+    """Return the file a local reference points at, or None (see `reference_path()`)."""
+    resolved = reference_path(ref, base)
+    if resolved is None or not resolved.is_file():
+        return None
+    return resolved
+
+
+def absolute_references(text: str, base: Path, moved=None) -> str:
+    """`text` with its relative references replaced by the content URLs they resolve to from `base`.
+
+    `moved` maps the content URL of a file that no longer exists to the one
+    to use instead (see AssetBlob); it applies to absolute references too.
+    """
+    base_url = path_to_url(base.parent) + '/'
+
+    def replace(ref):
+        path, suffix = split_reference(ref)
+        if moved:
+            target = reference_path(ref, base)
+            url = path_to_url(target) if target is not None and not target.is_file() else None
+            if url in moved:
+                return moved[url] + suffix
+        if not path or not is_local_reference(ref) or ref.startswith('/'):
+            return None
+        return urljoin(base_url, quote(path, safe=URL_SAFE, errors='surrogateescape')) + suffix
+
+    return rewrite_references(text, replace)
+
+
+def page_copy_path(source: Path) -> Path:
+    """Location of the served copy of the authoring page `source`."""
+    rel = Path(source).resolve().relative_to(content_root().resolve())
+    return content_root() / CAS_DIRNAME / PAGES_DIRNAME / rel
+
+
+def authoring_url(url: str) -> str:
+    """URL of the authoring page behind a served copy's URL (other URLs are returned as they are)."""
+    prefix = f'{static_prefix()}{CAS_DIRNAME}/{PAGES_DIRNAME}/'
+    return static_prefix() + url[len(prefix):] if url.startswith(prefix) else url
+
+
+def file_digest(path: Path, chunk_size=1024 * 1024) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as fh:
+        for chunk in iter(lambda: fh.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+@lru_cache(maxsize=4096)
+def stat_digest(path: str, size: int, mtime_ns: int) -> str:
+    """`file_digest()`, remembered per (path, size, mtime)."""
+    return file_digest(Path(path))
+
+
+def cas_path(digest: str, suffix: str) -> Path:
+    """Location of a content-addressed blob under CONTENT_ROOT."""
+    name = digest[:32] + suffix.lower()
+    return content_root() / CAS_DIRNAME / name[:2] / name
+
+
+def inside_root(path: Path):
+    root = content_root().resolve()
+    resolved = path.resolve()
+    if resolved != root and root not in resolved.parents:
+        return None
+    return resolved
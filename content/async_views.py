@@ -0,0 +1,132 @@
+"""Async versions of the grade/lesson/chapter/part read endpoints.
+
+DRF's APIView is sync-only, so these are plain Django async views mounted
+under `api/async/`. They query through the async ORM, serialize with the
+same `ValuesSerializer`s and render the same envelope with the configured
+API renderer, so a response body matches its sync counterpart byte for byte.
+They answer conditional GETs and honour `?fields=`/`?omit=`; keyset paging,
+POST lookups and the response cache stay with the sync endpoints.
+"""
+from asgiref.sync import sync_to_async
+from django.http import Http404, HttpResponse
+from django.views import View
+from rest_framework.exceptions import ValidationError
+from rest_framework.settings import api_settings
+
+from dante_library_project.renderers import Envelope
+
+from . import dependencies, models, serializers, serving
+from .conditional import acollect_validators, not_modified_response, set_validators
+from .mixins import select_field_names
+
+
+def render(data, status=200):
+    renderer = api_settings.DEFAULT_RENDERER_CLASSES[0]()
+    response = HttpResponse(status=status, content_type=f'{renderer.media_type}; charset={renderer.charset}')
+    response.content = renderer.render(data, renderer.media_type, {'response': response})
+    return response
+
+
+class AsyncValuesView(View):
+    """Base for async endpoints backed by a `ValuesSerializer`.
+
+    Subclasses provide `get_queryset()`; `many = False` views return the
+    single matching row (404 when there is none).
+    """
+
+    http_method_names = ['get', 'head', 'options']
+    values_serializer = None
+    default_omit = ()
+    message = 'OK'
+    many = True
+
+    def get_queryset(self):
+        raise NotImplementedError
+
+    async def get(self, request, *args, **kwargs):
+        try:
+            return await self.respond(request)
+        except ValidationError as exc:
+            return render(exc.detail, status=400)
+        except Http404 as exc:
+            return render({'detail': str(exc) or 'Not found.'}, status=404)
+
+    async def respond(self, request):
+        queryset = self.get_queryset()
+        etag, last_modified = await acollect_validators(request.get_full_path(), queryset)
+        not_modified = not_modified_response(request, etag, last_modified)
+        if not_modified is not None:
+            return not_modified
+
+        names = select_field_names(request.GET, self.values_serializer.field_names, self.default_omit)
+        rows = self.values_serializer.values(queryset, names)
+        if self.many:
+            data = self.values_serializer.to_representation([row async for row in rows], names)
+        else:
+            try:
+                row = await rows.aget()
+            except queryset.model.DoesNotExist:
+                raise Http404(f'No {queryset.model._meta.object_name} matches the given query.')
+            data = self.values_serializer.to_representation([row], names)[0]
+
+        return set_validators(render(Envelope(message=self.message, data=data)), etag, last_modified)
+
+
+class GradeListView(AsyncValuesView):
+    values_serializer = serializers.ValuesSerializer(serializers.GradeSerializer)
+    message = 'grade find success'
+
+    def get_queryset(self):
+        return models.Grade.objects.all()
+
+
+class LessonsByGradeView(AsyncValuesView):
+    values_serializer = serializers.ValuesSerializer(serializers.LessonSerializer)
+    message = 'lessons find success'
+
+    def get_queryset(self):
+        return models.Lesson.objects.filter(grade_id=self.kwargs['grade_id'])
+
+
+class ChaptersByLessonView(AsyncValuesView):
+    values_serializer = serializers.ValuesSerializer(serializers.ChapterSerializer)
+
+    def get_queryset(self):
+        return models.Chapter.objects.filter(lesson_id=self.kwargs['lesson_id']).order_by('number')
+
+
+class PartsByChapterView(AsyncValuesView):
+    values_serializer = serializers.ValuesSerializer(serializers.PartSerializer)
+    default_omit = ('html',)
+
+    def get_queryset(self):
+        return models.Part.objects.filter(chapter_id=self.kwargs['chapter_id']).order_by('number')
+
+
+class PartDetailView(AsyncValuesView):
+    values_serializer = serializers.ValuesSerializer(serializers.PartSerializer)
+    many = False
+
+    def get_queryset(self):
+        return models.Part.objects.filter(pk=self.kwargs['pk'])
+
+
+class PartContentView(View):
+    """Async `parts/<pk>/content`: file bodies are read in worker threads.
+
+    Part pages are files like any other (see serving.py); the stat calls and
+    variant selection run in a worker thread too, and the body is streamed
+    with `aiter_file_range`.
+    """
+
+    http_method_names = ['get', 'head']
+
+    async def get(self, request, pk):
+        try:
+            # Not deferring `html`: loading it lazily would be a sync query.
+            part = await dependencies.with_preload(models.Part.objects).aget(pk=pk)
+        except models.Part.DoesNotExist:
+            raise Http404('No Part matches the given query.')
+        return await sync_to_async(serving.part_response, thread_sensitive=False)(
+            request, part, stream=serving.aiter_file_range
+        )
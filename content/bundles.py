@@ -0,0 +1,319 @@
+"""Offline bundles: one zip per lesson with its parts and every asset they use.
+
+A bundle holds `manifest.json` (the lesson's chapters and parts), each part
+page at `parts/<part id>.html` and every referenced file under
+`assets/<content hash><suffix>`, so a font copied next to every part is
+stored once. References in pages and CSS are rewritten to the bundled names.
+
+The bundle key (the ETag, and the name in the bundle cache) is computed by
+`LessonBundle.validate()` from cheap validators only: the `updated_at` of
+the lesson's rows and the size and mtime of its part pages and of the files
+the asset index (content/dependencies.py) records for them. Parts without a
+scan, or whose recorded files changed, are indexed first, so the list of
+files stays complete. `plan()` reads and hashes everything the bundle will
+hold and only runs when a bundle is built; `iter_zip()` then streams the
+archive block by block, so memory stays flat whatever the lesson's size. With
+CONTENT_BUNDLE_CACHE_DIR set, a streamed bundle is also written to
+`<dir>/<lesson id>-<key>.zip` and later downloads are served from that file;
+storing it removes the lesson's earlier bundles, so the cache holds at most
+one file per lesson.
+"""
+import hashlib
+import json
+import os
+import posixpath
+import uuid
+import zipfile
+from pathlib import Path
+from urllib.parse import quote
+
+from django.conf import settings
+from django.db.models import Prefetch
+
+from . import assets, dependencies, models
+
+
+FORMAT_VERSION = 1
+
+MANIFEST_NAME = 'manifest.json'
+
+CONTENT_TYPE = 'application/zip'
+
+# Fixed entry timestamps keep equal bundles byte-identical.
+ENTRY_DATE_TIME = (1980, 1, 1, 0, 0, 0)
+
+PAGE_SUFFIXES = {'.html', '.htm'}
+REWRITTEN_SUFFIXES = {'.css'}
+
+
+def cache_dir():
+    path = getattr(settings, 'CONTENT_BUNDLE_CACHE_DIR', None)
+    return Path(path) if path else None
+
+
+def cached_path(lesson_id, key):
+    root = cache_dir()
+    return None if root is None else root / f'{lesson_id}-{key}.zip'
+
+
+def remove_stale(lesson_id, keep):
+    """Delete the lesson's cached bundles other than `keep`."""
+    for path in keep.parent.glob(f'{lesson_id}-*.zip'):
+        if path != keep:
+            path.unlink(missing_ok=True)
+
+
+class ZipSink:
+    """Write-only buffer; zipfile treats it as an unseekable stream."""
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+class LessonBundle:
+    block_size = 64 * 1024
+
+    def __init__(self, lesson):
+        self.lesson = lesson
+        self.pages = []
+        self.asset_names = {}
+        self.files = {}
+        self.rewritten = {}
+        self.visiting = set()
+        self.manifest = None
+        self.key = None
+
+    # ---- validators ----
+
+    def validate(self):
+        """Compute `key` without reading any file; returns self."""
+        lesson = self.lesson
+        parts = list(
+            models.Part.objects.filter(chapter__lesson=lesson)
+            .order_by('chapter__number', 'number')
+            .values_list('pk', 'updated_at', 'content_type', 'content_url')
+        )
+        part_ids = [part_id for part_id, _, _, _ in parts]
+        files = self.indexed_files(part_ids)
+
+        digest = hashlib.sha256()
+        rows = [(FORMAT_VERSION,)]
+        rows += [(row.pk, row.updated_at) for row in (lesson, lesson.grade, lesson.subject)]
+        rows += list(lesson.chapters.order_by('number').values_list('pk', 'updated_at'))
+        for part_id, updated_at, content_type, content_url in parts:
+            rows.append((part_id, updated_at))
+            if content_type == models.Part.CONTENT_TYPE_URL:
+                source = assets.url_to_path(content_url or '')
+                rows.append((content_url, file_stat(source) if source is not None else None))
+        rows += sorted(files.items())
+        for row in rows:
+            digest.update(repr(row).encode('utf-8'))
+        self.key = digest.hexdigest()
+        return self
+
+    def indexed_files(self, part_ids):
+        """{path: (size, mtime_ns) or None} of the files the asset index records for `part_ids`."""
+        scanned = set(models.PartAssetScan.objects.filter(part_id__in=part_ids).values_list('part_id', flat=True))
+        files, stale = dependencies.recorded_stats(part_ids)
+        # A changed stylesheet may load other files now.
+        stale |= {part_id for part_id in part_ids if part_id not in scanned}
+        if not stale:
+            return files
+        dependencies.index_parts(models.Part.objects.filter(pk__in=stale))
+        return dependencies.recorded_stats(part_ids)[0]
+
+    # ---- planning ----
+
+    def plan(self):
+        """Collect pages and assets (reading and hashing them); returns self."""
+        if self.key is None:
+            self.validate()
+        parts = models.Part.objects.order_by('number')
+        chapters = self.lesson.chapters.order_by('number').prefetch_related(Prefetch('parts', queryset=parts))
+        lesson = self.lesson
+
+        manifest_chapters = []
+        for chapter in chapters:
+            manifest_parts = []
+            for part in chapter.parts.all():
+                manifest_parts.append(self.add_part(part))
+            manifest_chapters.append({
+                'id': str(chapter.pk),
+                'number': chapter.number,
+                'title': chapter.title,
+                'summary': chapter.summary,
+                'parts': manifest_parts,
+            })
+
+        self.manifest = {
+            'format': FORMAT_VERSION,
+            'lesson': {
+                'id': str(lesson.pk),
+                'title': lesson.title,
+                'description': lesson.description,
+                'grade': {'id': str(lesson.grade.pk), 'code': lesson.grade.code, 'name': lesson.grade.name},
+                'subject': {'id': str(lesson.subject.pk), 'code': lesson.subject.code, 'title': lesson.subject.title},
+            },
+            'chapters': manifest_chapters,
+            'assets': sorted({**self.files, **self.rewritten}),
+        }
+        return self
+
+    def add_part(self, part):
+        entry = {
+            'id': str(part.pk),
+            'number': part.number,
+            'title': part.title,
+            'mime': part.mime,
+            'path': None,
+            'url': None,
+        }
+        if part.content_type == models.Part.CONTENT_TYPE_URL:
+            url = part.content_url or ''
+            if url.startswith(('http://', 'https://')):
+                entry['url'] = url
+                return entry
+            source = assets.url_to_path(url)
+            if source is None or not source.is_file():
+                return entry
+            if source.suffix.lower() not in PAGE_SUFFIXES:
+                # PDFs and the like are bundled as they are.
+                entry['path'] = self.add_asset(source)
+                return entry
+            markup, base = source.read_text(encoding='utf-8', errors='replace'), source
+        else:
+            markup, base = part.html or '', None
+
+        name = f'parts/{part.pk}.html'
+        page = assets.rewrite_references(markup, lambda ref: self.bundle_reference(ref, base, 'parts'))
+        self.pages.append((name, page.encode('utf-8')))
+        entry['path'] = name
+        return entry
+
+    def bundle_reference(self, ref, base, directory):
+        """Reference from a file in `directory` to the bundled copy of `ref`, or None."""
+        target = assets.resolve_reference(ref, base)
+        if target is None:
+            return None
+        name = self.add_asset(target)
+        if name is None:
+            return None
+        _, suffix = assets.split_reference(ref)
+        return quote(posixpath.relpath(name, directory)) + suffix
+
+    def add_asset(self, path):
+        name = self.asset_names.get(path)
+        if name is not None or path in self.visiting:
+            # Already bundled, or a CSS file importing itself through a cycle.
+            return name
+
+        suffix = path.suffix.lower()
+        if suffix in REWRITTEN_SUFFIXES:
+            self.visiting.add(path)
+            text = path.read_text(encoding='utf-8', errors='replace')
+            data = assets.rewrite_references(
+                text, lambda ref: self.bundle_reference(ref, path, 'assets')
+            ).encode('utf-8')
+            self.visiting.discard(path)
+            name = f'assets/{hashlib.sha256(data).hexdigest()[:32]}{suffix}'
+            self.rewritten[name] = data
+        else:
+            stat = path.stat()
+            name = f'assets/{assets.stat_digest(str(path), stat.st_size, stat.st_mtime_ns)[:32]}{suffix}'
+            self.files[name] = path
+        self.asset_names[path] = name
+        return name
+
+    # ---- archive ----
+
+    def entry(self, name, size=0):
+        info = zipfile.ZipInfo(name, date_time=ENTRY_DATE_TIME)
+        info.compress_type = zipfile.ZIP_DEFLATED
+        info.file_size = size
+        return info
+
+    def iter_zip(self):
+        """Yield the zip archive in blocks as it is written."""
+        if self.manifest is None:
+            self.plan()
+        sink = ZipSink()
+        with zipfile.ZipFile(sink, 'w') as archive:
+            for _ in self.write_entries(archive):
+                data = sink.drain()
+                if data:
+                    yield data
+        yield sink.drain()
+
+    def write_entries(self, archive):
+        """Write every entry, pausing (yielding) whenever output is ready."""
+        manifest = json.dumps(self.manifest, ensure_ascii=False, indent=2).encode('utf-8')
+        archive.writestr(self.entry(MANIFEST_NAME), manifest)
+        for name, data in self.pages:
+            archive.writestr(self.entry(name), data)
+            yield
+
+        for name, data in self.rewritten.items():
+            archive.writestr(self.entry(name), data)
+            yield
+
+        for name, path in self.files.items():
+            # A known size lets zipfile pick zip64 up front for huge files.
+            with open(path, 'rb') as src, archive.open(self.entry(name, path.stat().st_size), 'w') as dest:
+                for block in iter(lambda: src.read(self.block_size), b''):
+                    dest.write(block)
+                    yield
+            yield
+
+    def cached_path(self):
+        return cached_path(self.lesson.pk, self.key)
+
+    def iter_and_store(self):
+        """`iter_zip()`, also saved to the bundle cache once it completes."""
+        path = self.cached_path()
+        if path is None:
+            yield from self.iter_zip()
+            return
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        partial = path.with_name(f'.{path.name}.{uuid.uuid4().hex}.part')
+        complete = False
+        try:
+            with open(partial, 'wb') as fh:
+                for block in self.iter_zip():
+                    if block:
+                        fh.write(block)
+                        yield block
+            os.replace(partial, path)
+            complete = True
+            remove_stale(self.lesson.pk, path)
+        finally:
+            if not complete:
+                partial.unlink(missing_ok=True)
+
+
+def file_stat(path):
+    """(size, mtime_ns) of `path`, or None when it is missing."""
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
+
+
+def lesson_bundle(lesson_id):
+    """The lesson's bundle with its `key`; `iter_zip()` plans it when it is built."""
+    lesson = models.Lesson.objects.select_related('grade', 'subject').get(pk=lesson_id)
+    return LessonBundle(lesson).validate()
+
@@ -0,0 +1,133 @@
+"""Rendered response cache for the content endpoints.
+
+Entries hold the final response bytes per (endpoint, parent id) and embed
+the version token of their parent scope (e.g. `chapter:<id>` for a parts
+list). Model signals replace the token when a child row changes, which
+turns every entry of that scope stale without deleting any keys. A stale
+entry is rebuilt by a single worker holding the rebuild lock while the
+others keep serving the stale copy.
+
+Version tokens are replaced once the writing transaction commits: a request
+still reading the old rows until then would otherwise cache them under the
+new token. Management commands bump from their own process, so the cache
+behind CONTENT_CACHE_ALIAS must be shared by every process (a system check
+rejects the per-process LocMemCache).
+"""
+import time
+import uuid
+
+from django.conf import settings
+from django.core import checks
+from django.core.cache import caches
+from django.db import transaction
+
+
+# Backends whose entries only the process that wrote them can see.
+PROCESS_LOCAL_BACKENDS = {'django.core.cache.backends.locmem.LocMemCache'}
+
+VERSION_KEY = 'content:version:{scope}'
+ENTRY_KEY = 'content:response:{endpoint}:{scope}:{variant}'
+LOCK_KEY = 'content:rebuild:{endpoint}:{scope}:{variant}'
+
+
+def get_cache():
+    return caches[getattr(settings, 'CONTENT_CACHE_ALIAS', 'default')]
+
+
+def is_enabled():
+    return getattr(settings, 'CONTENT_CACHE_ENABLED', True)
+
+
+@checks.register(checks.Tags.caches)
+def check_shared_cache(app_configs=None, **kwargs):
+    if not is_enabled():
+        return []
+    alias = getattr(settings, 'CONTENT_CACHE_ALIAS', 'default')
+    backend = settings.CACHES.get(alias, {}).get('BACKEND')
+    if backend not in PROCESS_LOCAL_BACKENDS:
+        return []
+    return [checks.Error(
+        f'CONTENT_CACHE_ALIAS {alias!r} uses {backend}, which other processes cannot see.',
+        hint='Invalidations from management commands and other workers would never reach this '
+             'process. Use a shared backend (file, database, Memcached or Redis) or set '
+             'CONTENT_CACHE_ENABLED = False.',
+        id='content.E001',
+    )]
+
+
+def scope_for(kind, pk=None):
+    return kind if pk is None else f'{kind}:{pk}'
+
+
+def get_version(scope):
+    cache = get_cache()
+    key = VERSION_KEY.format(scope=scope)
+    version = cache.get(key)
+    if version is None:
+        # A random token (rather than a counter) stays safe when the
+        # version key itself is evicted: the replacement never matches an
+        # entry written under the old token.
+        cache.add(key, uuid.uuid4().hex, None)
+        version = cache.get(key)
+    return version
+
+
+def bump_versions(*scopes, using=None):
+    """Turn every entry of `scopes` stale once the current transaction commits."""
+    if not scopes:
+        return
+    transaction.on_commit(
+        lambda: get_cache().set_many(
+            {VERSION_KEY.format(scope=scope): uuid.uuid4().hex for scope in scopes},
+            None,
+        ),
+        using=using,
+    )
+
+
+class ResponseCache:
+    """Lookup and store of one (endpoint, scope, variant) response entry."""
+
+    def __init__(self, endpoint, scope, variant=''):
+        self.cache = get_cache()
+        self.scope = scope
+        self.entry_key = ENTRY_KEY.format(endpoint=endpoint, scope=scope, variant=variant)
+        self.lock_key = LOCK_KEY.format(endpoint=endpoint, scope=scope, variant=variant)
+        self.locked = False
+        self.version = None
+
+    def lookup(self):
+        """Return a servable entry, or None when the caller should rebuild.
+
+        A fresh entry is always returned. A stale one is returned unless this
+        caller wins the rebuild lock, in which case it must call `store()`
+        (or `release()`) once the new response is rendered.
+        """
+        # The version is captured before the caller runs its queries so that a
+        # change landing mid-rebuild leaves the stored entry already stale.
+        self.version = get_version(self.scope)
+        entry = self.cache.get(self.entry_key)
+        if entry is None:
+            return None
+        if entry['version'] == self.version and entry['expires'] > time.time():
+            return entry
+
+        lock_timeout = getattr(settings, 'CONTENT_CACHE_LOCK_TIMEOUT', 30)
+        self.locked = self.cache.add(self.lock_key, 1, lock_timeout)
+        return None if self.locked else entry
+
+    def store(self, content, content_type, validators=None):
+        entry = {
+            'version': self.version,
+            'expires': time.time() + getattr(settings, 'CONTENT_CACHE_TIMEOUT', 300),
+            'content': content,
+            'content_type': content_type,
+            'validators': validators,
+        }
+        self.cache.set(self.entry_key, entry, getattr(settings, 'CONTENT_CACHE_STALE_TIMEOUT', 86400))
+        self.release()
+
+    def release(self):
+        if self.locked:
+            self.cache.delete(self.lock_key)
+            self.locked = False
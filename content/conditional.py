@@ -0,0 +1,60 @@
+import calendar
+import hashlib
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+
+VALIDATOR_AGGREGATES = {'latest': Max('updated_at'), 'count': Count('pk')}
+
+
+def collect_validators(namespace, *querysets):
+    """Return an (etag, last_modified) pair for the given querysets.
+
+    Each queryset costs one aggregate query (newest `updated_at` plus row
+    count), so deletions change the validator as well as edits.
+    """
+    return validators_from(namespace, [qs.order_by().aggregate(**VALIDATOR_AGGREGATES) for qs in querysets])
+
+
+async def acollect_validators(namespace, *querysets):
+    """`collect_validators()` for async views."""
+    return validators_from(namespace, [await qs.order_by().aaggregate(**VALIDATOR_AGGREGATES) for qs in querysets])
+
+
+def validators_from(namespace, aggregates):
+    tokens = [namespace]
+    latest = None
+    for agg in aggregates:
+        stamp = agg['latest']
+        tokens.append(f"{agg['count']}:{stamp.isoformat() if stamp else ''}")
+        if stamp is not None and (latest is None or stamp > latest):
+            latest = stamp
+
+    etag = hashlib.sha1('|'.join(tokens).encode('utf-8')).hexdigest()
+    last_modified = calendar.timegm(latest.utctimetuple()) if latest else None
+    return etag, last_modified
+
+
+def set_validators(response, etag=None, last_modified=None):
+    if etag and not response.has_header('ETag'):
+        response['ETag'] = quote_etag(etag)
+    if last_modified is not None and not response.has_header('Last-Modified'):
+        response['Last-Modified'] = http_date(last_modified)
+    return response
+
+
+def not_modified_response(request, etag=None, last_modified=None):
+    """Return a 304 response when the client's copy is current, else None."""
+    if request.method not in ('GET', 'HEAD'):
+        return None
+
+    response = get_conditional_response(
+        request,
+        etag=quote_etag(etag) if etag else None,
+        last_modified=last_modified,
+    )
+    if response is None:
+        return None
+    return set_validators(response, etag, last_modified)
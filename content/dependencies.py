@@ -0,0 +1,362 @@
+"""Index of the files each part's page loads: stylesheets, scripts, fonts, images.
+
+`index_parts()` reads each part's page (the file behind `content_url`, or
+the inline `html`), follows every `src`/`href`/`url()` reference to a file
+under CONTENT_ROOT, and through stylesheets to the files they load in turn.
+Each file becomes a `PartAsset` row with its size and SHA-256, and a
+`PartAssetScan` records the page's hash and the byte totals. Links to other
+pages are navigation, not dependencies, and are skipped.
+
+Pages are parsed in a process pool. A part is skipped when its page hashes
+the same as at the last scan and every asset recorded then still has the
+same size and mtime, so re-indexing an unchanged tree only reads the pages.
+
+The scan also stores the page's preload list: the stylesheets, fonts and
+scripts announced in a `Link: rel=preload` header when the part's content
+is served (see `link_header()`), so serving a part never parses it. Each
+is listed under the URL the browser requests for it, resolved from the
+page's folder or the stylesheet loading it, so the preloaded response is
+the one the page then uses.
+"""
+import hashlib
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from urllib.parse import quote, urljoin
+
+from django.db import transaction
+from django.db.models import F, Min, OuterRef, Subquery
+
+from . import assets, models
+
+
+PAGE_SUFFIXES = {'.html', '.htm'}
+STYLE_SUFFIXES = {'.css'}
+
+KIND_SUFFIXES = {
+    models.PartAsset.KIND_STYLE: STYLE_SUFFIXES,
+    models.PartAsset.KIND_SCRIPT: {'.js', '.mjs'},
+    models.PartAsset.KIND_FONT: {'.woff2', '.woff', '.ttf', '.otf', '.eot'},
+    models.PartAsset.KIND_IMAGE: {'.png', '.jpg', '.jpeg', '.gif', '.webp', '.avif', '.svg', '.ico', '.bmp'},
+}
+
+# Kinds announced with `rel=preload`, most render-critical first; images
+# are left to the browser. More than a handful would compete with the page.
+PRELOAD_KINDS = (models.PartAsset.KIND_STYLE, models.PartAsset.KIND_FONT, models.PartAsset.KIND_SCRIPT)
+PRELOAD_LIMIT = 8
+
+BATCH_SIZE = 500
+
+# Below this many parts a process pool costs more than it saves.
+POOL_THRESHOLD = 64
+
+
+def asset_kind(path: Path) -> str:
+    suffix = path.suffix.lower()
+    for kind, suffixes in KIND_SUFFIXES.items():
+        if suffix in suffixes:
+            return kind
+    return models.PartAsset.KIND_OTHER
+
+
+def asset_url(path: str) -> str:
+    """Content URL of an asset path stored relative to CONTENT_ROOT."""
+    return assets.static_prefix() + '/'.join(quote(seg) for seg in path.split('/'))
+
+
+def reference_url(ref: str, base_url=None) -> str:
+    """The URL a browser requests for `ref` in a page or stylesheet at `base_url`."""
+    url = quote(ref.partition('#')[0], safe=assets.URL_SAFE)
+    return urljoin(base_url, url) if base_url else url
+
+
+# ---- scanning (runs in worker processes) ----
+
+def is_unchanged(root: Path, recorded) -> bool:
+    for path, size, mtime_ns in recorded:
+        try:
+            stat = os.stat(root / path)
+        except OSError:
+            return False
+        if stat.st_size != size or stat.st_mtime_ns != mtime_ns:
+            return False
+    return True
+
+
+def collect_assets(text: str, base, root: Path):
+    """Every asset `text` loads, breadth first so each keeps its shallowest depth.
+
+    Each is (path, kind, size, mtime_ns, sha256, depth, url), `url` being
+    the one the browser requests for it.
+    """
+    found = {}
+    base_url = assets.path_to_url(base.parent) + '/' if base is not None else None
+    queue = deque([(text, base, base_url, 0)])
+    while queue:
+        text, base, base_url, depth = queue.popleft()
+        for ref in assets.iter_references(text):
+            target = assets.resolve_reference(ref, base)
+            if target is None or target.suffix.lower() in PAGE_SUFFIXES:
+                continue
+            path = target.relative_to(root).as_posix()
+            if path in found:
+                continue
+            stat = target.stat()
+            digest = assets.stat_digest(str(target), stat.st_size, stat.st_mtime_ns)
+            url = reference_url(ref, base_url)
+            found[path] = (path, asset_kind(target), stat.st_size, stat.st_mtime_ns, digest, depth, url)
+            if target.suffix.lower() in STYLE_SUFFIXES:
+                queue.append((target.read_text(encoding='utf-8', errors='replace'), target, url, depth + 1))
+    return list(found.values())
+
+
+def scan_page(job):
+    """Scan one part's page; return (part id, result), with result None when unchanged.
+
+    `job` is (part id, page file or None, inline html, previous scan or None),
+    the previous scan being (page sha256, [(asset path, size, mtime_ns)]).
+    """
+    part_id, source, html, previous = job
+    root = assets.content_root().resolve()
+    text = None
+    if source is None:
+        data = (html or '').encode('utf-8')
+        digest, size, text = hashlib.sha256(data).hexdigest(), len(data), html or ''
+    elif not source.is_file():
+        digest, size = hashlib.sha256(b'').hexdigest(), 0
+    elif source.suffix.lower() in PAGE_SUFFIXES:
+        data = source.read_bytes()
+        digest, size, text = hashlib.sha256(data).hexdigest(), len(data), data.decode('utf-8', errors='replace')
+    else:
+        # PDFs and the like are the whole download themselves.
+        digest, size = assets.file_digest(source), source.stat().st_size
+
+    if previous is not None and previous[0] == digest and is_unchanged(root, previous[1]):
+        return part_id, None
+    found = collect_assets(text, source, root) if text else []
+    return part_id, {'sha256': digest, 'page_bytes': size, 'assets': found}
+
+
+def preload_list(found):
+    """[kind, url] of the scanned assets worth preloading, in preload order."""
+    chosen = [(kind, depth, path, url) for path, kind, _, _, _, depth, url in found if kind in PRELOAD_KINDS]
+    chosen.sort(key=lambda item: (PRELOAD_KINDS.index(item[0]), item[1], item[2]))
+    return [[kind, url] for kind, _, _, url in chosen[:PRELOAD_LIMIT]]
+
+
+# ---- indexing ----
+
+def page_job(part_id, content_type, content_url, html, previous):
+    if content_type == models.Part.CONTENT_TYPE_URL:
+        source = assets.url_to_path(content_url or '')
+        if source is not None:
+            return part_id, source, None, previous
+        # External (or unservable) pages load nothing from the content tree.
+        return part_id, None, '', previous
+    return part_id, None, html, previous
+
+
+def previous_scans(part_ids):
+    scans = {
+        part_id: (digest, [])
+        for part_id, digest in models.PartAssetScan.objects.filter(part_id__in=part_ids)
+        .values_list('part_id', 'source_sha256')
+    }
+    for part_id, path, size, mtime_ns in models.PartAsset.objects.filter(part_id__in=part_ids).values_list(
+        'part_id', 'path', 'size', 'mtime_ns'
+    ):
+        if part_id in scans:
+            scans[part_id][1].append((path, size, mtime_ns))
+    return scans
+
+
+def save_results(results):
+    with transaction.atomic():
+        models.PartAsset.objects.filter(part_id__in=list(results)).delete()
+        models.PartAsset.objects.bulk_create(
+            [
+                models.PartAsset(part_id=part_id, path=path, kind=kind, size=size, mtime_ns=mtime_ns,
+                                 sha256=digest, depth=depth)
+                for part_id, result in results.items()
+                for path, kind, size, mtime_ns, digest, depth, _ in result['assets']
+            ],
+            batch_size=BATCH_SIZE,
+        )
+        models.PartAssetScan.objects.bulk_create(
+            [
+                models.PartAssetScan(part_id=part_id, source_sha256=result['sha256'], page_bytes=result['page_bytes'],
+                                     asset_bytes=sum(asset[2] for asset in result['assets']),
+                                     preload=preload_list(result['assets']))
+                for part_id, result in results.items()
+            ],
+            batch_size=BATCH_SIZE,
+            update_conflicts=True,
+            unique_fields=['part'],
+            update_fields=['source_sha256', 'page_bytes', 'asset_bytes', 'preload', 'updated_at'],
+        )
+
+
+def index_parts(parts, workers=None, force=False):
+    """Refresh the asset index of a Part queryset; return (scanned, changed) counts.
+
+    `force` rescans every page even when it is unchanged.
+    """
+    part_ids = list(parts.order_by('pk').values_list('pk', flat=True))
+    workers = workers or os.cpu_count() or 1
+    pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 and len(part_ids) >= POOL_THRESHOLD else None
+    changed = 0
+    try:
+        for start in range(0, len(part_ids), BATCH_SIZE):
+            batch = part_ids[start:start + BATCH_SIZE]
+            previous = {} if force else previous_scans(batch)
+            jobs = [
+                page_job(part_id, content_type, content_url, html, previous.get(part_id))
+                for part_id, content_type, content_url, html in models.Part.objects.filter(pk__in=batch)
+                .values_list('pk', 'content_type', 'content_url', 'html')
+            ]
+            scanned = pool.map(scan_page, jobs, chunksize=16) if pool else map(scan_page, jobs)
+            results = {part_id: result for part_id, result in scanned if result is not None}
+            if results:
+                save_results(results)
+                changed += len(results)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    return len(part_ids), changed
+
+
+def recorded_stats(part_ids=None):
+    """Stat the recorded assets of `part_ids` (default: every indexed part).
+
+    Returns {path: (size, mtime_ns) or None when missing} and the ids of the
+    parts with an asset that changed since their scan.
+    """
+    root = assets.content_root()
+    rows = models.PartAsset.objects.all()
+    if part_ids is not None:
+        rows = rows.filter(part_id__in=part_ids)
+    stats = {}
+    changed = set()
+    for part_id, path, size, mtime_ns in rows.values_list('part_id', 'path', 'size', 'mtime_ns').iterator():
+        if path not in stats:
+            try:
+                stat = os.stat(root / path)
+            except OSError:
+                stats[path] = None
+            else:
+                stats[path] = (stat.st_size, stat.st_mtime_ns)
+        if stats[path] != (size, mtime_ns):
+            changed.add(part_id)
+    return stats, changed
+
+
+def index_changed_assets(workers=None):
+    """Rescan the parts whose recorded assets changed on disk, e.g. every user of an edited stylesheet."""
+    _, changed = recorded_stats()
+    if not changed:
+        return 0, 0
+    return index_parts(models.Part.objects.filter(pk__in=changed), workers=workers)
+
+
+def index_missing(workers=None):
+    """Index the parts that have no scan yet, such as rows older than the index."""
+    return index_parts(models.Part.objects.filter(asset_scan__isnull=True), workers=workers)
+
+
+def index_chapters(chapter_ids, workers=None):
+    """Refresh the asset index of every part of the given chapters."""
+    if not chapter_ids:
+        return 0, 0
+    return index_parts(models.Part.objects.filter(chapter_id__in=chapter_ids), workers=workers)
+
+
+# ---- serving ----
+
+def with_preload(queryset):
+    """Annotate parts with `preload` (from their scan) and `next_part_id`, in the same query."""
+    next_part = models.Part.objects.filter(
+        chapter_id=OuterRef('chapter_id'), number=OuterRef('number') + 1
+    ).values('pk')[:1]
+    return queryset.annotate(preload=F('asset_scan__preload'), next_part_id=Subquery(next_part))
+
+
+def link_header(preload, next_url=None):
+    """`Link` value preloading the part's critical assets and prefetching the next part."""
+    links = []
+    for kind, url in preload or ():
+        link = f'<{url}>; rel=preload; as={kind}'
+        if kind == models.PartAsset.KIND_FONT:
+            # Fonts are always fetched in CORS mode; without this the preload is wasted.
+            link += '; crossorigin'
+        links.append(link)
+    if next_url:
+        links.append(f'<{next_url}>; rel=prefetch')
+    return ', '.join(links)
+
+
+# ---- querying ----
+
+def asset_data(row):
+    return {
+        'path': row['path'],
+        'url': asset_url(row['path']),
+        'kind': row['kind'],
+        'size': row['size'],
+        'sha256': row['sha256'],
+        'depth': row['depth'],
+    }
+
+
+def part_summary(part_id):
+    """A part's assets and transfer size, or None when it has not been scanned."""
+    scan = models.PartAssetScan.objects.filter(part_id=part_id).first()
+    if scan is None:
+        return None
+    rows = models.PartAsset.objects.filter(part_id=part_id).order_by('depth', 'path').values(
+        'path', 'kind', 'size', 'sha256', 'depth'
+    )
+    return {
+        'part': str(part_id),
+        'page_bytes': scan.page_bytes,
+        'asset_bytes': scan.asset_bytes,
+        'transfer_bytes': scan.transfer_bytes,
+        'assets': [asset_data(row) for row in rows],
+    }
+
+
+def chapter_summary(chapter_id):
+    """Per-part transfer sizes of a chapter, and the chapter's total.
+
+    An asset shared by several parts is downloaded once, so the chapter's
+    `asset_bytes` counts each file path once.
+    """
+    parts = models.PartAssetScan.objects.filter(part__chapter_id=chapter_id).order_by('part__number').values(
+        'part_id', 'part__number', 'page_bytes', 'asset_bytes'
+    )
+    rows = models.PartAsset.objects.filter(part__chapter_id=chapter_id).values(
+        'path', 'kind', 'size', 'sha256'
+    ).annotate(depth=Min('depth')).order_by('depth', 'path')
+
+    shared = {}
+    for row in rows:
+        shared.setdefault(row['path'], row)
+    page_bytes = sum(part['page_bytes'] for part in parts)
+    asset_bytes = sum(row['size'] for row in shared.values())
+    return {
+        'chapter': str(chapter_id),
+        'page_bytes': page_bytes,
+        'asset_bytes': asset_bytes,
+        'transfer_bytes': page_bytes + asset_bytes,
+        'parts': [
+            {
+                'id': str(part['part_id']),
+                'number': part['part__number'],
+                'page_bytes': part['page_bytes'],
+                'asset_bytes': part['asset_bytes'],
+                'transfer_bytes': part['page_bytes'] + part['asset_bytes'],
+            }
+            for part in parts
+        ],
+        'assets': [asset_data(row) for row in shared.values()],
+    }
@@ -0,0 +1,182 @@
+import asyncio
+import io
+import logging
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from django.core.asgi import get_asgi_application
+from django.core.management.base import BaseCommand, CommandError
+from django.core.wsgi import get_wsgi_application
+from django.test.utils import override_settings
+from django.urls import reverse
+from content import models
+
+
+# =====================
+# Drivers
+# =====================
+
+class WSGIDriver:
+    """Call the WSGI application from a thread pool, like a threaded WSGI server."""
+
+    def __init__(self, concurrency):
+        self.application = get_wsgi_application()
+        self.concurrency = concurrency
+
+    def request(self, path):
+        environ = {
+            "REQUEST_METHOD": "GET",
+            "PATH_INFO": path,
+            "QUERY_STRING": "",
+            "SERVER_NAME": "testserver",
+            "SERVER_PORT": "80",
+            "SERVER_PROTOCOL": "HTTP/1.1",
+            "HTTP_HOST": "testserver",
+            "wsgi.input": io.BytesIO(),
+            "wsgi.errors": sys.stderr,
+            "wsgi.url_scheme": "http",
+            "wsgi.multithread": True,
+            "wsgi.multiprocess": False,
+            "wsgi.run_once": False,
+            "wsgi.version": (1, 0),
+        }
+        status = []
+        start = time.perf_counter()
+        body = self.application(environ, lambda s, headers, exc_info=None: status.append(s))
+        try:
+            size = sum(len(chunk) for chunk in body)
+        finally:
+            if hasattr(body, "close"):
+                body.close()
+        return time.perf_counter() - start, int(status[0].split()[0]), size
+
+    def run(self, paths):
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            return list(pool.map(self.request, paths))
+
+
+class ASGIDriver:
+    """Call the ASGI application from `concurrency` tasks on one event loop."""
+
+    def __init__(self, concurrency):
+        self.application = get_asgi_application()
+        self.concurrency = concurrency
+
+    async def request(self, path):
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": "GET",
+            "scheme": "http",
+            "path": path,
+            "raw_path": path.encode("utf-8"),
+            "query_string": b"",
+            "root_path": "",
+            "headers": [(b"host", b"testserver")],
+            "client": ("127.0.0.1", 50000),
+            "server": ("testserver", 80),
+        }
+        received = asyncio.Event()
+        result = {"size": 0}
+
+        async def receive():
+            if not received.is_set():
+                received.set()
+                return {"type": "http.request", "body": b"", "more_body": False}
+            await asyncio.Event().wait()
+
+        async def send(message):
+            if message["type"] == "http.response.start":
+                result["status"] = message["status"]
+            elif message["type"] == "http.response.body":
+                result["size"] += len(message.get("body", b""))
+
+        start = time.perf_counter()
+        await self.application(scope, receive, send)
+        return time.perf_counter() - start, result["status"], result["size"]
+
+    def run(self, paths):
+        async def main():
+            queue = list(reversed(paths))
+            results = []
+
+            async def worker():
+                while queue:
+                    results.append(await self.request(queue.pop()))
+
+            await asyncio.gather(*(worker() for _ in range(self.concurrency)))
+            return results
+
+        return asyncio.run(main())
+
+
+def summarize(results, elapsed):
+    latencies = sorted(latency for latency, _, _ in results)
+    errors = sum(1 for _, status, _ in results if status != 200)
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    return (
+        f"{len(results) / elapsed:8.1f} req/s  p50 {statistics.median(latencies) * 1000:7.1f}ms  "
+        f"p99 {p99 * 1000:7.1f}ms  errors {errors}"
+    )
+
+
+# =====================
+# Django Command
+# =====================
+
+class Command(BaseCommand):
+    help = (
+        "Compare throughput of the sync views under WSGI with the async views under ASGI "
+        "(and the sync views under ASGI) at a given concurrency, in-process."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--concurrency", type=int, default=64, help="Requests in flight at once")
+        parser.add_argument("--requests", type=int, default=1000, help="Requests per run")
+        parser.add_argument(
+            "--endpoint",
+            choices=["grades", "lessons", "chapters", "parts", "part", "content"],
+            default="parts",
+            help="Endpoint to load"
+        )
+
+    def handle(self, *args, **options):
+        part = models.Part.objects.select_related("chapter__lesson").order_by("pk").first()
+        if part is None:
+            raise CommandError("No content to read; seed the database first.")
+
+        sync_path, async_path = self.paths(options["endpoint"], part)
+        concurrency = max(options["concurrency"], 1)
+        count = max(options["requests"], 1)
+
+        runs = [
+            ("WSGI  sync views ", WSGIDriver(concurrency), sync_path),
+            ("ASGI  sync views ", ASGIDriver(concurrency), sync_path),
+            ("ASGI  async views", ASGIDriver(concurrency), async_path),
+        ]
+        # After the applications are built: their django.setup() reconfigures logging.
+        logging.getLogger("dante_library_project.timing").disabled = True
+        # Cached responses would measure the cache rather than the views.
+        with override_settings(CONTENT_CACHE_ENABLED=False, SERVER_TIMING_HEADER=False, DEBUG=False):
+            self.stdout.write(f"{count} requests, concurrency {concurrency}: {sync_path} / {async_path}")
+            for label, driver, path in runs:
+                driver.run([path] * min(count, concurrency))  # warm up connections and caches
+                start = time.perf_counter()
+                results = driver.run([path] * count)
+                self.stdout.write(f"{label}  {summarize(results, time.perf_counter() - start)}")
+
+    def paths(self, endpoint, part):
+        chapter = part.chapter
+        lesson = chapter.lesson
+        names = {
+            "grades": ("grades-list", []),
+            "lessons": ("lessons-by-grade", [lesson.grade_id]),
+            "chapters": ("chapters-by-lesson", [lesson.pk]),
+            "parts": ("parts-by-chapter", [chapter.pk]),
+            "part": ("part-detail", [part.pk]),
+            "content": ("part-content", [part.pk]),
+        }
+        name, args = names[endpoint]
+        return reverse(name, args=args), reverse(f"async-{name}", args=args)
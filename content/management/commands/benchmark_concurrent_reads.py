@@ -0,0 +1,125 @@
+import logging
+import statistics
+import subprocess
+import sys
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connections
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+from content import models
+
+
+# =====================
+# Readers
+# =====================
+
+class ReadLoad:
+    """Round-robin GETs over a few endpoints, recording latency and failures."""
+
+    def __init__(self, urls):
+        self.client = Client()
+        self.urls = urls
+        self.index = 0
+
+    def run(self, until):
+        latencies = []
+        errors = []
+        while not until():
+            url = self.urls[self.index % len(self.urls)]
+            self.index += 1
+            start = time.perf_counter()
+            try:
+                response = self.client.get(url)
+                if response.status_code != 200:
+                    errors.append(f"{url}: {response.status_code}")
+            except OperationalError as exc:
+                errors.append(f"{url}: {exc}")
+            latencies.append(time.perf_counter() - start)
+        return latencies, errors
+
+
+def summarize(latencies):
+    if not latencies:
+        return "no requests"
+    ordered = sorted(latencies)
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    return (
+        f"{len(ordered)} requests, p50 {statistics.median(ordered) * 1000:.1f}ms, "
+        f"p95 {p95 * 1000:.1f}ms, max {ordered[-1] * 1000:.1f}ms"
+    )
+
+
+# =====================
+# Django Command
+# =====================
+
+class Command(BaseCommand):
+    help = (
+        "Measure API read latency while generate_catalog writes in another process. "
+        "Run it with and without DANTE_DATABASE_PROFILE=production to compare journal modes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--baseline", type=float, default=2.0, help="Seconds of reads before the writer starts")
+        parser.add_argument("--prefix", default="bench", help="Grade/subject code prefix of the written catalog")
+        parser.add_argument("--grades", type=int, default=4, help="Grades the writer generates")
+        parser.add_argument("--parts", type=int, default=50, help="Parts per chapter the writer generates")
+        parser.add_argument("--keep", action="store_true", help="Keep the written catalog instead of deleting it")
+
+    def handle(self, *args, **options):
+        prefix = options["prefix"]
+        if models.Grade.objects.filter(code__startswith=prefix).exists():
+            raise CommandError(f"Grades with prefix '{prefix}' already exist; use another --prefix.")
+
+        urls = self.read_urls()
+        if not urls:
+            raise CommandError("No content to read; seed the database first.")
+
+        self.stdout.write(f"Database: {settings.DATABASES['default']['NAME']} ({', '.join(connections)})")
+        with connections["default"].cursor() as cursor:
+            cursor.execute("PRAGMA journal_mode")
+            self.stdout.write(f"Journal mode: {cursor.fetchone()[0]}")
+
+        logging.getLogger("dante_library_project.timing").disabled = True
+        # Cached responses would never touch the database.
+        with override_settings(CONTENT_CACHE_ENABLED=False, SERVER_TIMING_HEADER=False):
+            load = ReadLoad(urls)
+
+            deadline = time.perf_counter() + options["baseline"]
+            latencies, errors = load.run(lambda: time.perf_counter() >= deadline)
+            self.stdout.write(f"Idle:    {summarize(latencies)}, {len(errors)} errors")
+
+            writer = subprocess.Popen(
+                [
+                    sys.executable, str(settings.BASE_DIR / "manage.py"), "generate_catalog",
+                    "--prefix", prefix, "--grades", str(options["grades"]), "--parts", str(options["parts"]),
+                ],
+                stdout=subprocess.DEVNULL,
+            )
+            started = time.perf_counter()
+            latencies, errors = load.run(lambda: writer.poll() is not None)
+            elapsed = time.perf_counter() - started
+            self.stdout.write(f"Writing: {summarize(latencies)}, {len(errors)} errors")
+            self.stdout.write(f"Writer finished in {elapsed:.1f}s with exit code {writer.returncode}")
+            for error in errors[:5]:
+                self.stderr.write(f"  {error}")
+
+        if not options["keep"]:
+            models.Grade.objects.filter(code__startswith=prefix).delete()
+            models.Subject.objects.filter(code__startswith=f"{prefix}_").delete()
+
+    def read_urls(self):
+        part = models.Part.objects.select_related("chapter__lesson").order_by("pk").first()
+        if part is None:
+            return []
+        chapter = part.chapter
+        return [
+            reverse("grades-list"),
+            reverse("lessons-by-grade", args=[chapter.lesson.grade_id]),
+            reverse("chapters-by-lesson", args=[chapter.lesson_id]),
+            reverse("parts-by-chapter", args=[chapter.pk]),
+            reverse("part-detail", args=[part.pk]),
+        ]
@@ -0,0 +1,67 @@
+import time
+from django.core.management.base import BaseCommand
+from django.db.models import Count
+from rest_framework.response import Response
+from dante_library_project.renderers import CustomJSONRenderer, Envelope, OrjsonRenderer, orjson
+from content import models, serializers
+from content.views import CatalogAPIView
+
+
+# =====================
+# Payloads
+# =====================
+
+def build_payloads():
+    """Serialized bodies shaped like the real endpoints' responses."""
+    payloads = []
+
+    grades = serializers.GradeSerializer(models.Grade.objects.all(), many=True).data
+    payloads.append(("grades", Envelope(message="grade find success", data=grades)))
+
+    chapter = models.Chapter.objects.annotate(n=Count("parts")).order_by("-n").first()
+    if chapter is not None:
+        parts = serializers.PartSerializer(chapter.parts.all(), many=True).data
+        payloads.append((f"parts ({len(parts)})", {"status_code": 200, "message": "OK", "data": parts}))
+
+    catalog = serializers.CatalogGradeSerializer(CatalogAPIView().get_queryset(), many=True).data
+    payloads.append(("catalog", Envelope(message="catalog find success", data=catalog)))
+    return payloads
+
+
+def time_render(renderer, data, iterations):
+    context = {"response": Response(status=200)}
+    start = time.perf_counter()
+    for _ in range(iterations):
+        body = renderer.render(data, "application/json", context)
+    return (time.perf_counter() - start) / iterations, body
+
+
+# =====================
+# Django Command
+# =====================
+
+class Command(BaseCommand):
+    help = "Compare the per-response cost of the stdlib and orjson envelope renderers."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--iterations",
+            type=int,
+            default=200,
+            help="Renders per payload and renderer"
+        )
+
+    def handle(self, *args, **options):
+        if orjson is None:
+            self.stderr.write("orjson is not installed.")
+            return
+
+        iterations = max(options["iterations"], 1)
+        for name, data in build_payloads():
+            stdlib, expected = time_render(CustomJSONRenderer(), data, iterations)
+            fast, body = time_render(OrjsonRenderer(), data, iterations)
+            self.stdout.write(
+                f"{name}: {len(expected)} bytes, json {stdlib * 1e6:.1f}us, "
+                f"orjson {fast * 1e6:.1f}us ({stdlib / fast:.1f}x), "
+                f"identical: {'yes' if body == expected else 'no'}"
+            )
@@ -0,0 +1,152 @@
+import io
+import logging
+from django.contrib import admin
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.test.utils import override_settings, setup_databases, teardown_databases
+from django.urls import reverse
+from content import dependencies, models, search
+from content.management.commands.generate_catalog import CatalogGenerator
+from content.querycount import QueryCountError, assert_constant_queries
+
+
+PREFIX = "querycount"
+
+
+# =====================
+# Fixtures
+# =====================
+
+class Fixture:
+    """A synthetic catalog of `size` grades, subjects, chapters per lesson and parts per chapter."""
+
+    def __init__(self, size):
+        generator = CatalogGenerator(io.StringIO(), prefix=PREFIX, batch_size=1000, html_median=512)
+        generator.generate(size, size, size, size)
+        if search.is_available():
+            generator.index()
+        dependencies.index_parts(models.Part.objects.filter(chapter__lesson__grade__code__startswith=PREFIX))
+
+        self.grades = list(models.Grade.objects.filter(code__startswith=PREFIX).order_by("code"))
+        self.lessons = list(models.Lesson.objects.filter(grade__in=self.grades).order_by("pk"))
+        self.chapters = list(models.Chapter.objects.filter(lesson__in=self.lessons).order_by("pk"))
+        self.grade = self.grades[0]
+        self.lesson = self.lessons[0]
+        self.chapter = self.chapters[0]
+        self.part = models.Part.objects.filter(chapter=self.chapter).order_by("number").first()
+
+
+def joined_ids(objects):
+    return ",".join(str(obj.pk) for obj in objects)
+
+
+# (label, method, fixture -> (url, data)) for every endpoint in content/views.py.
+API_CHECKS = [
+    ("grades", "get", lambda f: (reverse("grades-list"), None)),
+    ("lessons", "get", lambda f: (reverse("lessons-by-grade", args=[f.grade.pk]), None)),
+    ("lessons POST", "post", lambda f: (reverse("lessons-list"), {"grade_id": str(f.grade.pk)})),
+    ("lessons batch", "get", lambda f: (reverse("lessons-batch"), {"grade_ids": joined_ids(f.grades)})),
+    ("chapters", "get", lambda f: (reverse("chapters-by-lesson", args=[f.lesson.pk]), None)),
+    ("chapters POST", "post", lambda f: (reverse("chapters-list"), {"lesson_id": str(f.lesson.pk)})),
+    ("chapters batch", "get", lambda f: (reverse("chapters-batch"), {"lesson_ids": joined_ids(f.lessons)})),
+    ("parts", "get", lambda f: (reverse("parts-by-chapter", args=[f.chapter.pk]), None)),
+    ("parts with html", "get", lambda f: (reverse("parts-by-chapter", args=[f.chapter.pk]), {"omit": ""})),
+    ("parts POST", "post", lambda f: (reverse("parts-list"), {"chapter_id": str(f.chapter.pk)})),
+    ("parts batch", "get", lambda f: (reverse("parts-batch"), {"chapter_ids": joined_ids(f.chapters)})),
+    ("part detail", "get", lambda f: (reverse("part-detail", args=[f.part.pk]), None)),
+    ("part assets", "get", lambda f: (reverse("part-assets", args=[f.part.pk]), None)),
+    ("chapter assets", "get", lambda f: (reverse("chapter-assets", args=[f.chapter.pk]), None)),
+    ("catalog", "get", lambda f: (reverse("catalog"), None)),
+    ("catalog by grade", "get", lambda f: (reverse("catalog-by-grade", args=[f.grade.pk]), None)),
+    ("search", "get", lambda f: (reverse("search"), {"q": "energy"})),
+    ("sync", "get", lambda f: (reverse("sync"), None)),
+]
+
+
+# =====================
+# Django Command
+# =====================
+
+class Command(BaseCommand):
+    help = "Fail if any API endpoint or admin changelist runs more queries as its result grows (N+1)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes",
+            type=int,
+            nargs="+",
+            default=[1, 3],
+            help="Fixture sizes to compare; the catalog holds size**4 parts"
+        )
+
+    def handle(self, *args, **options):
+        sizes = sorted(set(max(size, 1) for size in options["sizes"]))
+        if len(sizes) < 2:
+            raise CommandError("Give at least two different --sizes.")
+
+        failures = []
+        # One timing log line per request would bury the report.
+        timing_logger = logging.getLogger("dante_library_project.timing")
+        timing_logger.disabled, was_disabled = True, timing_logger.disabled
+        # Existing rows would fill list pages whatever the fixture size, so
+        # the checks run against a fresh test database, as the test runner does.
+        old_config = setup_databases(verbosity=0, interactive=False)
+        try:
+            self.run_checks(sizes, failures)
+        finally:
+            teardown_databases(old_config, verbosity=0)
+            timing_logger.disabled = was_disabled
+
+        if failures:
+            raise CommandError(f"Query count depends on result size for: {', '.join(failures)}")
+
+    def run_checks(self, sizes, failures):
+        # Cached responses would hide the queries being checked, reads must
+        # stay on the connection holding the uncommitted fixtures, and sync
+        # must see the fixtures it was just given.
+        with override_settings(CONTENT_CACHE_ENABLED=False, ALLOWED_HOSTS=["testserver"], SERVER_TIMING_HEADER=False,
+                               DATABASE_ROUTERS=[], CONTENT_SYNC_SETTLE_SECONDS=0):
+            for label, prepare in self.checks():
+                try:
+                    counts = assert_constant_queries(prepare, sizes, label=label)
+                except QueryCountError as exc:
+                    failures.append(label)
+                    self.stderr.write(f"FAIL {exc}")
+                else:
+                    self.stdout.write(f"ok   {label}: {counts[sizes[0]]} queries")
+
+    def checks(self):
+        for label, method, build in API_CHECKS:
+            yield label, self.api_check(label, method, build)
+        for model in admin.site._registry:
+            yield f"admin {model._meta.label_lower} changelist", self.admin_check(model)
+
+    def api_check(self, label, method, build):
+        def prepare(size):
+            url, data = build(Fixture(size))
+            client = Client()
+            if method == "post":
+                return self.request(label, lambda: client.post(url, data, content_type="application/json"))
+            return self.request(label, lambda: client.get(url, data))
+        return prepare
+
+    def admin_check(self, model):
+        url = reverse(f"admin:{model._meta.app_label}_{model._meta.model_name}_changelist")
+
+        def prepare(size):
+            Fixture(size)
+            user = get_user_model().objects.create_superuser(f"{PREFIX}-admin", f"{PREFIX}@example.com", None)
+            client = Client()
+            client.force_login(user)
+            return self.request(url, lambda: client.get(url))
+        return prepare
+
+    @staticmethod
+    def request(label, send):
+        def run():
+            response = send()
+            if response.status_code != 200:
+                raise CommandError(f"{label}: expected 200, got {response.status_code}")
+        return run
+
@@ -0,0 +1,55 @@
+import time
+from django.core.management.base import BaseCommand, CommandError
+from dante_library_project.renderers import CustomJSONRenderer
+from content import serializers
+
+
+SERIALIZERS = [
+    serializers.GradeSerializer,
+    serializers.SubjectSerializer,
+    serializers.LessonSerializer,
+    serializers.ChapterSerializer,
+    serializers.PartSerializer,
+]
+
+
+# =====================
+# Django Command
+# =====================
+
+class Command(BaseCommand):
+    help = "Check that ValuesSerializer renders every model exactly like its DRF serializer."
+
+    def handle(self, *args, **options):
+        renderer = CustomJSONRenderer()
+        failures = []
+
+        for serializer_class in SERIALIZERS:
+            model = serializer_class.Meta.model
+            queryset = model.objects.order_by("pk")
+            values_serializer = serializers.ValuesSerializer(serializer_class)
+
+            start = time.perf_counter()
+            expected = serializer_class(queryset, many=True).data
+            drf_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            actual = values_serializer.to_representation(values_serializer.values(queryset))
+            values_time = time.perf_counter() - start
+
+            mismatches = [
+                row["id"] for row, other in zip(expected, actual)
+                if renderer.render(row) != renderer.render(other)
+            ]
+            if len(expected) != len(actual) or renderer.render(expected) != renderer.render(actual):
+                failures.append(model.__name__)
+
+            self.stdout.write(
+                f"{model.__name__}: {len(expected)} rows, serializer {drf_time * 1000:.1f}ms, "
+                f"values {values_time * 1000:.1f}ms, mismatches: {len(mismatches)}"
+            )
+            for pk in mismatches[:5]:
+                self.stderr.write(f"  differs: {pk}")
+
+        if failures:
+            raise CommandError(f"Output differs for: {', '.join(failures)}")
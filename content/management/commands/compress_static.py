@@ -0,0 +1,114 @@
+import gzip
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from django.core.management.base import BaseCommand
+from content import assets
+
+try:
+    import brotli
+except ImportError:  # optional: without it only .gz siblings are built
+    brotli = None
+
+
+# =====================
+# Compression
+# =====================
+
+def compress(data: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(data, quality=11)
+    # mtime=0 keeps the output byte-for-byte reproducible.
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+
+def build_siblings(path: str, encodings):
+    """Write the compressed siblings of one file; return (written, skipped, removed, saved)."""
+    source = Path(path)
+    source_mtime = source.stat().st_mtime
+    data = None
+    written = skipped = removed = saved = 0
+
+    for encoding in encodings:
+        target = assets.encoded_sibling(source, encoding)
+        if target.exists() and target.stat().st_mtime >= source_mtime:
+            skipped += 1
+            continue
+
+        if data is None:
+            data = source.read_bytes()
+        compressed = compress(data, encoding)
+
+        if len(compressed) >= len(data):
+            # Not worth serving; drop an outdated sibling from an earlier run.
+            if target.exists():
+                target.unlink()
+                removed += 1
+            continue
+
+        tmp = target.with_name(target.name + ".tmp")
+        tmp.write_bytes(compressed)
+        os.replace(tmp, target)
+        written += 1
+        saved += len(data) - len(compressed)
+
+    return written, skipped, removed, saved
+
+
+def available_encodings():
+    """Sibling encodings this install can build, in order of preference."""
+    return [encoding for encoding, _ in assets.ENCODING_SUFFIXES if encoding != "br" or brotli is not None]
+
+
+def compress_paths(paths, workers=None):
+    """Build the siblings of every compressible path on a process pool; return the summed totals."""
+    paths = [str(path) for path in paths if assets.is_compressible(Path(path)) and not assets.is_junk(Path(path))]
+    encodings = available_encodings()
+    totals = [0, 0, 0, 0]
+    if not paths:
+        return totals
+    with ProcessPoolExecutor(max_workers=max(workers or os.cpu_count() or 1, 1)) as pool:
+        for result in pool.map(build_siblings, paths, [encodings] * len(paths), chunksize=16):
+            totals = [a + b for a, b in zip(totals, result)]
+    return totals
+
+
+def iter_compressible(root: Path):
+    for dirpath, _, filenames in os.walk(root):
+        for name in sorted(filenames):
+            path = Path(dirpath) / name
+            if assets.is_compressible(path) and not assets.is_junk(path):
+                yield str(path)
+
+
+# =====================
+# Django Command
+# =====================
+
+class Command(BaseCommand):
+    help = "Write .gz and .br siblings for every compressible file in the content tree."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=os.cpu_count() or 1,
+            help="Number of compression processes"
+        )
+
+    def handle(self, *args, **options):
+        root = assets.content_root()
+
+        if not root.exists():
+            self.stderr.write(f"Root directory not found: {root}")
+            return
+
+        if brotli is None:
+            self.stderr.write("brotli is not installed; only gzip siblings will be built.")
+
+        paths = list(iter_compressible(root))
+        written, skipped, removed, saved = compress_paths(paths, max(options["workers"], 1))
+        self.stdout.write(
+            f"{len(paths)} files: {written} siblings written, {skipped} up to date, "
+            f"{removed} removed, {saved} bytes saved"
+        )
@@ -0,0 +1,297 @@
+import hashlib
+import os
+from collections import Counter
+from pathlib import Path
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from content import assets, dependencies, models, search
+from content.cache import bump_versions, scope_for
+from content.management.commands.compress_static import compress_paths
+
+
+# =====================
+# Page rewrites
+# =====================
+
+def record_rewrites(moves):
+    """Record that each part whose page was served from `old` is now served from `new`.
+
+    `moves` holds `(part, old, new)`. `old` is the authoring page, its served
+    copy or an earlier rewrite of it; the record keeps naming the authoring
+    page, so seed_all_grades goes on serving `new` (see PageRewrite).
+    Identical pages share `old`, so earlier records are matched by part.
+    """
+    previous = {
+        rewrite.part_id: rewrite
+        for rewrite in models.PageRewrite.objects.filter(part__in=[part for part, _, _ in moves])
+    }
+    rewrites = []
+    for part, old, new in moves:
+        rewrite = previous.get(part.pk)
+        if rewrite is None or rewrite.content_url != old:
+            # `old` may be the served copy seed_all_grades made of the page.
+            source_url = assets.authoring_url(old)
+            stat = assets.url_to_path(source_url).stat()
+            rewrite = models.PageRewrite(source_url=source_url, source_size=stat.st_size,
+                                         source_mtime_ns=stat.st_mtime_ns)
+        rewrites.append(models.PageRewrite(part=part, source_url=rewrite.source_url, source_size=rewrite.source_size,
+                                           source_mtime_ns=rewrite.source_mtime_ns, content_url=new))
+    models.PageRewrite.objects.bulk_create(
+        rewrites,
+        batch_size=500,
+        update_conflicts=True,
+        unique_fields=["part"],
+        update_fields=["source_url", "source_size", "source_mtime_ns", "content_url", "updated_at"],
+    )
+
+
+# =====================
+# Deduplicator
+# =====================
+
+class ContentDeduplicator:
+    """Store every asset referenced by part HTML once, under its content hash.
+
+    Part HTML is rewritten so its references point at the shared blobs, the
+    rewritten page is stored as a blob as well and `Part.content_url` is
+    switched to it (and recorded as a PageRewrite, which seed_all_grades
+    honours). Blobs live in `<root>/_cas/`, next to the authoring tree, so
+    the existing static serving picks them up unchanged. Pruning removes the
+    original asset copies only; seed_all_grades still reads the part pages.
+    Each original's blob is recorded as an AssetBlob, so a page edited after
+    pruning still reaches its assets when it is copied or deduplicated again.
+    """
+
+    def __init__(self, root: Path, stdout, dry_run=False):
+        self.root = root
+        self.stdout = stdout
+        self.dry_run = dry_run
+        self.stats = Counter()
+        self.asset_urls = {}
+        self.blob_sizes = {}
+        self.asset_blob_sizes = {}
+        self.migrated_sources = set()
+        self.stored = []
+        self.moved = None
+
+    # ---- tree maintenance ----
+
+    def remove_junk(self):
+        for dirpath, _, filenames in os.walk(self.root):
+            for name in filenames:
+                path = Path(dirpath) / name
+                if assets.is_junk(path):
+                    self.stats["junk_files"] += 1
+                    self.stats["junk_bytes"] += path.stat().st_size
+                    if not self.dry_run:
+                        path.unlink()
+
+    def survey(self):
+        """Hash every asset in the authoring tree to measure duplication."""
+        seen = set()
+        for dirpath, dirnames, filenames in os.walk(self.root):
+            dirnames[:] = [d for d in dirnames if d != assets.CAS_DIRNAME]
+            for name in filenames:
+                path = Path(dirpath) / name
+                if assets.is_junk(path):
+                    continue
+                size = path.stat().st_size
+                digest = assets.file_digest(path)
+                self.stats["tree_files"] += 1
+                self.stats["tree_bytes"] += size
+                if digest not in seen:
+                    seen.add(digest)
+                    self.stats["tree_unique_bytes"] += size
+
+    # ---- blobs ----
+
+    def store_blob(self, data: bytes, digest: str, suffix: str) -> str:
+        target = assets.cas_path(digest, suffix)
+        if digest not in self.blob_sizes:
+            self.blob_sizes[digest] = len(data)
+            if not self.dry_run:
+                self.stored.append(target)
+            if not self.dry_run and not target.exists():
+                target.parent.mkdir(parents=True, exist_ok=True)
+                tmp = target.with_name(target.name + ".tmp")
+                tmp.write_bytes(data)
+                os.replace(tmp, target)
+        return assets.path_to_url(target)
+
+    def asset_url(self, path: Path) -> str:
+        if path in self.asset_urls:
+            return self.asset_urls[path]
+
+        data = path.read_bytes()
+        if path.suffix.lower() == ".css":
+            # Stylesheets carry relative url()s of their own.
+            text = self.rewrite(data.decode("utf-8", errors="replace"), path)
+            data = text.encode("utf-8")
+
+        digest = hashlib.sha256(data).hexdigest()
+        self.stats["asset_copies"] += 1
+        self.stats["asset_copy_bytes"] += len(data)
+        url = self.store_blob(data, digest, path.suffix)
+        self.asset_blob_sizes[digest] = len(data)
+        self.asset_urls[path] = url
+        if assets.CAS_DIRNAME not in path.relative_to(self.root).parts:
+            self.migrated_sources.add(path)
+        return url
+
+    def rewrite(self, text: str, base: Path = None) -> str:
+        def replace(ref):
+            target = assets.resolve_reference(ref, base)
+            if target is None:
+                return self.moved_url(ref, base)
+            if target.suffix.lower() == ".html":
+                return None
+            _, suffix = assets.split_reference(ref)
+            return self.asset_url(target) + suffix
+
+        return assets.rewrite_references(text, replace)
+
+    def moved_url(self, ref: str, base: Path = None):
+        """The blob of the pruned original `ref` names (see AssetBlob), or None."""
+        if self.moved is None:
+            self.moved = dict(models.AssetBlob.objects.values_list("source_url", "blob_url"))
+        path = assets.reference_path(ref, base)
+        blob = self.moved.get(assets.path_to_url(path)) if path is not None else None
+        return None if blob is None else blob + assets.split_reference(ref)[1]
+
+    def record_assets(self):
+        """Record the blob of every original migrated in this run, before any is pruned."""
+        blobs = [
+            models.AssetBlob(source_url=assets.path_to_url(path), blob_url=self.asset_urls[path])
+            for path in sorted(self.migrated_sources)
+        ]
+        if self.dry_run or not blobs:
+            return
+        models.AssetBlob.objects.bulk_create(
+            blobs,
+            batch_size=500,
+            update_conflicts=True,
+            unique_fields=["source_url"],
+            update_fields=["blob_url", "updated_at"],
+        )
+
+    # ---- parts ----
+
+    def dedupe_parts(self):
+        changed = []
+        moves = []
+        parts = models.Part.objects.only("id", "chapter_id", "title", "content_type", "content_url", "html")
+
+        for part in parts.iterator():
+            if part.content_type == models.Part.CONTENT_TYPE_URL:
+                source = assets.url_to_path(part.content_url or "")
+                if source is None or not source.is_file():
+                    self.stats["parts_missing"] += 1
+                    continue
+                text = source.read_text(encoding="utf-8", errors="replace")
+                data = self.rewrite(text, source).encode("utf-8")
+                url = self.store_blob(data, hashlib.sha256(data).hexdigest(), source.suffix)
+                if url != part.content_url:
+                    moves.append((part, part.content_url, url))
+                    part.content_url = url
+                    changed.append(part)
+            elif part.html:
+                html = self.rewrite(part.html)
+                if html != part.html:
+                    part.html = html
+                    changed.append(part)
+
+        self.stats["parts_updated"] = len(changed)
+        if self.dry_run or not changed:
+            return
+
+        now = timezone.now()
+        for part in changed:
+            part.updated_at = now
+        with transaction.atomic():
+            models.Part.objects.bulk_update(changed, ["content_url", "html", "updated_at"], batch_size=500)
+            if moves:
+                record_rewrites(moves)
+        # bulk_update does not send post_save; invalidate the parts lists and
+        # refresh the search documents and asset index here.
+        bump_versions(*{scope_for("chapter", part.chapter_id) for part in changed})
+        search.index_parts(changed)
+        dependencies.index_parts(models.Part.objects.filter(pk__in=[part.pk for part in changed]))
+
+    def compress_stored(self):
+        """Write the missing `.br`/`.gz` siblings of the files this run stored or reused."""
+        self.stats["siblings_written"] = compress_paths(self.stored)[0]
+
+    def prune(self):
+        for path in self.migrated_sources:
+            self.stats["pruned_files"] += 1
+            self.stats["pruned_bytes"] += path.stat().st_size
+            if not self.dry_run:
+                path.unlink()
+                # ...and the precompressed siblings compress_static wrote.
+                for encoding, _ in assets.ENCODING_SUFFIXES:
+                    assets.encoded_sibling(path, encoding).unlink(missing_ok=True)
+
+    def outcome(self, subject: str, verb: str) -> str:
+        """`Parts updated`, or `Parts that would be updated` under --dry-run."""
+        return f"{subject} that would be {verb}" if self.dry_run else f"{subject} {verb}"
+
+    def report(self):
+        s = self.stats
+        asset_blob_bytes = sum(self.asset_blob_sizes.values())
+        self.stdout.write(f"{self.outcome('Junk files', 'removed')}: {s['junk_files']} ({s['junk_bytes']} bytes)")
+        self.stdout.write(
+            f"Tree: {s['tree_files']} files, {s['tree_bytes']} bytes, "
+            f"{s['tree_bytes'] - s['tree_unique_bytes']} bytes duplicated"
+        )
+        self.stdout.write(
+            f"Referenced assets: {s['asset_copies']} copies ({s['asset_copy_bytes']} bytes) "
+            f"-> {len(self.asset_blob_sizes)} blobs ({asset_blob_bytes} bytes)"
+        )
+        self.stdout.write(f"{self.outcome('Bytes', 'saved')}: {s['asset_copy_bytes'] - asset_blob_bytes}")
+        self.stdout.write(
+            f"{self.outcome('Parts', 'updated')}: {s['parts_updated']} (missing files: {s['parts_missing']})"
+        )
+        if not self.dry_run:
+            self.stdout.write(f"Precompressed siblings written: {s['siblings_written']}")
+        if s["pruned_files"]:
+            self.stdout.write(
+                f"{self.outcome('Originals', 'pruned')}: {s['pruned_files']} ({s['pruned_bytes']} bytes)"
+            )
+
+
+# =====================
+# Django Command
+# =====================
+
+class Command(BaseCommand):
+    help = "Store each unique static asset once under a content-hash path and repoint part HTML at it."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Report what would change without writing files or rows"
+        )
+        parser.add_argument(
+            "--prune",
+            action="store_true",
+            help="Delete the original copies of every migrated asset (part HTML is kept for seed_all_grades)"
+        )
+
+    def handle(self, *args, **options):
+        root = assets.content_root()
+
+        if not root.exists():
+            self.stderr.write(f"Root directory not found: {root}")
+            return
+
+        dedup = ContentDeduplicator(root.resolve(), stdout=self.stdout, dry_run=options["dry_run"])
+        dedup.remove_junk()
+        dedup.survey()
+        dedup.dedupe_parts()
+        dedup.compress_stored()
+        dedup.record_assets()
+        if options["prune"]:
+            dedup.prune()
+        dedup.report()
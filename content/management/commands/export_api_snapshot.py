@@ -0,0 +1,179 @@
+import json
+import os
+import shutil
+import time
+import uuid
+from pathlib import Path
+from django.core.management.base import BaseCommand, CommandError
+from django.test import RequestFactory
+from django.test.utils import override_settings
+from django.urls import resolve, reverse
+from django.utils import timezone
+from content import assets, models
+from content.management.commands.compress_static import brotli, compress
+
+
+MANIFEST_NAME = "snapshot.json"
+INDEX_NAME = "index.json"
+
+
+# =====================
+# Snapshot
+# =====================
+
+def snapshot_urls():
+    """Every exported API path: the read endpoints of each grade, lesson, chapter and part."""
+    yield reverse("grades-list")
+    yield reverse("catalog")
+    for pk in models.Grade.objects.order_by("code").values_list("pk", flat=True):
+        yield reverse("lessons-by-grade", args=[pk])
+        yield reverse("catalog-by-grade", args=[pk])
+    for pk in models.Lesson.objects.order_by("pk").values_list("pk", flat=True):
+        yield reverse("chapters-by-lesson", args=[pk])
+    for pk in models.Chapter.objects.order_by("pk").values_list("pk", flat=True):
+        yield reverse("parts-by-chapter", args=[pk])
+    for pk in models.Part.objects.order_by("pk").values_list("pk", flat=True):
+        yield reverse("part-detail", args=[pk])
+
+
+class SnapshotBuilder:
+    """Render API responses into `root` through the real views and renderer.
+
+    A response for `/api/x/y` is stored as `api/x/y/index.json` with .br/.gz
+    siblings, so nginx can answer it with `try_files $uri/index.json` and
+    brotli_static/gzip_static. With a previous snapshot, each URL is requested
+    with the ETag recorded for it; when the view answers 304 the old files are
+    hard-linked into `root` instead of being rendered and compressed again.
+    """
+
+    def __init__(self, root: Path, encodings, previous: Path = None, previous_etags=None):
+        self.root = root
+        self.encodings = encodings
+        self.previous = previous
+        self.previous_etags = previous_etags or {}
+        self.factory = RequestFactory()
+        self.etags = {}
+        self.rendered = self.reused = self.size = 0
+
+    def export(self, url):
+        etag = self.previous_etags.get(url) if self.previous is not None else None
+        headers = {"HTTP_IF_NONE_MATCH": etag} if etag else {}
+        match = resolve(url)
+        response = match.func(self.factory.get(url, **headers), *match.args, **match.kwargs)
+        if hasattr(response, "render"):
+            response.render()
+
+        target = self.root / url.lstrip("/") / INDEX_NAME
+        target.parent.mkdir(parents=True, exist_ok=True)
+        if response.status_code == 304 and self.link_previous(url, target):
+            self.etags[url] = etag
+            self.reused += 1
+            return
+        if response.status_code != 200:
+            raise CommandError(f"{url}: expected 200, got {response.status_code}")
+
+        data = response.content
+        target.write_bytes(data)
+        for encoding in self.encodings:
+            compressed = compress(data, encoding)
+            if len(compressed) < len(data):
+                assets.encoded_sibling(target, encoding).write_bytes(compressed)
+        self.etags[url] = response.get("ETag")
+        self.rendered += 1
+        self.size += len(data)
+
+    def link_previous(self, url, target):
+        source = self.previous / url.lstrip("/") / INDEX_NAME
+        if not source.is_file():
+            return False
+        pairs = [(source, target)] + [
+            (assets.encoded_sibling(source, encoding), assets.encoded_sibling(target, encoding))
+            for encoding in self.encodings
+        ]
+        for old, new in pairs:
+            if old.is_file():
+                try:
+                    os.link(old, new)
+                except OSError:  # e.g. another filesystem
+                    shutil.copy2(old, new)
+        return True
+
+    def write_manifest(self):
+        manifest = {"version": 1, "created": timezone.now().isoformat(), "responses": self.etags}
+        (self.root / MANIFEST_NAME).write_text(json.dumps(manifest, indent=2, sort_keys=True), encoding="utf-8")
+
+
+def read_manifest(path: Path):
+    try:
+        return json.loads((path / MANIFEST_NAME).read_text(encoding="utf-8"))["responses"]
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+# =====================
+# Django Command
+# =====================
+
+class Command(BaseCommand):
+    help = (
+        "Render every grade, lesson, chapter, part list and part detail response to static "
+        "JSON files (with .br/.gz variants) and atomically swap them in at --output."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--output",
+            required=True,
+            help="Symlink to the current snapshot; each export builds a sibling directory and repoints it"
+        )
+        parser.add_argument(
+            "--changed",
+            action="store_true",
+            help="Only re-render responses whose ETag changed since the current snapshot"
+        )
+
+    def handle(self, *args, **options):
+        output = Path(options["output"]).absolute()
+        if output.exists() and not output.is_symlink():
+            raise CommandError(f"{output} exists and is not a snapshot symlink.")
+
+        encodings = [encoding for encoding, _ in assets.ENCODING_SUFFIXES]
+        if brotli is None:
+            self.stderr.write("brotli is not installed; only gzip variants will be built.")
+            encodings.remove("br")
+
+        previous = output.resolve() if output.is_symlink() else None
+        previous_etags = None
+        if options["changed"]:
+            previous_etags = read_manifest(previous) if previous is not None else None
+            if previous_etags is None:
+                self.stderr.write("No current snapshot to compare with; exporting everything.")
+
+        started = time.perf_counter()
+        output.parent.mkdir(parents=True, exist_ok=True)
+        build = output.with_name(f"{output.name}-{timezone.now():%Y%m%d%H%M%S}-{uuid.uuid4().hex[:8]}")
+        builder = SnapshotBuilder(build, encodings, previous if previous_etags else None, previous_etags)
+        try:
+            # The response cache would only hand back copies of the same bodies.
+            with override_settings(CONTENT_CACHE_ENABLED=False):
+                for url in snapshot_urls():
+                    builder.export(url)
+            builder.write_manifest()
+
+            # Swap by renaming a new symlink over the old one, so readers see
+            # either snapshot in full and never a mix.
+            link = output.with_name(f".{output.name}.{uuid.uuid4().hex}")
+            os.symlink(build.name, link)
+            os.replace(link, output)
+        except BaseException:
+            shutil.rmtree(build, ignore_errors=True)
+            raise
+
+        if previous is not None and previous.parent == build.parent and previous.name.startswith(f"{output.name}-"):
+            # Only directories this command built; open files stay readable.
+            shutil.rmtree(previous, ignore_errors=True)
+
+        self.stdout.write(
+            f"{builder.rendered + builder.reused} responses: {builder.rendered} rendered ({builder.size} bytes), "
+            f"{builder.reused} unchanged, in {time.perf_counter() - started:.2f}s -> {build}"
+        )
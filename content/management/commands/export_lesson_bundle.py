@@ -0,0 +1,70 @@
+import time
+from pathlib import Path
+from django.core.management.base import BaseCommand, CommandError
+from content import bundles, models
+
+
+# =====================
+# Django Command
+# =====================
+
+class Command(BaseCommand):
+    help = "Build offline zip bundles of lessons into the bundle cache or a directory."
+
+    def add_arguments(self, parser):
+        parser.add_argument("lesson_ids", nargs="*", help="Lessons to bundle")
+        parser.add_argument("--all", action="store_true", help="Bundle every lesson")
+        parser.add_argument(
+            "--output",
+            help="Write <lesson id>.zip files to this directory instead of the bundle cache"
+        )
+        parser.add_argument(
+            "--prune",
+            action="store_true",
+            help="With --all, delete cached bundles that no lesson produces any more"
+        )
+
+    def handle(self, *args, **options):
+        lessons = models.Lesson.objects.select_related("grade", "subject").order_by("grade__code", "subject__code")
+        if not options["all"]:
+            if not options["lesson_ids"]:
+                raise CommandError("Give lesson ids or --all.")
+            lessons = lessons.filter(pk__in=options["lesson_ids"])
+
+        output = Path(options["output"]) if options["output"] else None
+        if output is None and bundles.cache_dir() is None:
+            raise CommandError("CONTENT_BUNDLE_CACHE_DIR is not set; use --output.")
+        if options["prune"] and (not options["all"] or output is not None):
+            raise CommandError("--prune needs --all and the bundle cache.")
+        if output is not None:
+            output.mkdir(parents=True, exist_ok=True)
+
+        current = set()
+        for lesson in lessons:
+            started = time.perf_counter()
+            bundle = bundles.LessonBundle(lesson).validate()
+            current.add(bundle.cached_path())
+
+            if output is not None:
+                path = output / f"{lesson.pk}.zip"
+                with open(path, "wb") as fh:
+                    for block in bundle.iter_zip():
+                        fh.write(block)
+            else:
+                path = bundle.cached_path()
+                if path.is_file():
+                    self.stdout.write(f"{lesson.title}: cached {path.name}")
+                    continue
+                for _ in bundle.iter_and_store():
+                    pass
+
+            self.stdout.write(
+                f"{lesson.title}: {len(bundle.pages)} pages, {len(bundle.files) + len(bundle.rewritten)} assets, "
+                f"{path.stat().st_size} bytes in {time.perf_counter() - started:.2f}s -> {path}"
+            )
+
+        if options["prune"]:
+            stale = [path for path in bundles.cache_dir().glob("*.zip") if path not in current]
+            for path in stale:
+                path.unlink()
+            self.stdout.write(f"Pruned {len(stale)} stale bundles")
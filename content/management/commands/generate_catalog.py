@@ -0,0 +1,230 @@
+import math
+import random
+import time
+import uuid
+from django.core.management.base import BaseCommand
+from django.db import reset_queries, transaction
+from content import assets, models, search
+from content.cache import bump_versions, scope_for
+
+
+# =====================
+# Text
+# =====================
+
+WORDS = (
+    "درس فصل گفتار یاخته بافت انرژی ماده اتم مولکول واکنش نیرو حرکت شتاب "
+    "معادله تابع نمودار هندسه مثلث دایره زاویه عدد کسر توان ریشه منطق "
+    "زبان ادبیات شعر نثر تاریخ جغرافیا زمین آب هوا گیاه جانور سلول ژن "
+    "فیزیک شیمی ریاضی زیست‌شناسی آمار احتمال داده آزمایش نتیجه فرضیه "
+    "cell energy atom force equation function graph data experiment result"
+).split()
+
+
+def make_uuid(rng: random.Random) -> uuid.UUID:
+    return uuid.UUID(int=rng.getrandbits(128), version=4)
+
+
+def make_sentence(rng: random.Random) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(6, 16))) + "."
+
+
+# =====================
+# Generator
+# =====================
+
+class CatalogGenerator:
+    """Build a reproducible synthetic grade -> subject -> lesson -> chapter -> part tree.
+
+    Everything random (ids, titles, HTML) comes from one seeded RNG, so the
+    same options always produce the same rows. Part HTML is stitched from a
+    pool of pre-rendered paragraphs with lognormally distributed sizes, and
+    rows are written with bulk_create in batches.
+    """
+
+    paragraph_pool_size = 256
+
+    def __init__(self, stdout, seed=0, prefix="syn", batch_size=5000,
+                 html_median=2048, html_sigma=1.0, html_max=256 * 1024, static_root=None):
+        self.stdout = stdout
+        # Catalogs with different prefixes must not share ids.
+        self.rng = random.Random(f"{prefix}:{seed}")
+        self.prefix = prefix
+        self.batch_size = batch_size
+        self.html_mu = math.log(max(html_median, 1))
+        self.html_sigma = html_sigma
+        self.html_max = html_max
+        self.static_root = static_root
+        self.paragraphs = [
+            "<p>" + " ".join(make_sentence(self.rng) for _ in range(self.rng.randint(2, 6))) + "</p>"
+            for _ in range(self.paragraph_pool_size)
+        ]
+        self.counts = {"grades": 0, "subjects": 0, "lessons": 0, "chapters": 0, "parts": 0,
+                       "html_bytes": 0, "files": 0}
+
+    # ---- content ----
+
+    def html_size(self) -> int:
+        return min(self.html_max, int(self.rng.lognormvariate(self.html_mu, self.html_sigma)))
+
+    def make_html(self, title: str) -> str:
+        target = self.html_size()
+        chunks = [f'<!DOCTYPE html><html lang="fa"><head><meta charset="utf-8"><title>{title}</title>'
+                  f'</head><body><h1>{title}</h1>']
+        size = len(chunks[0])
+        while size < target:
+            paragraph = self.rng.choice(self.paragraphs)
+            chunks.append(paragraph)
+            size += len(paragraph)
+        chunks.append("</body></html>")
+        return "".join(chunks)
+
+    def write_file(self, grade_code: str, subject_code: str, chapter: int, part: int, html: str) -> str:
+        path = self.static_root / grade_code / subject_code / f"Chapter {chapter}" / f"Part {part}" / f"P{part}.html"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(html, encoding="utf-8")
+        self.counts["files"] += 1
+        return assets.path_to_url(path)
+
+    # ---- rows ----
+
+    def generate(self, grades: int, subjects: int, chapters: int, parts: int):
+        grade_rows = [
+            models.Grade(id=make_uuid(self.rng), code=f"{self.prefix}{g:02d}", name=f"Synthetic Grade {g}")
+            for g in range(1, grades + 1)
+        ]
+        subject_rows = [
+            models.Subject(id=make_uuid(self.rng), code=f"{self.prefix}_subject_{s:03d}",
+                           title=f"Subject {s}", language="fa")
+            for s in range(1, subjects + 1)
+        ]
+        lesson_rows = [
+            models.Lesson(id=make_uuid(self.rng), grade=grade, subject=subject,
+                          title=f"{subject.title} - {grade.name}", description="")
+            for grade in grade_rows for subject in subject_rows
+        ]
+        chapter_rows = [
+            models.Chapter(id=make_uuid(self.rng), lesson=lesson, number=n,
+                           title=f"فصل {n}", summary=make_sentence(self.rng))
+            for lesson in lesson_rows for n in range(1, chapters + 1)
+        ]
+
+        with transaction.atomic():
+            for model, rows, key in ((models.Grade, grade_rows, "grades"), (models.Subject, subject_rows, "subjects"),
+                                     (models.Lesson, lesson_rows, "lessons"), (models.Chapter, chapter_rows, "chapters")):
+                model.objects.bulk_create(rows, batch_size=self.batch_size)
+                self.counts[key] = len(rows)
+
+            batch = []
+            for chapter in chapter_rows:
+                lesson = chapter.lesson
+                for n in range(1, parts + 1):
+                    title = f"گفتار {n} — {chapter.number}.{n}"
+                    html = self.make_html(title)
+                    self.counts["html_bytes"] += len(html.encode("utf-8"))
+                    fields = {"content_type": models.Part.CONTENT_TYPE_INLINE, "html": html}
+                    if self.static_root is not None:
+                        url = self.write_file(lesson.grade.code, lesson.subject.code, chapter.number, n, html)
+                        fields = {"content_type": models.Part.CONTENT_TYPE_URL, "content_url": url, "html": ""}
+                    batch.append(models.Part(id=make_uuid(self.rng), chapter=chapter, number=n, title=title,
+                                             mime="text/html", size_bytes=len(html.encode("utf-8")), **fields))
+                    if len(batch) >= self.batch_size:
+                        self.write_parts(batch)
+                        batch = []
+            self.write_parts(batch)
+
+        # bulk_create sends no post_save; only the grade list can hold a cached copy.
+        bump_versions(scope_for("grades"))
+
+    def write_parts(self, batch):
+        if not batch:
+            return
+        models.Part.objects.bulk_create(batch, batch_size=self.batch_size)
+        # With DEBUG on, connection.queries would otherwise keep every INSERT and its HTML.
+        reset_queries()
+        self.counts["parts"] += len(batch)
+        if self.counts["parts"] % (self.batch_size * 20) < len(batch):
+            self.stdout.write(f"  {self.counts['parts']} parts written")
+
+    def index(self):
+        """Build search documents for the generated parts, batch by batch."""
+        parts = models.Part.objects.filter(chapter__lesson__grade__code__startswith=self.prefix).only(
+            "id", "title", "content_type", "content_url", "html"
+        )
+        batch = []
+        for part in parts.iterator(chunk_size=self.batch_size):
+            batch.append(part)
+            if len(batch) >= self.batch_size:
+                search.index_parts(batch)
+                batch = []
+        search.index_parts(batch)
+
+
+# =====================
+# Django Command
+# =====================
+
+class Command(BaseCommand):
+    help = "Generate a reproducible synthetic catalog (grades, subjects, lessons, chapters, parts) for scale testing."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--grades", type=int, default=12, help="Number of grades")
+        parser.add_argument("--subjects", type=int, default=10, help="Subjects (one lesson each) per grade")
+        parser.add_argument("--chapters", type=int, default=10, help="Chapters per lesson")
+        parser.add_argument("--parts", type=int, default=10, help="Parts per chapter")
+        parser.add_argument("--seed", type=int, default=0, help="RNG seed; the same seed yields the same catalog")
+        parser.add_argument(
+            "--prefix",
+            default="syn",
+            help="Prefix for generated grade and subject codes, keeping them apart from real content"
+        )
+        parser.add_argument("--html-median", type=int, default=2048, help="Median part HTML size in bytes")
+        parser.add_argument("--html-sigma", type=float, default=1.0, help="Lognormal sigma of the HTML size")
+        parser.add_argument("--html-max", type=int, default=256 * 1024, help="Largest part HTML in bytes")
+        parser.add_argument("--batch-size", type=int, default=5000, help="Rows per bulk insert")
+        parser.add_argument(
+            "--static",
+            action="store_true",
+            help="Write each part as a file under CONTENT_ROOT and store it as a url part instead of inline HTML"
+        )
+        parser.add_argument("--search", action="store_true", help="Also build search documents for the new parts")
+
+    def handle(self, *args, **options):
+        prefix = options["prefix"]
+        if models.Grade.objects.filter(code__startswith=prefix).exists():
+            self.stderr.write(f"Grades with prefix '{prefix}' already exist; use another --prefix or a fresh database.")
+            return
+
+        static_root = None
+        if options["static"]:
+            static_root = assets.content_root()
+            if not static_root.exists():
+                self.stderr.write(f"Root directory not found: {static_root}")
+                return
+
+        generator = CatalogGenerator(
+            self.stdout,
+            seed=options["seed"],
+            prefix=prefix,
+            batch_size=max(options["batch_size"], 1),
+            html_median=options["html_median"],
+            html_sigma=options["html_sigma"],
+            html_max=options["html_max"],
+            static_root=static_root,
+        )
+
+        started = time.perf_counter()
+        generator.generate(options["grades"], options["subjects"], options["chapters"], options["parts"])
+        elapsed = time.perf_counter() - started
+
+        c = generator.counts
+        self.stdout.write(
+            f"Generated {c['grades']} grades, {c['subjects']} subjects, {c['lessons']} lessons, "
+            f"{c['chapters']} chapters, {c['parts']} parts ({c['html_bytes']} HTML bytes, {c['files']} files) "
+            f"in {elapsed:.2f}s ({c['parts'] / max(elapsed, 1e-9):.0f} parts/s)"
+        )
+
+        if options["search"]:
+            started = time.perf_counter()
+            generator.index()
+            self.stdout.write(f"Indexed search documents in {time.perf_counter() - started:.1f}s")
@@ -0,0 +1,35 @@
+import os
+import time
+from django.core.management.base import BaseCommand
+from content import dependencies, models
+
+
+# =====================
+# Django Command
+# =====================
+
+class Command(BaseCommand):
+    help = "Build or refresh the PartAsset index (the files each part's page loads) of every part."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=os.cpu_count() or 1,
+            help="Number of parsing processes"
+        )
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Rescan every page, including those whose hash has not changed"
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        scanned, changed = dependencies.index_parts(
+            models.Part.objects.all(), workers=max(options["workers"], 1), force=options["force"]
+        )
+        self.stdout.write(
+            f"{scanned} parts: {changed} rescanned, {scanned - changed} unchanged "
+            f"in {time.perf_counter() - started:.2f}s"
+        )
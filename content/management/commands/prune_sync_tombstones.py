@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from content import models, sync
+
+
+# =====================
+# Django Command
+# =====================
+
+class Command(BaseCommand):
+    help = "Delete sync tombstones older than CONTENT_SYNC_TOMBSTONE_DAYS; older cursors must resync."
+
+    def handle(self, *args, **options):
+        cutoff = sync.tombstone_cutoff()
+        deleted, _ = models.SyncTombstone.objects.filter(deleted_at__lt=cutoff).delete()
+        self.stdout.write(f"Deleted {deleted} tombstones from before {cutoff:%Y-%m-%d %H:%M}")
@@ -0,0 +1,48 @@
+import time
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from content import models, search
+
+
+# =====================
+# Django Command
+# =====================
+
+class Command(BaseCommand):
+    help = "Rebuild the full-text search documents of every part."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Parts extracted and written per batch"
+        )
+
+    def handle(self, *args, **options):
+        if not search.is_available():
+            self.stderr.write("Full-text search requires SQLite with FTS5.")
+            return
+
+        started = time.perf_counter()
+        batch_size = max(options["batch_size"], 1)
+        parts = models.Part.objects.only("id", "title", "content_type", "content_url", "html").order_by("pk")
+
+        indexed = 0
+        with transaction.atomic():
+            models.PartSearchDocument.objects.all().delete()
+            batch = []
+            for part in parts.iterator(chunk_size=batch_size):
+                batch.append(part)
+                if len(batch) == batch_size:
+                    indexed += search.index_parts(batch)
+                    batch = []
+            indexed += search.index_parts(batch)
+
+        # Merge the index b-trees written batch by batch into one.
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {search.FTS_TABLE} ({search.FTS_TABLE}) VALUES ('optimize')"
+            )
+
+        self.stdout.write(f"Indexed {indexed} parts in {time.perf_counter() - started:.2f}s")
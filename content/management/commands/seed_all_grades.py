@@ -1,12 +1,23 @@
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+import json
+import os
 import re
+import time
+from types import MappingProxyType
 from urllib.parse import quote
 from datetime import datetime
 from typing import Optional
-from django.core.management.base import BaseCommand
-from django.db import transaction
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Q
 from django.utils import timezone
-from content import models
+from content import dependencies, models, search
+from content.assets import absolute_references, file_digest, page_copy_path, path_to_url, url_to_path
+from content.cache import bump_versions, scope_for
+from content.management.commands.compress_static import compress_paths
 
 
 # =====================
@@ -28,8 +39,77 @@ def quote_segments(*segments: str) -> str:
     return "/".join(quote(seg) for seg in segments)
 
 
-def find_html_files(path: Path):
-    return [p for p in sorted(path.iterdir()) if p.is_file() and p.suffix.lower() == ".html"]
+def find_html_files(entries):
+    return [e.path for e in entries if e.is_file and e.path.suffix.lower() == ".html"]
+
+
+# =====================
+# Directory Listings
+# =====================
+
+Entry = namedtuple("Entry", "path is_dir is_file")
+
+
+def list_dir(path: Path):
+    """Entries of one directory, sorted by name."""
+    return tuple(Entry(p, p.is_dir(), p.is_file()) for p in sorted(path.iterdir()))
+
+
+def scandir_sorted(path: Path):
+    """Like list_dir, but uses os.scandir's cached d_type instead of stat calls."""
+    with os.scandir(path) as it:
+        entries = sorted(it, key=lambda e: e.name)
+    return tuple(Entry(Path(e.path), e.is_dir(), e.is_file()) for e in entries)
+
+
+class TreeSnapshot:
+    """Immutable listing of a content tree, walked with os.scandir.
+
+    Subject directories are walked concurrently on a thread pool, which hides
+    per-directory latency on network storage. Only directory listings and the
+    stat results of HTML files are kept; the scanner then replays them from a
+    single thread in the same order as a sequential walk.
+    """
+
+    def __init__(self, listings, stats):
+        self.listings = MappingProxyType(listings)
+        self.stats = MappingProxyType(stats)
+
+    @classmethod
+    def walk(cls, root: Path, workers: int):
+        listings = {root: scandir_sorted(root)}
+        subject_dirs = []
+        for grade in listings[root]:
+            if grade.is_dir and grade.path.name.isdigit():
+                listings[grade.path] = scandir_sorted(grade.path)
+                subject_dirs.extend(e.path for e in listings[grade.path] if e.is_dir)
+
+        stats = {}
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for sub_listings, sub_stats in pool.map(cls.walk_subtree, subject_dirs):
+                listings.update(sub_listings)
+                stats.update(sub_stats)
+        return cls(listings, stats)
+
+    @staticmethod
+    def walk_subtree(top: Path):
+        listings = {}
+        stats = {}
+        pending = [top]
+        while pending:
+            path = pending.pop()
+            with os.scandir(path) as it:
+                raw = sorted(it, key=lambda e: e.name)
+            entries = []
+            for e in raw:
+                entry = Entry(Path(e.path), e.is_dir(), e.is_file())
+                entries.append(entry)
+                if entry.is_dir:
+                    pending.append(entry.path)
+                elif entry.is_file and e.name.lower().endswith(".html"):
+                    stats[entry.path] = e.stat()
+            listings[path] = tuple(entries)
+        return listings, stats
 
 
 # =====================
@@ -38,13 +118,81 @@ def find_html_files(path: Path):
 
 class GradeScanner:
 
-    def __init__(self, root: Path, stdout):
+    def __init__(self, root: Path, stdout, snapshot: Optional[TreeSnapshot] = None):
         self.root = root
         self.stdout = stdout
+        self.snapshot = snapshot
+        self.rewrites = None
+        self.stale_rewrites = []
+        self.copied_pages = []
+        self.moved_assets = None
+
+    def list_dir(self, path: Path):
+        if self.snapshot is not None:
+            return self.snapshot.listings[path]
+        return list_dir(path)
+
+    def stat_file(self, file: Path):
+        if self.snapshot is not None:
+            return self.snapshot.stats[file]
+        return file.stat()
+
+    def served_url(self, url: str, stat) -> str:
+        """URL the part page at `url` is served from.
+
+        That is the page dedupe_static/subset_fonts derived from it while the
+        file is unchanged, otherwise the page's copy with absolute references.
+        """
+        if self.rewrites is None:
+            self.rewrites = {
+                source_url: (size, mtime_ns, content_url)
+                for source_url, size, mtime_ns, content_url in models.PageRewrite.objects.values_list(
+                    "source_url", "source_size", "source_mtime_ns", "content_url"
+                )
+            }
+        rewrite = self.rewrites.get(url)
+        if rewrite is not None:
+            size, mtime_ns, content_url = rewrite
+            derived = url_to_path(content_url)
+            if (stat.st_size, stat.st_mtime_ns) == (size, mtime_ns) and derived is not None and derived.is_file():
+                return content_url
+            self.stale_rewrites.append(url)
+        source = url_to_path(url)
+        if source is None:
+            return url
+        return path_to_url(self.copy_page(source, stat))
+
+    def copy_page(self, source: Path, stat) -> Path:
+        """Write the served copy of `source` unless it is newer than the page; return its path."""
+        target = page_copy_path(source)
+        try:
+            if target.stat().st_mtime_ns >= stat.st_mtime_ns:
+                return target
+        except FileNotFoundError:
+            pass
+        if self.moved_assets is None:
+            # Originals dedupe_static --prune deleted are reached through their blobs.
+            self.moved_assets = dict(models.AssetBlob.objects.values_list("source_url", "blob_url"))
+        # surrogateescape keeps pages that are not UTF-8 byte for byte.
+        text = source.read_bytes().decode("utf-8", errors="surrogateescape")
+        data = absolute_references(text, source, self.moved_assets).encode("utf-8", errors="surrogateescape")
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp = target.with_name(target.name + ".tmp")
+        tmp.write_bytes(data)
+        os.replace(tmp, target)
+        self.copied_pages.append(target)
+        return target
+
+    def report_stale_rewrites(self):
+        if self.stale_rewrites:
+            self.stdout.write(
+                f"{len(self.stale_rewrites)} pages changed since dedupe_static/subset_fonts rewrote them and are "
+                f"served from a fresh copy again; re-run those commands (first: {self.stale_rewrites[0]})"
+            )
 
     def scan_all_grades(self):
         """Find folders whose names are numeric → treat each as a grade."""
-        grade_dirs = [d for d in self.root.iterdir() if d.is_dir() and d.name.isdigit()]
+        grade_dirs = [e.path for e in self.list_dir(self.root) if e.is_dir and e.path.name.isdigit()]
 
         if not grade_dirs:
             self.stdout.write("No grade directories found.")
@@ -57,62 +205,48 @@ class GradeScanner:
     def scan_grade(self, grade_code: str, grade_path: Path):
         with transaction.atomic():
 
-            grade, _ = models.Grade.objects.get_or_create(
-                code=grade_code,
-                defaults={"name": f"Grade {grade_code}"}
-            )
+            grade = self.get_grade(grade_code)
 
             self.stdout.write(f"\n=== Scanning Grade {grade_code} ===")
 
-            for subject_dir in sorted(grade_path.iterdir()):
-                if subject_dir.is_dir():
-                    self.scan_subject(grade, subject_dir)
+            for entry in self.list_dir(grade_path):
+                if entry.is_dir:
+                    self.scan_subject(grade, entry.path)
 
     def scan_subject(self, grade, subject_dir: Path):
         subj_code = normalize_code(subject_dir.name)
         subj_title = subject_dir.name.replace("_", " ").strip()
 
-        subject, _ = models.Subject.objects.get_or_create(
-            code=subj_code,
-            defaults={"title": subj_title, "language": "fa"}
-        )
+        subject = self.get_subject(subj_code, subj_title)
 
         lesson_title = f"{subject.title} - Grade {grade.code}"
 
-        lesson, _ = models.Lesson.objects.get_or_create(
-            grade=grade,
-            subject=subject,
-            defaults={"title": lesson_title, "description": ""}
-        )
+        lesson = self.get_lesson(grade, subject, lesson_title)
 
-        for item in sorted(subject_dir.iterdir()):
-            if item.is_dir():
-                self.scan_chapter(lesson, item, grade.code, subject_dir.name)
-            elif item.suffix.lower() == ".html":
+        for entry in self.list_dir(subject_dir):
+            if entry.is_dir:
+                self.scan_chapter(lesson, entry.path, grade.code, subject_dir.name)
+            elif entry.path.suffix.lower() == ".html":
                 # subject has HTML directly → a default chapter
-                self.scan_default_chapter_file(lesson, item, grade.code, subject_dir.name)
+                self.scan_default_chapter_file(lesson, entry.path, grade.code, subject_dir.name)
 
     def scan_chapter(self, lesson, chapter_dir: Path, grade_code: str, subject_name: str):
         chap_num = extract_number(chapter_dir.name) or 1
         chap_title = chapter_dir.name.replace("_", " ").strip()
 
-        chapter, _ = models.Chapter.objects.get_or_create(
-            lesson=lesson,
-            number=chap_num,
-            defaults={"title": chap_title, "summary": ""}
-        )
+        chapter = self.get_chapter(lesson, chap_num, chap_title)
 
-        part_dirs = [p for p in chapter_dir.iterdir() if p.is_dir()]
+        part_dirs = [e.path for e in self.list_dir(chapter_dir) if e.is_dir]
 
         if part_dirs:
-            for pd in sorted(part_dirs):
+            for pd in part_dirs:
                 self.scan_part_dir(chapter, pd, grade_code, subject_name, chapter_dir.name)
         else:
             self.scan_html_in_chapter_root(chapter, chapter_dir, grade_code, subject_name)
 
     def scan_part_dir(self, chapter, part_dir: Path, grade_code: str, subject_name: str, chapter_name: str):
         part_num = extract_number(part_dir.name) or 1
-        html_files = find_html_files(part_dir)
+        html_files = find_html_files(self.list_dir(part_dir))
 
         if not html_files:
             # no html → part itself links to directory
@@ -120,16 +254,12 @@ class GradeScanner:
                 grade_code, subject_name, chapter_name, part_dir.name
             )
 
-            models.Part.objects.get_or_create(
-                chapter=chapter,
-                number=part_num,
-                defaults={
-                    "title": part_dir.name,
-                    "content_type": "url",
-                    "content_url": rel_url,
-                    "mime": "text/html",
-                },
-            )
+            self.add_part(chapter, part_num, {
+                "title": part_dir.name,
+                "content_type": "url",
+                "content_url": rel_url,
+                "mime": "text/html",
+            })
             return
 
         for idx, hf in enumerate(html_files):
@@ -138,18 +268,14 @@ class GradeScanner:
                                        grade_code, subject_name, chapter_name, part_dir.name)
 
     def scan_html_in_chapter_root(self, chapter, chapter_dir: Path, grade_code: str, subject_name: str):
-        html_files = find_html_files(chapter_dir)
+        html_files = find_html_files(self.list_dir(chapter_dir))
 
         for idx, hf in enumerate(html_files, start=1):
             self.create_part_from_file(chapter, idx, hf,
                                        grade_code, subject_name, chapter_dir.name)
 
     def scan_default_chapter_file(self, lesson, file: Path, grade_code: str, subject_name: str):
-        chapter, _ = models.Chapter.objects.get_or_create(
-            lesson=lesson,
-            number=1,
-            defaults={"title": "Chapter 1", "summary": ""}
-        )
+        chapter = self.get_chapter(lesson, 1, "Chapter 1")
         self.create_part_from_file(chapter, 1, file,
                                    grade_code, subject_name, "")
 
@@ -167,12 +293,12 @@ class GradeScanner:
 
         rel_url = "/static/" + quote_segments(*segments)
 
-        stat = file.stat()
+        stat = self.stat_file(file)
 
         defaults = {
             "title": file.stem,
             "content_type": "url",
-            "content_url": rel_url,
+            "content_url": self.served_url(rel_url, stat),
             "mime": "text/html",
         }
 
@@ -184,6 +310,41 @@ class GradeScanner:
                 stat.st_mtime, tz=timezone.get_default_timezone()
             )
 
+        self.add_part(chapter, number, defaults, source=file)
+
+    # ---- persistence hooks (overridden by BulkGradeScanner) ----
+
+    def get_grade(self, code: str):
+        grade, _ = models.Grade.objects.get_or_create(
+            code=code,
+            defaults={"name": f"Grade {code}"}
+        )
+        return grade
+
+    def get_subject(self, code: str, title: str):
+        subject, _ = models.Subject.objects.get_or_create(
+            code=code,
+            defaults={"title": title, "language": "fa"}
+        )
+        return subject
+
+    def get_lesson(self, grade, subject, title: str):
+        lesson, _ = models.Lesson.objects.get_or_create(
+            grade=grade,
+            subject=subject,
+            defaults={"title": title, "description": ""}
+        )
+        return lesson
+
+    def get_chapter(self, lesson, number: int, title: str):
+        chapter, _ = models.Chapter.objects.get_or_create(
+            lesson=lesson,
+            number=number,
+            defaults={"title": title, "summary": ""}
+        )
+        return chapter
+
+    def add_part(self, chapter, number: int, defaults: dict, source: Optional[Path] = None):
         models.Part.objects.get_or_create(
             chapter=chapter,
             number=number,
@@ -191,6 +352,341 @@ class GradeScanner:
         )
 
 
+# =====================
+# Bulk Scanner
+# =====================
+
+GradeRow = namedtuple("GradeRow", "code name")
+SubjectRow = namedtuple("SubjectRow", "code title language")
+LessonRow = namedtuple("LessonRow", "key grade_code subject_code title")
+ChapterRow = namedtuple("ChapterRow", "key lesson_key number title")
+PartRow = namedtuple("PartRow", "key chapter_key number fields source")
+
+
+class BulkGradeScanner(GradeScanner):
+    """Walk the whole tree into memory, then upsert each model level in batches.
+
+    Rows are keyed on the models' unique constraints and the first occurrence
+    wins, exactly like get_or_create in the sequential path. Existing rows are
+    read once per level and only new or changed rows are written, through
+    bulk_create(update_conflicts=True), so unchanged rows keep their
+    updated_at and cached responses stay valid.
+    """
+
+    batch_size = 500
+
+    def __init__(self, root: Path, stdout, snapshot: Optional[TreeSnapshot] = None):
+        super().__init__(root, stdout, snapshot)
+        self.grades = {}
+        self.subjects = {}
+        self.lessons = {}
+        self.chapters = {}
+        self.parts = {}
+
+    def get_grade(self, code: str):
+        return self.grades.setdefault(code, GradeRow(code, f"Grade {code}"))
+
+    def get_subject(self, code: str, title: str):
+        return self.subjects.setdefault(code, SubjectRow(code, title, "fa"))
+
+    def get_lesson(self, grade, subject, title: str):
+        key = (grade.code, subject.code)
+        return self.lessons.setdefault(key, LessonRow(key, grade.code, subject.code, title))
+
+    def get_chapter(self, lesson, number: int, title: str):
+        key = lesson.key + (number,)
+        return self.chapters.setdefault(key, ChapterRow(key, lesson.key, number, title))
+
+    def add_part(self, chapter, number: int, defaults: dict, source: Optional[Path] = None):
+        key = chapter.key + (number,)
+        self.parts.setdefault(key, PartRow(key, chapter.key, number, defaults, source))
+
+    # ---- writing ----
+
+    def flush(self):
+        """Write the collected rows; return their ids by level, e.g. {"chapters": {chapter key: id}}."""
+        grade_codes = list(self.grades)
+
+        with transaction.atomic():
+            grade_ids, grades_changed = self.upsert(
+                models.Grade,
+                {code: {"code": code, "name": row.name} for code, row in self.grades.items()},
+                {
+                    code: (pk, {"name": name})
+                    for code, pk, name in models.Grade.objects.filter(code__in=grade_codes)
+                    .values_list("code", "id", "name")
+                },
+                unique_fields=["code"],
+                update_fields=["name"],
+            )
+
+            subject_ids, _ = self.upsert(
+                models.Subject,
+                {code: {"code": code, "title": row.title, "language": row.language}
+                 for code, row in self.subjects.items()},
+                {
+                    code: (pk, {"title": title, "language": language})
+                    for code, pk, title, language in models.Subject.objects.filter(code__in=list(self.subjects))
+                    .values_list("code", "id", "title", "language")
+                },
+                unique_fields=["code"],
+                update_fields=["title", "language"],
+            )
+
+            lesson_ids, lessons_changed = self.upsert(
+                models.Lesson,
+                {key: {"grade_id": grade_ids[row.grade_code], "subject_id": subject_ids[row.subject_code],
+                       "title": row.title, "description": ""}
+                 for key, row in self.lessons.items()},
+                {
+                    (grade_code, subject_code): (pk, {"title": title})
+                    for pk, grade_code, subject_code, title in models.Lesson.objects.filter(grade__code__in=grade_codes)
+                    .values_list("id", "grade__code", "subject__code", "title")
+                },
+                unique_fields=["grade", "subject"],
+                update_fields=["title"],
+            )
+
+            chapter_ids, chapters_changed = self.upsert(
+                models.Chapter,
+                {key: {"lesson_id": lesson_ids[row.lesson_key], "number": row.number,
+                       "title": row.title, "summary": ""}
+                 for key, row in self.chapters.items()},
+                {
+                    (grade_code, subject_code, number): (pk, {"title": title})
+                    for pk, grade_code, subject_code, number, title
+                    in models.Chapter.objects.filter(lesson__grade__code__in=grade_codes)
+                    .values_list("id", "lesson__grade__code", "lesson__subject__code", "number", "title")
+                },
+                unique_fields=["lesson", "number"],
+                update_fields=["title"],
+            )
+
+            part_fields = sorted({name for row in self.parts.values() for name in row.fields})
+            _, parts_changed = self.upsert(
+                models.Part,
+                {key: {"chapter_id": chapter_ids[row.chapter_key], "number": row.number,
+                       **{name: row.fields.get(name) for name in part_fields}}
+                 for key, row in self.parts.items()},
+                {
+                    (values.pop("chapter__lesson__grade__code"), values.pop("chapter__lesson__subject__code"),
+                     values.pop("chapter__number"), values.pop("number")): (values.pop("id"), values)
+                    for values in models.Part.objects.filter(chapter__lesson__grade__code__in=grade_codes)
+                    .values("id", "chapter__lesson__grade__code", "chapter__lesson__subject__code",
+                            "chapter__number", "number", *part_fields)
+                },
+                unique_fields=["chapter", "number"],
+                update_fields=part_fields,
+            )
+
+        # bulk_create sends no post_save; invalidate the affected lists here.
+        scopes = {scope_for("grade", obj.grade_id) for obj in lessons_changed}
+        scopes |= {scope_for("lesson", obj.lesson_id) for obj in chapters_changed}
+        scopes |= {scope_for("chapter", obj.chapter_id) for obj in parts_changed}
+        if grades_changed:
+            scopes.add(scope_for("grades"))
+        bump_versions(*scopes)
+        # Indexing reads every page and may fork worker processes; run it
+        # once the rows are committed, so the write lock is not held meanwhile.
+        transaction.on_commit(lambda: self.index_chapters(
+            {obj.chapter_id for obj in parts_changed}, set(chapter_ids.values())
+        ))
+        return {"grades": grade_ids, "subjects": subject_ids, "lessons": lesson_ids, "chapters": chapter_ids}
+
+    def index_chapters(self, changed, chapters):
+        """Refresh the search documents of the `changed` chapters and the asset index of all `chapters`."""
+        search.index_chapters(changed)
+        # The asset index covers every chapter in this flush, not only the
+        # written parts: a stylesheet or font can change while its part's row
+        # does not. Unchanged pages are skipped by hash.
+        scanned, rescanned = dependencies.index_chapters(chapters)
+        self.stdout.write(f"Asset index: {rescanned} of {scanned} parts rescanned")
+
+    def upsert(self, model, rows: dict, existing: dict, unique_fields, update_fields):
+        """Write new and changed rows; return ({key: id}, written objects)."""
+        ids = {}
+        objs = []
+        created = updated = 0
+
+        for key, values in rows.items():
+            current = existing.get(key)
+            if current is None:
+                obj = model(**values)
+                ids[key] = obj.id
+                created += 1
+            else:
+                pk, old = current
+                ids[key] = pk
+                if all(old[name] == values[name] for name in update_fields):
+                    continue
+                # The new instance gets a fresh id, but the conflict on the
+                # unique key keeps the existing row (and its id) and updates it.
+                obj = model(**values)
+                updated += 1
+            objs.append(obj)
+
+        if objs:
+            model.objects.bulk_create(
+                objs,
+                batch_size=self.batch_size,
+                update_conflicts=True,
+                unique_fields=unique_fields,
+                update_fields=list(update_fields) + ["updated_at"],
+            )
+
+        self.stdout.write(
+            f"{model._meta.verbose_name_plural.title()}: {created} created, "
+            f"{updated} updated, {len(rows) - created - updated} unchanged"
+        )
+        return ids, objs
+
+
+# =====================
+# Incremental Scanner
+# =====================
+
+class IncrementalGradeScanner(BulkGradeScanner):
+    """Bulk scanner that only writes rows whose files changed since the last run.
+
+    The manifest records, per part HTML file, its size, mtime and content
+    hash, plus every grade, lesson, chapter and part key seen. Files whose size and mtime
+    match are not read at all; a changed mtime with an identical hash only
+    refreshes the manifest. Keys that disappeared from the tree are deleted
+    through the ORM, so the cache invalidation signals still fire. A scan
+    that finds no parts at all aborts instead of deleting everything.
+    """
+
+    manifest_version = 1
+    key_batch_size = 100
+
+    def __init__(self, root: Path, stdout, manifest_path: Path, snapshot: Optional[TreeSnapshot] = None):
+        super().__init__(root, stdout, snapshot)
+        self.manifest_path = manifest_path
+        self.previous = self.load_manifest()
+        self.stats = {}
+
+    def stat_file(self, file: Path):
+        stat = super().stat_file(file)
+        self.stats[file] = stat
+        return stat
+
+    @staticmethod
+    def key_str(key) -> str:
+        return "/".join(str(k) for k in key)
+
+    def load_manifest(self) -> dict:
+        empty = {"files": {}, "parts": {}, "chapters": [], "lessons": [], "grades": []}
+        try:
+            with open(self.manifest_path, encoding="utf-8") as fh:
+                manifest = json.load(fh)
+        except (OSError, ValueError):
+            return empty
+        if manifest.get("version") != self.manifest_version or manifest.get("root") != str(self.root.resolve()):
+            return empty
+        return manifest
+
+    def save_manifest(self, manifest: dict):
+        tmp = self.manifest_path.with_name(self.manifest_path.name + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump(manifest, fh, ensure_ascii=False, sort_keys=True)
+        os.replace(tmp, self.manifest_path)
+
+    def flush(self):
+        if not self.parts:
+            # An empty or unmounted root would otherwise remove every row in the manifest.
+            raise CommandError(f"No parts found under {self.root}; nothing was changed.")
+
+        old_files = self.previous["files"]
+        old_parts = self.previous["parts"]
+        old_chapters = set(self.previous["chapters"])
+        old_lessons = set(self.previous["lessons"])
+        old_grades = set(self.previous["grades"])
+
+        files = {}
+        parts = {}
+        dirty_parts = {}
+        for key, row in self.parts.items():
+            rel = row.source.relative_to(self.root).as_posix() if row.source else None
+            parts[self.key_str(key)] = rel
+            changed = old_parts.get(self.key_str(key), False) != rel
+            if rel is not None:
+                stat = self.stats[row.source]
+                entry = old_files.get(rel)
+                if entry and entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns:
+                    files[rel] = entry
+                else:
+                    digest = file_digest(row.source)
+                    changed = changed or not entry or entry["sha256"] != digest
+                    files[rel] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": digest}
+            if changed:
+                dirty_parts[key] = row
+
+        chapters = {self.key_str(key) for key in self.chapters}
+        lessons = {self.key_str(key) for key in self.lessons}
+        grades = set(self.grades)
+        dirty_chapter_keys = {row.chapter_key for row in dirty_parts.values()}
+        dirty_chapter_keys |= {key for key in self.chapters if self.key_str(key) not in old_chapters}
+        removed_parts = set(old_parts) - set(parts)
+        removed_chapters = old_chapters - chapters
+
+        # Narrow the collected tree to the new or dirty rows and their ancestors.
+        self.parts = dirty_parts
+        self.chapters = {key: self.chapters[key] for key in dirty_chapter_keys}
+        lesson_keys = {row.lesson_key for row in self.chapters.values()}
+        lesson_keys |= {key for key in self.lessons if self.key_str(key) not in old_lessons}
+        self.lessons = {key: self.lessons[key] for key in lesson_keys}
+        grade_codes = {key[0] for key in lesson_keys} | (grades - old_grades)
+        self.grades = {code: self.grades[code] for code in grade_codes}
+        self.subjects = {key[1]: self.subjects[key[1]] for key in lesson_keys}
+
+        self.stdout.write(
+            f"Manifest: {len(dirty_parts)} parts and {len(self.chapters)} chapters changed, "
+            f"{len(removed_parts)} parts and {len(removed_chapters)} chapters removed"
+        )
+
+        with transaction.atomic():
+            if self.grades:
+                chapter_ids = super().flush()["chapters"]
+                # A part file can change without changing its row; reindex those too.
+                dirty_chapters = {chapter_ids[row.chapter_key] for row in dirty_parts.values()}
+                transaction.on_commit(lambda: search.index_chapters(dirty_chapters))
+            self.delete_keys(models.Part, removed_parts,
+                             ("chapter__lesson__grade__code", "chapter__lesson__subject__code",
+                              "chapter__number", "number"))
+            self.delete_keys(models.Chapter, removed_chapters,
+                             ("lesson__grade__code", "lesson__subject__code", "number"))
+
+        self.save_manifest({
+            "version": self.manifest_version,
+            "root": str(self.root.resolve()),
+            "files": files,
+            "parts": parts,
+            "chapters": sorted(chapters),
+            "lessons": sorted(lessons),
+            "grades": sorted(grades),
+        })
+
+    def delete_keys(self, model, keys, lookups):
+        """Delete the rows of manifest `keys`, resolving them to ids a chunk at a time.
+
+        One OR of every key would exceed SQLite's expression depth and
+        variable limits when a large subtree is removed.
+        """
+        keys = sorted(keys)
+        ids = []
+        for start in range(0, len(keys), self.key_batch_size):
+            condition = Q()
+            for key in keys[start:start + self.key_batch_size]:
+                values = key.split("/")
+                condition |= Q(**{
+                    lookup: int(value) if lookup.endswith("number") else value
+                    for lookup, value in zip(lookups, values)
+                })
+            ids += model.objects.filter(condition).values_list("pk", flat=True)
+        for start in range(0, len(ids), self.batch_size):
+            model.objects.filter(pk__in=ids[start:start + self.batch_size]).delete()
+
+
 # =====================
 # Django Command
 # =====================
@@ -204,6 +700,27 @@ class Command(BaseCommand):
             required=True,
             help="Root directory containing grade folders (e.g. /path/to/content)"
         )
+        parser.add_argument(
+            "--bulk",
+            action="store_true",
+            help="Walk the whole tree first, then upsert each model level in batches"
+        )
+        parser.add_argument(
+            "--incremental",
+            action="store_true",
+            help="Bulk mode that only writes parts and chapters whose files changed since the last run"
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=0,
+            help="Walk subject directories on this many threads with os.scandir before seeding (0 = sequential walk)"
+        )
+        parser.add_argument(
+            "--manifest",
+            default=os.path.join(settings.BASE_DIR, "seed_manifest.json"),
+            help="File manifest used by --incremental"
+        )
 
     def handle(self, *args, **options):
         root = Path(options["root"])
@@ -212,7 +729,49 @@ class Command(BaseCommand):
             self.stderr.write(f"Root directory not found: {root}")
             return
 
-        scanner = GradeScanner(root, stdout=self.stdout)
-        scanner.scan_all_grades()
+        query_count = 0
+
+        def count_queries(execute, sql, params, many, context):
+            nonlocal query_count
+            query_count += 1
+            return execute(sql, params, many, context)
+
+        started = time.perf_counter()
+        snapshot = None
+        if options["workers"] > 0:
+            snapshot = TreeSnapshot.walk(root, options["workers"])
+            self.stdout.write(f"Walked {len(snapshot.listings)} directories in {time.perf_counter() - started:.2f}s")
+
+        with connection.execute_wrapper(count_queries):
+            if options["incremental"]:
+                scanner = IncrementalGradeScanner(root, stdout=self.stdout, manifest_path=Path(options["manifest"]),
+                                                  snapshot=snapshot)
+                scanner.scan_all_grades()
+                scanner.flush()
+            elif options["bulk"]:
+                scanner = BulkGradeScanner(root, stdout=self.stdout, snapshot=snapshot)
+                scanner.scan_all_grades()
+                scanner.flush()
+            else:
+                scanner = GradeScanner(root, stdout=self.stdout, snapshot=snapshot)
+                scanner.scan_all_grades()
+            # Rows this run did not write may never have been indexed, and a
+            # shared stylesheet or font can change under rows it left alone.
+            _, indexed = dependencies.index_missing()
+            if indexed:
+                self.stdout.write(f"Asset index: {indexed} parts without a scan indexed")
+            _, indexed = dependencies.index_changed_assets()
+            if indexed:
+                self.stdout.write(f"Asset index: {indexed} parts with changed assets rescanned")
+            indexed = search.index_missing()
+            if indexed:
+                self.stdout.write(f"Search index: {indexed} parts without a document indexed")
+        elapsed = time.perf_counter() - started
+        scanner.report_stale_rewrites()
+        if scanner.copied_pages:
+            # Served through the precompressed siblings, like every other page.
+            written = compress_paths(scanner.copied_pages)[0]
+            self.stdout.write(f"Page copies: {len(scanner.copied_pages)} written, {written} siblings")
 
         self.stdout.write("\nSeeding complete for all grades.")
+        self.stdout.write(f"{query_count} queries in {elapsed:.2f}s")
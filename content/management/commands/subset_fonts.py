@@ -0,0 +1,471 @@
+import hashlib
+import io
+import logging
+import os
+import re
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from html.parser import HTMLParser
+from pathlib import Path
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from content import assets, dependencies, models, search
+from content.cache import bump_versions, scope_for
+from content.management.commands.compress_static import compress_paths
+from content.management.commands.dedupe_static import record_rewrites
+
+try:
+    from fontTools import subset
+except ImportError:  # optional: only this command needs it
+    subset = None
+
+try:
+    import brotli
+except ImportError:  # optional: without it subsets are written as WOFF instead of WOFF2
+    brotli = None
+
+
+SUBSETS_DIRNAME = "subsets"
+
+# Part of every glyph set hash; bump it when the subsetting options change
+# so cached subsets are rebuilt.
+SUBSET_VERSION = 1
+
+SUBSETTABLE_SUFFIXES = {".ttf", ".otf", ".woff", ".woff2"}
+FLAVOR_SUFFIXES = {"woff2": ".woff2", "woff": ".woff"}
+
+# Kept in every subset: printable ASCII (numbers and punctuation that scripts
+# insert), the no-break space and the joiners Persian shaping relies on.
+BASE_CHARACTERS = frozenset(map(chr, range(0x20, 0x7F))) | {"\u00a0", "\u200c", "\u200d"}
+
+TEXT_ATTRIBUTES = {"alt", "title", "placeholder", "value", "aria-label"}
+
+# In --scope auto a chapter shares one subset of a font when it is at most
+# this much larger than the largest per-part subset: each part's first load
+# grows a little and every later part loads the font from cache.
+CHAPTER_SHARE_RATIO = 1.25
+
+# Below this many subsets a process pool costs more than it saves.
+POOL_THRESHOLD = 8
+
+FORMAT_HINT_RE = re.compile(
+    r"""(?P<src>url\(\s*(?P<q>["']?)(?P<url>[^"')]*)(?P=q)\s*\)\s*)format\(\s*["']?[\w-]+["']?\s*\)""",
+    re.IGNORECASE,
+)
+
+
+# =====================
+# Glyph sets
+# =====================
+
+class TextCollector(HTMLParser):
+    """Every character a page can render.
+
+    Script and style bodies are included, as scripts may insert text, and
+    so are the attributes browsers display.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.characters = set()
+
+    def handle_data(self, data):
+        self.characters.update(data)
+
+    def handle_starttag(self, tag, attrs):
+        for name, value in attrs:
+            if name in TEXT_ATTRIBUTES and value:
+                self.characters.update(value)
+
+
+def page_characters(text: str) -> str:
+    """The sorted characters of a page plus BASE_CHARACTERS."""
+    collector = TextCollector()
+    collector.feed(text)
+    collector.close()
+    characters = {char for char in collector.characters if char >= " "} | BASE_CHARACTERS
+    return "".join(sorted(characters))
+
+
+def glyph_set_digest(characters: str) -> str:
+    return hashlib.sha256(f"{SUBSET_VERSION}\0{characters}".encode("utf-8")).hexdigest()
+
+
+def build_subset(job):
+    """Subset one font to `characters`; runs in worker processes."""
+    source, characters, flavor = job
+    options = subset.Options()
+    options.flavor = flavor
+    # Every OpenType feature: Persian needs its contextual forms and ligatures.
+    options.layout_features = ["*"]
+    font = subset.load_font(source, options)
+    try:
+        subsetter = subset.Subsetter(options)
+        subsetter.populate(text=characters)
+        subsetter.subset(font)
+        buffer = io.BytesIO()
+        subset.save_font(font, buffer, options)
+    finally:
+        font.close()
+    return buffer.getvalue()
+
+
+# =====================
+# Subsetter
+# =====================
+
+class FontSubsetter:
+    """Replace the fonts each part page loads with subsets of the characters it uses.
+
+    Every font a page loads (directly or through its stylesheets) is subset
+    to the page's characters, or for `scope="chapter"` to those of every
+    part of the chapter loading it; `scope="auto"` picks the chapter-wide
+    subset when it costs little more (CHAPTER_SHARE_RATIO). Which element a
+    font styles is not worked out, so each font keeps all the page's text.
+
+    Subsets are stored under `<root>/_cas/subsets/` named by (font hash,
+    glyph set hash) and are reused by later runs. Pages are rewritten to
+    load them, stored as blobs like dedupe_static's, and `Part.content_url`
+    (or the inline `html`) is switched over; the original files are kept.
+    Each switch is recorded as a PageRewrite, so seed_all_grades keeps it
+    until the authoring page changes (and then reports the page, to be
+    subset again).
+    """
+
+    def __init__(self, root: Path, stdout, scope="auto", flavor="woff2", workers=1, dry_run=False):
+        self.root = root
+        self.stdout = stdout
+        self.scope = scope
+        self.flavor = flavor
+        self.workers = workers
+        self.dry_run = dry_run
+        self.stats = Counter()
+        self.pages = []
+        self.font_sizes = {}
+        self.subset_sizes = {}
+        self.built = {}
+        self.stylesheet_urls = {}
+        self.visiting = set()
+        self.stored = []
+
+    def subsets_dir(self) -> Path:
+        return self.root / assets.CAS_DIRNAME / SUBSETS_DIRNAME
+
+    def subset_path(self, key) -> Path:
+        font_digest, glyphs_digest = key
+        name = f"{font_digest[:32]}-{glyphs_digest[:32]}{FLAVOR_SUFFIXES[self.flavor]}"
+        return self.subsets_dir() / font_digest[:2] / name
+
+    def subset_key(self, font: Path, characters: str):
+        stat = font.stat()
+        self.font_sizes[font] = stat.st_size
+        return assets.stat_digest(str(font), stat.st_size, stat.st_mtime_ns), glyph_set_digest(characters)
+
+    def is_subsettable(self, font: Path) -> bool:
+        # Fonts under subsets/ are the output of an earlier run.
+        return font.suffix.lower() in SUBSETTABLE_SUFFIXES and self.subsets_dir() not in font.parents
+
+    # ---- pages ----
+
+    def read_page(self, part):
+        """(text, file) of a part's HTML page, (html, None) for inline pages, or None."""
+        if part.content_type != models.Part.CONTENT_TYPE_URL:
+            return (part.html, None) if part.html else None
+        source = assets.url_to_path(part.content_url or "")
+        if source is None or not source.is_file() or source.suffix.lower() not in dependencies.PAGE_SUFFIXES:
+            return None
+        return source.read_text(encoding="utf-8", errors="replace"), source
+
+    def scan_parts(self):
+        parts = models.Part.objects.only("id", "chapter_id", "number", "content_type", "content_url", "html")
+        for part in parts.order_by("chapter_id", "number").iterator():
+            page = self.read_page(part)
+            if page is None:
+                self.stats["pages_skipped"] += 1
+                continue
+            text, base = page
+            fonts = [
+                self.root / path
+                for path, kind, *_ in dependencies.collect_assets(text, base, self.root)
+                if kind == models.PartAsset.KIND_FONT and self.is_subsettable(self.root / path)
+            ]
+            if not fonts:
+                self.stats["pages_without_fonts"] += 1
+                continue
+            self.pages.append({
+                "part": part,
+                "text": text,
+                "base": base,
+                "characters": page_characters(text),
+                "fonts": fonts,
+                "subsets": {},
+            })
+
+    # ---- subsets ----
+
+    def plan(self):
+        """Choose a subset of each font for each page, building those not cached."""
+        # Copies of a font in several part folders are one font.
+        groups = defaultdict(list)
+        for page in self.pages:
+            for font in page["fonts"]:
+                font_digest, _ = self.subset_key(font, "")
+                groups[(page["part"].chapter_id, font_digest)].append((page, font))
+
+        candidates = []
+        for members in groups.values():
+            per_part = chapter = None
+            if self.scope != "chapter" or len(members) == 1:
+                per_part = [page["characters"] for page, _ in members]
+            if self.scope != "part" and len(members) > 1:
+                chapter = "".join(sorted(set().union(*(page["characters"] for page, _ in members))))
+            candidates.append((members[0][1], members, per_part, chapter))
+
+        self.build([
+            (font, characters)
+            for font, _, per_part, chapter in candidates
+            for characters in (per_part or []) + ([chapter] if chapter else [])
+        ])
+
+        for font, members, per_part, chapter in candidates:
+            keys = [self.subset_key(font, characters) for characters in per_part] if per_part else None
+            chapter_key = self.subset_key(font, chapter) if chapter else None
+            if chapter_key is not None and (
+                keys is None
+                or self.subset_sizes[chapter_key] <= CHAPTER_SHARE_RATIO * max(self.subset_sizes[key] for key in keys)
+            ):
+                self.stats["chapter_subsets"] += 1
+                keys = [chapter_key] * len(members)
+            else:
+                self.stats["part_subsets"] += len(members)
+            for (page, path), key in zip(members, keys):
+                page["subsets"][path] = key
+
+    def build(self, wanted):
+        jobs, keys = [], []
+        for font, characters in dict.fromkeys(wanted):
+            key = self.subset_key(font, characters)
+            if key in self.subset_sizes or key in keys:
+                continue
+            target = self.subset_path(key)
+            if target.is_file():
+                self.subset_sizes[key] = target.stat().st_size
+                self.stats["subsets_cached"] += 1
+                continue
+            jobs.append((str(font), characters, self.flavor))
+            keys.append(key)
+
+        pool = None
+        if self.workers > 1 and len(jobs) >= POOL_THRESHOLD:
+            pool = ProcessPoolExecutor(max_workers=self.workers)
+        try:
+            results = pool.map(build_subset, jobs, chunksize=4) if pool else map(build_subset, jobs)
+            for key, data in zip(keys, results):
+                self.built[key] = data
+                self.subset_sizes[key] = len(data)
+        finally:
+            if pool is not None:
+                pool.shutdown()
+
+    def store(self, target: Path, data: bytes):
+        if self.dry_run:
+            return
+        self.stored.append(target)
+        if target.exists():
+            return
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp = target.with_name(target.name + ".tmp")
+        tmp.write_bytes(data)
+        os.replace(tmp, target)
+
+    def store_subsets(self):
+        """Write every built subset, including the candidates --scope auto passed over."""
+        for key in sorted(self.built):
+            self.store(self.subset_path(key), self.built[key])
+        self.stats["subsets_built"] = len(self.built)
+
+    # ---- rewriting ----
+
+    def rewrite(self, text: str, base, subsets):
+        """Point font references at their subsets; return (text, fonts replaced).
+
+        Every other local reference becomes an absolute URL, as the result
+        is stored away from `base`.
+        """
+        replaced = 0
+
+        def replace(ref):
+            nonlocal replaced
+            target = assets.resolve_reference(ref, base)
+            if target is None or target.suffix.lower() in dependencies.PAGE_SUFFIXES:
+                return None
+            _, suffix = assets.split_reference(ref)
+            if target in subsets:
+                replaced += 1
+                return assets.path_to_url(self.subset_path(subsets[target])) + suffix
+            if target.suffix.lower() in dependencies.STYLE_SUFFIXES:
+                return self.stylesheet_url(target, subsets) + suffix
+            return assets.path_to_url(target) + suffix
+
+        text = assets.rewrite_references(text, replace)
+        return self.fix_format_hints(text), replaced
+
+    def fix_format_hints(self, text: str) -> str:
+        prefix = assets.path_to_url(self.subsets_dir()) + "/"
+
+        def substitute(match):
+            if not match.group("url").startswith(prefix):
+                return match.group(0)
+            return f"{match.group('src')}format('{self.flavor}')"
+
+        return FORMAT_HINT_RE.sub(substitute, text)
+
+    def stylesheet_url(self, path: Path, subsets) -> str:
+        """URL of `path`, or of a copy loading the subsets when it loads a font."""
+        memo = (path, tuple(sorted((str(font), key) for font, key in subsets.items())))
+        if memo in self.stylesheet_urls:
+            return self.stylesheet_urls[memo]
+        if path in self.visiting:
+            # A stylesheet importing itself through a cycle.
+            return assets.path_to_url(path)
+
+        self.visiting.add(path)
+        text, replaced = self.rewrite(path.read_text(encoding="utf-8", errors="replace"), path, subsets)
+        self.visiting.discard(path)
+        if replaced:
+            data = text.encode("utf-8")
+            target = assets.cas_path(hashlib.sha256(data).hexdigest(), path.suffix)
+            self.store(target, data)
+            url = assets.path_to_url(target)
+        else:
+            url = assets.path_to_url(path)
+        self.stylesheet_urls[memo] = url
+        return url
+
+    def rewrite_parts(self):
+        changed = []
+        moves = []
+        for page in self.pages:
+            part = page["part"]
+            text, _ = self.rewrite(page["text"], page["base"], page["subsets"])
+            self.stats["font_bytes_before"] += sum(self.font_sizes[font] for font in page["fonts"])
+            self.stats["font_bytes_after"] += sum(self.subset_sizes[key] for key in page["subsets"].values())
+            if text == page["text"]:
+                continue
+            if page["base"] is None:
+                part.html = text
+            else:
+                data = text.encode("utf-8")
+                target = assets.cas_path(hashlib.sha256(data).hexdigest(), page["base"].suffix)
+                self.store(target, data)
+                moves.append((part, part.content_url, assets.path_to_url(target)))
+                part.content_url = moves[-1][2]
+            changed.append(part)
+
+        self.stats["parts_updated"] = len(changed)
+        if self.dry_run or not changed:
+            return
+
+        now = timezone.now()
+        for part in changed:
+            part.updated_at = now
+        with transaction.atomic():
+            models.Part.objects.bulk_update(changed, ["content_url", "html", "updated_at"], batch_size=500)
+            if moves:
+                record_rewrites(moves)
+        # bulk_update does not send post_save; invalidate the parts lists and
+        # refresh the search documents and asset index here.
+        bump_versions(*{scope_for("chapter", part.chapter_id) for part in changed})
+        search.index_parts(changed)
+        dependencies.index_parts(models.Part.objects.filter(pk__in=[part.pk for part in changed]))
+
+    def compress_stored(self):
+        """Write the missing `.br`/`.gz` siblings of the files this run stored or reused."""
+        self.stats["siblings_written"] = compress_paths(self.stored, self.workers)[0]
+
+    def report(self):
+        s = self.stats
+        before, after = s["font_bytes_before"], s["font_bytes_after"]
+        fonts = {font for page in self.pages for font in page["fonts"]}
+        used = {key for page in self.pages for key in page["subsets"].values()}
+        self.stdout.write(
+            f"Pages: {len(self.pages)} loading fonts, {s['pages_without_fonts']} without, "
+            f"{s['pages_skipped']} not HTML"
+        )
+        self.stdout.write(
+            f"Subsets ({self.flavor}): {s['subsets_built']} built, {s['subsets_cached']} cached; "
+            f"{s['chapter_subsets']} shared per chapter, {s['part_subsets']} per part"
+        )
+        self.stdout.write(
+            f"Font bytes per page load: {before} -> {after} "
+            f"(saved {before - after}, {100 * (before - after) / before if before else 0:.1f}%)"
+        )
+        self.stdout.write(
+            f"Distinct font files: {len(fonts)} ({sum(self.font_sizes[font] for font in fonts)} bytes) "
+            f"-> {len(used)} subsets ({sum(self.subset_sizes[key] for key in used)} bytes)"
+        )
+        self.stdout.write(f"Parts updated: {s['parts_updated']}")
+        self.stdout.write(f"Precompressed siblings written: {s['siblings_written']}")
+
+
+# =====================
+# Django Command
+# =====================
+
+class Command(BaseCommand):
+    help = (
+        "Subset the fonts each part page loads to the characters it uses, write them as WOFF2 "
+        "and repoint the pages at them. Needs fonttools."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--scope",
+            choices=["auto", "part", "chapter"],
+            default="auto",
+            help="Subset per part, per chapter, or per chapter where it costs little more (default)"
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=os.cpu_count() or 1,
+            help="Number of subsetting processes"
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Report the savings without writing files or rows"
+        )
+
+    def handle(self, *args, **options):
+        if subset is None:
+            raise CommandError("fonttools is not installed; run `pip install fonttools`.")
+
+        root = assets.content_root()
+        if not root.exists():
+            self.stderr.write(f"Root directory not found: {root}")
+            return
+
+        flavor = "woff2"
+        if brotli is None:
+            self.stderr.write("brotli is not installed; subsets will be written as WOFF.")
+            flavor = "woff"
+
+        if options["verbosity"] < 2:
+            # fontTools warns about quirks of the source fonts it works around.
+            logging.getLogger("fontTools").setLevel(logging.ERROR)
+
+        started = time.perf_counter()
+        subsetter = FontSubsetter(
+            root.resolve(), stdout=self.stdout, scope=options["scope"], flavor=flavor,
+            workers=max(options["workers"], 1), dry_run=options["dry_run"],
+        )
+        subsetter.scan_parts()
+        subsetter.plan()
+        subsetter.store_subsets()
+        subsetter.rewrite_parts()
+        subsetter.compress_stored()
+        subsetter.report()
+        self.stdout.write(f"Done in {time.perf_counter() - started:.2f}s")
@@ -0,0 +1,79 @@
+# Generated by Django 4.2.6 on 2026-10-18 15:14
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+# External-content FTS5 index over content_partsearchdocument, kept in sync
+# by triggers so every ORM write (including bulk upserts and cascading
+# deletes) updates it. The document's integer id is the FTS rowid.
+FTS_SQL = [
+    """
+    CREATE VIRTUAL TABLE content_partsearchdocument_fts USING fts5(
+        title, body,
+        content='content_partsearchdocument', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER content_partsearchdocument_ai AFTER INSERT ON content_partsearchdocument BEGIN
+        INSERT INTO content_partsearchdocument_fts (rowid, title, body) VALUES (new.id, new.title, new.body);
+    END
+    """,
+    """
+    CREATE TRIGGER content_partsearchdocument_ad AFTER DELETE ON content_partsearchdocument BEGIN
+        INSERT INTO content_partsearchdocument_fts (content_partsearchdocument_fts, rowid, title, body)
+        VALUES ('delete', old.id, old.title, old.body);
+    END
+    """,
+    """
+    CREATE TRIGGER content_partsearchdocument_au AFTER UPDATE ON content_partsearchdocument BEGIN
+        INSERT INTO content_partsearchdocument_fts (content_partsearchdocument_fts, rowid, title, body)
+        VALUES ('delete', old.id, old.title, old.body);
+        INSERT INTO content_partsearchdocument_fts (rowid, title, body) VALUES (new.id, new.title, new.body);
+    END
+    """,
+    # Titles weigh four times as much as body text in `ORDER BY rank`.
+    "INSERT INTO content_partsearchdocument_fts (content_partsearchdocument_fts, rank) VALUES ('rank', 'bm25(4.0, 1.0)')",
+]
+
+DROP_SQL = [
+    "DROP TRIGGER IF EXISTS content_partsearchdocument_au",
+    "DROP TRIGGER IF EXISTS content_partsearchdocument_ad",
+    "DROP TRIGGER IF EXISTS content_partsearchdocument_ai",
+    "DROP TABLE IF EXISTS content_partsearchdocument_fts",
+]
+
+
+def create_fts(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for sql in FTS_SQL:
+        schema_editor.execute(sql)
+
+
+def drop_fts(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for sql in DROP_SQL:
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PartSearchDocument',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.TextField()),
+                ('body', models.TextField()),
+                ('part', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='search_document', to='content.part')),
+            ],
+        ),
+        migrations.RunPython(create_fts, drop_fts),
+    ]
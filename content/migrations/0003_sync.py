@@ -0,0 +1,47 @@
+# Generated by Django 4.2.6 on 2026-10-18 15:47
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0002_part_search_document'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SyncTombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model', models.CharField(max_length=32)),
+                ('object_id', models.UUIDField()),
+                ('deleted_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='chapter',
+            index=models.Index(fields=['updated_at', 'id'], name='content_chapter_updated'),
+        ),
+        migrations.AddIndex(
+            model_name='grade',
+            index=models.Index(fields=['updated_at', 'id'], name='content_grade_updated'),
+        ),
+        migrations.AddIndex(
+            model_name='lesson',
+            index=models.Index(fields=['updated_at', 'id'], name='content_lesson_updated'),
+        ),
+        migrations.AddIndex(
+            model_name='part',
+            index=models.Index(fields=['updated_at', 'id'], name='content_part_updated'),
+        ),
+        migrations.AddIndex(
+            model_name='subject',
+            index=models.Index(fields=['updated_at', 'id'], name='content_subject_updated'),
+        ),
+        migrations.AddIndex(
+            model_name='synctombstone',
+            index=models.Index(fields=['deleted_at', 'id'], name='content_tombstone_deleted'),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 4.2.6 on 2026-10-18 15:52
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0003_sync'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PartAssetScan',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source_sha256', models.CharField(max_length=64)),
+                ('page_bytes', models.PositiveBigIntegerField(default=0)),
+                ('asset_bytes', models.PositiveBigIntegerField(default=0)),
+                ('preload', models.JSONField(blank=True, default=list)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('part', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='asset_scan', to='content.part')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='PartAsset',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('path', models.CharField(help_text='Relative to CONTENT_ROOT', max_length=1024)),
+                ('kind', models.CharField(choices=[('style', 'Stylesheet'), ('script', 'Script'), ('font', 'Font'), ('image', 'Image'), ('other', 'Other')], max_length=16)),
+                ('size', models.PositiveBigIntegerField()),
+                ('mtime_ns', models.BigIntegerField()),
+                ('sha256', models.CharField(max_length=64)),
+                ('depth', models.PositiveSmallIntegerField(default=0)),
+                ('part', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='assets', to='content.part')),
+            ],
+            options={
+                'unique_together': {('part', 'path')},
+            },
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 4.2.6 on 2026-10-18 16:42
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0004_part_assets'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PageRewrite',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source_url', models.CharField(db_index=True, max_length=1024)),
+                ('source_size', models.PositiveBigIntegerField()),
+                ('source_mtime_ns', models.BigIntegerField()),
+                ('content_url', models.CharField(max_length=1024)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('part', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='page_rewrite', to='content.part')),
+            ],
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 4.2.6 on 2026-10-18 17:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0005_page_rewrites'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AssetBlob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source_url', models.CharField(max_length=1024, unique=True)),
+                ('blob_url', models.CharField(max_length=1024)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -1,5 +1,18 @@
+import hashlib
+import uuid
+
+from django.conf import settings
+from django.http import HttpResponse
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from dante_library_project.renderers import Envelope, is_message_data, is_wrapped
+
+from . import cache
+from .conditional import collect_validators, not_modified_response, set_validators
+from .pagination import KeysetPagination
+
 
 class MessageResponseMixin(APIView):
     """Mixin that wraps successful responses with a message and data.
@@ -25,12 +38,8 @@ class MessageResponseMixin(APIView):
         if resp.status_code >= 400:
             return resp
 
-        # If already wrapped, do nothing
-        if isinstance(data, dict) and {'status_code', 'message', 'data'}.issubset(set(data.keys())):
-            return resp
-
-        if isinstance(data, dict) and 'message' in data and 'data' in data and 'status_code' not in data:
-            # view already provided {'message','data'} shape
+        # If already wrapped, or the view provided the {'message','data'} shape
+        if is_wrapped(data) or is_message_data(data):
             return resp
 
         # Determine a message
@@ -54,5 +63,280 @@ class MessageResponseMixin(APIView):
             else:
                 msg = 'success'
 
-        resp.data = {'message': msg, 'data': data}
+        resp.data = Envelope(message=msg, data=data)
+        return resp
+
+
+class ParentLookupMixin(APIView):
+    """Resolve the parent id a list view filters on.
+
+    The id is taken from the URL (`grades/<grade_id>/lessons`), then from the
+    query string for GET requests or the request body otherwise.
+    """
+
+    parent_lookup = None
+
+    def get_parent_id(self):
+        value = self.kwargs.get(self.parent_lookup)
+        if value is None:
+            if self.request.method in ('GET', 'HEAD'):
+                value = self.request.query_params.get(self.parent_lookup)
+            else:
+                value = self.request.data.get(self.parent_lookup)
+
+        if not value:
+            raise ValidationError({'detail': f'{self.parent_lookup} is required'})
+        try:
+            return uuid.UUID(str(value))
+        except ValueError:
+            raise ValidationError({'detail': f'{self.parent_lookup} must be a valid UUID'})
+
+
+class KeysetPageMixin(APIView):
+    """Opt-in keyset pagination for list views that build their own envelope.
+
+    `list_response()` passes its queryset through `paginate_queryset()` and
+    puts `page_data()` where the plain list used to go, so unpaginated
+    requests keep their original shape.
+    """
+
+    pagination_class = KeysetPagination
+    keyset_ordering = ('number', 'id')
+
+    def page_data(self, data, page):
+        if page is None:
+            return data
+        return self.paginator.get_paginated_data(data)
+
+
+def param_names(params, param):
+    return [name.strip() for value in params.getlist(param) for name in value.split(',') if name.strip()]
+
+
+def select_field_names(params, available, default_omit=(), fields_param='fields', omit_param='omit'):
+    """The subset of `available` chosen by `?fields=`/`?omit=`, or None when nothing is excluded."""
+    if fields_param in params:
+        requested = param_names(params, fields_param)
+        excluded = [name for name in available if name not in requested]
+    elif omit_param in params:
+        requested = param_names(params, omit_param)
+        excluded = requested
+    else:
+        requested = excluded = list(default_omit)
+
+    unknown = [name for name in requested if name not in available]
+    if unknown:
+        raise ValidationError({'detail': f"Unknown field(s): {', '.join(unknown)}"})
+    if not excluded:
+        return None
+    return [name for name in available if name not in excluded]
+
+
+class SparseFieldsMixin(APIView):
+    """Limit response fields with `?fields=a,b` or `?omit=c`.
+
+    The same selection trims the SQL columns: serializer-backed views load
+    rows with `.only()`, and `ValuesListMixin` passes it to `.values()`.
+    `default_omit` applies when the client sends neither parameter, so an
+    empty `?omit=` asks for every field.
+    """
+
+    fields_query_param = 'fields'
+    omit_query_param = 'omit'
+    default_omit = ()
+
+    def get_field_names(self, available):
+        """The selected subset of `available`, or None when nothing is excluded."""
+        return select_field_names(
+            self.request.query_params, available, self.default_omit, self.fields_query_param, self.omit_query_param
+        )
+
+    def get_serializer_fields(self):
+        serializer_class = self.get_serializer_class()
+        names = self.get_field_names(list(serializer_class().fields))
+        return serializer_class, names
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        _, names = self.get_serializer_fields()
+        if names is not None:
+            fields = getattr(serializer, 'child', serializer).fields
+            for name in list(fields):
+                if name not in names:
+                    fields.pop(name)
+        return serializer
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        serializer_class, names = self.get_serializer_fields()
+        if names is None:
+            return queryset
+        fields = serializer_class().fields
+        return queryset.only(*{fields[name].source for name in names})
+
+
+class ValuesListMixin(SparseFieldsMixin, KeysetPageMixin):
+    """List data from `values_serializer`, honouring sparse fields and paging."""
+
+    values_serializer = None
+
+    def list_data(self, queryset):
+        names = self.get_field_names(self.values_serializer.field_names)
+        rows = self.values_serializer.values(queryset, names, extra=self.keyset_ordering)
+        page = self.paginate_queryset(rows)
+        data = self.values_serializer.to_representation(rows if page is None else page, names)
+        return self.page_data(data, page)
+
+
+class BatchLookupMixin(SparseFieldsMixin):
+    """List children of several parents at once, grouped by parent id.
+
+    Parent ids come from `batch_lookup` (e.g. `chapter_ids`) as a list or a
+    comma-separated string, in the query string for GET requests or the
+    request body otherwise, capped at CONTENT_BATCH_MAX_IDS. Every requested
+    id appears in the result, with an empty list when it has no children.
+    """
+
+    batch_lookup = None
+    parent_field = None
+    values_serializer = None
+    _parent_ids = None
+
+    def get_parent_ids(self):
+        if self._parent_ids is None:
+            self._parent_ids = self.read_parent_ids()
+        return self._parent_ids
+
+    def read_parent_ids(self):
+        if self.request.method in ('GET', 'HEAD'):
+            values = self.request.query_params.getlist(self.batch_lookup)
+        elif hasattr(self.request.data, 'getlist'):
+            values = self.request.data.getlist(self.batch_lookup)
+        else:
+            values = self.request.data.get(self.batch_lookup)
+            if not isinstance(values, list):
+                values = [] if values is None else [values]
+
+        raw = [part.strip() for value in values for part in str(value).split(',') if part.strip()]
+        if not raw:
+            raise ValidationError({'detail': f'{self.batch_lookup} is required'})
+
+        limit = getattr(settings, 'CONTENT_BATCH_MAX_IDS', 100)
+        ids = []
+        for value in raw:
+            try:
+                pk = uuid.UUID(value)
+            except ValueError:
+                raise ValidationError({'detail': f'{self.batch_lookup} must contain valid UUIDs'})
+            if pk not in ids:
+                ids.append(pk)
+        if len(ids) > limit:
+            raise ValidationError({'detail': f'{self.batch_lookup} accepts at most {limit} ids'})
+        return ids
+
+    def grouped_data(self, queryset):
+        names = self.get_field_names(self.values_serializer.field_names)
+        rows = list(self.values_serializer.values(queryset, names, extra=(self.parent_field,)))
+        data = self.values_serializer.to_representation(rows, names)
+
+        grouped = {str(pk): [] for pk in self.get_parent_ids()}
+        for row, item in zip(rows, data):
+            grouped[str(row[self.parent_field])].append(item)
+        return grouped
+
+
+class ConditionalGetMixin(APIView):
+    """Answer GET requests with 304 Not Modified when the client is current.
+
+    Validators are computed from the filtered queryset with a single
+    aggregate query before anything is serialized; on a match the view
+    returns immediately and neither the serializer nor the renderer runs.
+    Successful responses carry the same ETag/Last-Modified headers.
+    """
+
+    _validators = None
+
+    def get_validators(self, queryset):
+        return collect_validators(self.request.get_full_path(), queryset)
+
+    def not_modified(self, queryset):
+        if self.request.method not in ('GET', 'HEAD'):
+            return None
+        self._validators = self.get_validators(queryset)
+        return not_modified_response(self.request, *self._validators)
+
+    def list(self, request, *args, **kwargs):
+        not_modified = self.not_modified(self.filter_queryset(self.get_queryset()))
+        if not_modified is not None:
+            return not_modified
+        return super().list(request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        queryset = self.filter_queryset(self.get_queryset()).filter(
+            **{self.lookup_field: self.kwargs[lookup_url_kwarg]}
+        )
+        not_modified = self.not_modified(queryset)
+        if not_modified is not None:
+            return not_modified
+        return super().retrieve(request, *args, **kwargs)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        resp = super().finalize_response(request, response, *args, **kwargs)
+        if self._validators and 200 <= resp.status_code < 300:
+            set_validators(resp, *self._validators)
+        return resp
+
+
+class CachedResponseMixin(APIView):
+    """Serve responses from the versioned response cache (see content/cache.py).
+
+    Views set `cache_endpoint` and `cache_scope_kind` (the parent model the
+    list hangs off) and start their handlers with `self.cached_response()`.
+    On a miss the rendered response is stored in `finalize_response`.
+    """
+
+    cache_endpoint = None
+    cache_scope_kind = None
+    _response_cache = None
+
+    def get_cache_scope(self):
+        return cache.scope_for(self.cache_scope_kind, self.get_parent_id())
+
+    def get_cache_variant(self):
+        method = 'get' if self.request.method in ('GET', 'HEAD') else 'post'
+        query = self.request.query_params.urlencode()
+        return hashlib.sha1(f'{method}?{query}'.encode('utf-8')).hexdigest()
+
+    def cached_response(self):
+        if not cache.is_enabled():
+            return None
+
+        response_cache = cache.ResponseCache(
+            self.cache_endpoint, self.get_cache_scope(), self.get_cache_variant()
+        )
+        entry = response_cache.lookup()
+        if entry is None:
+            self._response_cache = response_cache
+            return None
+
+        validators = entry['validators'] or (None, None)
+        not_modified = not_modified_response(self.request, *validators)
+        if not_modified is not None:
+            return not_modified
+        response = HttpResponse(entry['content'], content_type=entry['content_type'])
+        return set_validators(response, *validators)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        resp = super().finalize_response(request, response, *args, **kwargs)
+
+        response_cache, self._response_cache = self._response_cache, None
+        if response_cache is None:
+            return resp
+
+        if isinstance(resp, Response) and resp.status_code == 200:
+            resp.render()
+            response_cache.store(resp.content, resp['Content-Type'], getattr(self, '_validators', None))
+        else:
+            response_cache.release()
         return resp
@@ -1,5 +1,6 @@
 import uuid
 from django.db import models
+from django.utils import timezone
 
 
 class TimeStampedUUIDModel(models.Model):
@@ -9,6 +10,9 @@ class TimeStampedUUIDModel(models.Model):
 
     class Meta:
         abstract = True
+        # Serves /api/sync's `(updated_at, id) > cursor` scans and the
+        # MAX(updated_at) of the conditional-GET validators.
+        indexes = [models.Index(fields=['updated_at', 'id'], name='%(app_label)s_%(class)s_updated')]
 
 
 class Grade(TimeStampedUUIDModel):
@@ -34,7 +38,7 @@ class Lesson(TimeStampedUUIDModel):
     title = models.CharField(max_length=255)
     description = models.TextField(blank=True)
 
-    class Meta:
+    class Meta(TimeStampedUUIDModel.Meta):
         unique_together = (('grade', 'subject'),)
 
     def __str__(self):
@@ -47,7 +51,7 @@ class Chapter(TimeStampedUUIDModel):
     title = models.CharField(max_length=255)
     summary = models.TextField(blank=True)
 
-    class Meta:
+    class Meta(TimeStampedUUIDModel.Meta):
         unique_together = (('lesson', 'number'),)
         ordering = ['number']
 
@@ -72,9 +76,113 @@ class Part(TimeStampedUUIDModel):
     html = models.TextField(blank=True)
     size_bytes = models.PositiveIntegerField(blank=True, null=True)
 
-    class Meta:
+    class Meta(TimeStampedUUIDModel.Meta):
         unique_together = (('chapter', 'number'),)
         ordering = ['number']
 
     def __str__(self):
         return f"{self.chapter} - Part {self.number}: {self.title}"
+
+
+class PageRewrite(models.Model):
+    """A derived copy of an authoring page served in its place (dedupe_static, subset_fonts).
+
+    seed_all_grades gives a part `content_url` instead of the copy it makes
+    of `source_url` while the authoring file has the recorded size and
+    mtime. Identical pages share a derived copy, so the record is kept per
+    part.
+    """
+    part = models.OneToOneField(Part, on_delete=models.CASCADE, related_name='page_rewrite')
+    source_url = models.CharField(max_length=1024, db_index=True)
+    source_size = models.PositiveBigIntegerField()
+    source_mtime_ns = models.BigIntegerField()
+    content_url = models.CharField(max_length=1024)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.source_url} -> {self.content_url}"
+
+
+class AssetBlob(models.Model):
+    """The content-addressed blob dedupe_static stored for an asset of the authoring tree.
+
+    Lets references to an original that `dedupe_static --prune` deleted be
+    resolved to the blob when a page is copied or deduplicated again.
+    """
+    source_url = models.CharField(max_length=1024, unique=True)
+    blob_url = models.CharField(max_length=1024)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.source_url} -> {self.blob_url}"
+
+
+class PartSearchDocument(models.Model):
+    """Normalized plain text of a part, indexed by the FTS5 table in content/search.py."""
+    part = models.OneToOneField(Part, on_delete=models.CASCADE, related_name='search_document')
+    title = models.TextField()
+    body = models.TextField()
+
+    def __str__(self):
+        return f"Search document for {self.part_id}"
+
+
+class SyncTombstone(models.Model):
+    """A deleted catalog row, reported to clients by /api/sync (see content/sync.py)."""
+    model = models.CharField(max_length=32)
+    object_id = models.UUIDField()
+    deleted_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [models.Index(fields=['deleted_at', 'id'], name='content_tombstone_deleted')]
+
+    def __str__(self):
+        return f"Deleted {self.model} {self.object_id}"
+
+
+class PartAssetScan(models.Model):
+    """When and from which page a part's `PartAsset` rows were built (see content/dependencies.py)."""
+    part = models.OneToOneField(Part, on_delete=models.CASCADE, related_name='asset_scan')
+    source_sha256 = models.CharField(max_length=64)
+    page_bytes = models.PositiveBigIntegerField(default=0)
+    asset_bytes = models.PositiveBigIntegerField(default=0)
+    # [kind, url] of the assets announced in the page's `Link: rel=preload` header.
+    preload = models.JSONField(default=list, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    @property
+    def transfer_bytes(self):
+        return self.page_bytes + self.asset_bytes
+
+    def __str__(self):
+        return f"Asset scan of {self.part_id}"
+
+
+class PartAsset(models.Model):
+    """A file a part's page loads: directly, or through a stylesheet (depth > 0)."""
+    KIND_STYLE = 'style'
+    KIND_SCRIPT = 'script'
+    KIND_FONT = 'font'
+    KIND_IMAGE = 'image'
+    KIND_OTHER = 'other'
+    KIND_CHOICES = (
+        (KIND_STYLE, 'Stylesheet'),
+        (KIND_SCRIPT, 'Script'),
+        (KIND_FONT, 'Font'),
+        (KIND_IMAGE, 'Image'),
+        (KIND_OTHER, 'Other'),
+    )
+
+    part = models.ForeignKey(Part, on_delete=models.CASCADE, related_name='assets')
+    path = models.CharField(max_length=1024, help_text='Relative to CONTENT_ROOT')
+    kind = models.CharField(max_length=16, choices=KIND_CHOICES)
+    size = models.PositiveBigIntegerField()
+    mtime_ns = models.BigIntegerField()
+    sha256 = models.CharField(max_length=64)
+    depth = models.PositiveSmallIntegerField(default=0)
+
+    class Meta:
+        unique_together = (('part', 'path'),)
+
+    def __str__(self):
+        return f"{self.part_id}: {self.path}"
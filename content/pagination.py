@@ -0,0 +1,139 @@
+import base64
+import binascii
+import json
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """Opt-in keyset (seek) pagination over a unique ordering.
+
+    Pagination only kicks in when the client sends `cursor` or `page_size`;
+    otherwise the full list is returned as before. The cursor encodes the
+    ordering values of the last row sent, and the next page is selected with
+    `WHERE key > cursor ... LIMIT n`, so every page costs the same as the
+    first one. Views set `keyset_ordering` to a tuple of fields that is
+    unique within the list (e.g. `('number', 'id')`).
+    """
+
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    page_size = 50
+    max_page_size = 500
+    ordering = ('id',)
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        params = request.query_params
+        if self.cursor_query_param not in params and self.page_size_query_param not in params:
+            return None
+
+        self.request = request
+        self.ordering = tuple(getattr(view, 'keyset_ordering', self.ordering))
+        self.page_size = self.get_page_size(request)
+
+        queryset = queryset.order_by(*self.ordering)
+        cursor = self.decode_cursor(request, queryset.model)
+        if cursor is not None:
+            queryset = queryset.filter(self.keyset_filter(cursor))
+
+        rows = list(queryset[:self.page_size + 1])
+        self.has_next = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        self.next_cursor = self.encode_cursor(rows[-1]) if self.has_next else None
+        return rows
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except (TypeError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def keyset_filter(self, values):
+        """(a, b, c) > (x, y, z) spelled as an OR of equal-prefix comparisons."""
+        condition = Q()
+        for i, field in enumerate(self.ordering):
+            prefix = {self.ordering[j]: values[j] for j in range(i)}
+            condition |= Q(**prefix, **{f'{field}__gt': values[i]})
+        return condition
+
+    def encode_cursor(self, instance):
+        values = []
+        for field in self.ordering:
+            if isinstance(instance, dict):
+                # Rows from .values() are keyed by column name.
+                value = instance[field]
+            else:
+                value = instance
+                for attr in field.split('__'):
+                    value = getattr(value, attr)
+            values.append(value if isinstance(value, (int, float)) else str(value))
+        raw = json.dumps(values, separators=(',', ':')).encode('utf-8')
+        return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+    def decode_cursor(self, request, model=None):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            padded = encoded + '=' * (-len(encoded) % 4)
+            values = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        except (binascii.Error, ValueError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(values, list) or len(values) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        if model is None:
+            return values
+        return [self.to_python(model, field, value) for field, value in zip(self.ordering, values)]
+
+    def to_python(self, model, field, value):
+        """Convert a cursor value with its ordering field, so a tampered cursor is a 404, not a 500."""
+        if value is None or isinstance(value, (list, dict)):
+            raise NotFound(self.invalid_cursor_message)
+        try:
+            model_field = None
+            for name in field.split('__'):
+                model_field = model._meta.get_field(name)
+                model = model_field.related_model
+        except FieldDoesNotExist:
+            return value
+        try:
+            return model_field.to_python(value)
+        except (ValidationError, TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def get_next_link(self):
+        if self.next_cursor is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.next_cursor)
+
+    def get_first_link(self):
+        url = self.request.build_absolute_uri()
+        return remove_query_param(url, self.cursor_query_param)
+
+    def get_paginated_data(self, data):
+        return {
+            'next': self.get_next_link(),
+            'next_cursor': self.next_cursor,
+            'results': data,
+        }
+
+    def get_paginated_response(self, data):
+        return Response(self.get_paginated_data(data))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'next_cursor': {'type': 'string', 'nullable': True},
+                'results': schema,
+            },
+        }
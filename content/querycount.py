@@ -0,0 +1,65 @@
+"""N+1 guard: fail when a code path's query count grows with its data.
+
+`assert_constant_queries(prepare)` calls `prepare(size)` for every size in
+its own rolled-back transaction. `prepare` builds `size` rows of fixtures
+and returns a callable (usually one request); the callable runs once to warm
+per-process caches and is then counted. Differing counts mean the code path
+queries per row.
+"""
+import functools
+
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.test.utils import CaptureQueriesContext
+
+
+DEFAULT_SIZES = (1, 4)
+
+
+class QueryCountError(AssertionError):
+    pass
+
+
+def count_queries(func, using=DEFAULT_DB_ALIAS):
+    """Run `func` and return (number of queries, captured queries)."""
+    with CaptureQueriesContext(connections[using]) as context:
+        func()
+    return len(context.captured_queries), context.captured_queries
+
+
+def assert_constant_queries(prepare, sizes=DEFAULT_SIZES, label=None, using=DEFAULT_DB_ALIAS):
+    """Return {size: query count}, raising QueryCountError if the counts differ."""
+    counts = {}
+    captured = {}
+    for size in sizes:
+        with transaction.atomic(using=using):
+            run = prepare(size)
+            run()
+            counts[size], captured[size] = count_queries(run, using=using)
+            transaction.set_rollback(True, using=using)
+
+    if len(set(counts.values())) > 1:
+        smallest, largest = min(sizes), max(sizes)
+        extra = [query['sql'] for query in captured[largest][counts[smallest]:]][:3]
+        raise QueryCountError(
+            f"{label or getattr(prepare, '__name__', 'code path')}: query count depends on size "
+            f"{counts}; extra queries include: {extra}"
+        )
+    return counts
+
+
+def constant_queries(*sizes, label=None, using=DEFAULT_DB_ALIAS):
+    """Decorate a `prepare(size)` function; calling it runs the assertion.
+
+        @constant_queries(1, 5)
+        def part_list(size):
+            chapter = make_chapter(parts=size)
+            return lambda: client.get(f'/api/chapters/{chapter.pk}/parts')
+
+        part_list()
+    """
+    def decorator(prepare):
+        @functools.wraps(prepare)
+        def check():
+            return assert_constant_queries(prepare, sizes or DEFAULT_SIZES, label=label or prepare.__name__, using=using)
+        return check
+    return decorator
@@ -0,0 +1,204 @@
+"""Full-text search over part content (SQLite FTS5).
+
+Each part's text (its inline `html`, or the file behind `content_url`) is
+reduced to plain text, normalized and stored in `PartSearchDocument`; the
+FTS5 table created in migration 0002 indexes those rows through triggers.
+Queries are normalized the same way, so Arabic and Persian spellings of a
+letter, diacritics, tatweel and Persian/Arabic-Indic digits all match.
+"""
+import html
+import unicodedata
+import uuid
+from html.parser import HTMLParser
+
+from django.db import connection, connections, router
+
+from . import assets, models
+
+
+FTS_TABLE = 'content_partsearchdocument_fts'
+
+SNIPPET_START = '\x02'
+SNIPPET_END = '\x03'
+
+SKIPPED_TAGS = {'script', 'style', 'noscript', 'template'}
+
+# Arabic code points folded to the letters Persian text uses, digits to
+# ASCII, tatweel dropped and ZWNJ (which joins affixes such as `می‌`/`‌ها`)
+# turned into a word break.
+CHARACTER_MAP = str.maketrans({
+    'ي': 'ی',  # ARABIC LETTER YEH -> FARSI YEH
+    'ى': 'ی',  # ALEF MAKSURA -> FARSI YEH
+    'ك': 'ک',  # ARABIC LETTER KAF -> KEHEH
+    'ة': 'ه',  # TEH MARBUTA -> HEH
+    '\u0640': None,  # TATWEEL
+    '\u200c': ' ',   # ZERO WIDTH NON-JOINER
+    **{chr(0x06f0 + i): str(i) for i in range(10)},
+    **{chr(0x0660 + i): str(i) for i in range(10)},
+})
+
+
+class TextExtractor(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.chunks = []
+        self.skipping = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in SKIPPED_TAGS:
+            self.skipping += 1
+        self.chunks.append(' ')
+
+    def handle_endtag(self, tag):
+        if tag in SKIPPED_TAGS and self.skipping:
+            self.skipping -= 1
+        self.chunks.append(' ')
+
+    def handle_data(self, data):
+        if not self.skipping:
+            self.chunks.append(data)
+
+
+def extract_text(markup: str) -> str:
+    parser = TextExtractor()
+    parser.feed(markup)
+    parser.close()
+    return ' '.join(''.join(parser.chunks).split())
+
+
+def normalize(text: str) -> str:
+    """Fold letter variants and strip combining marks (harakat, hamza, accents)."""
+    decomposed = unicodedata.normalize('NFKD', text)
+    stripped = ''.join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return unicodedata.normalize('NFC', stripped).translate(CHARACTER_MAP)
+
+
+def part_markup(part) -> str:
+    if part.content_type == models.Part.CONTENT_TYPE_URL:
+        source = assets.url_to_path(part.content_url or '')
+        if source is None or not source.is_file():
+            return ''
+        return source.read_text(encoding='utf-8', errors='replace')
+    return part.html or ''
+
+
+def is_available():
+    return connection.vendor == 'sqlite'
+
+
+# ---- indexing ----
+
+# The Part fields index_parts reads.
+INDEXED_PART_FIELDS = ('id', 'title', 'content_type', 'content_url', 'html')
+
+
+def index_parts(parts):
+    """Create or refresh the search documents of `parts`."""
+    if not is_available():
+        return 0
+    documents = [
+        models.PartSearchDocument(
+            part_id=part.pk,
+            title=normalize(part.title),
+            body=normalize(extract_text(part_markup(part))),
+        )
+        for part in parts
+    ]
+    if documents:
+        models.PartSearchDocument.objects.bulk_create(
+            documents,
+            batch_size=500,
+            update_conflicts=True,
+            unique_fields=['part'],
+            update_fields=['title', 'body'],
+        )
+    return len(documents)
+
+
+def index_missing(batch_size=500):
+    """Index the parts that have no search document yet, such as rows older than the index."""
+    if not is_available():
+        return 0
+    parts = models.Part.objects.filter(search_document__isnull=True).only(*INDEXED_PART_FIELDS).order_by('pk')
+    indexed = 0
+    batch = []
+    for part in parts.iterator(chunk_size=batch_size):
+        batch.append(part)
+        if len(batch) == batch_size:
+            indexed += index_parts(batch)
+            batch = []
+    return indexed + index_parts(batch)
+
+
+def index_chapters(chapter_ids):
+    """Reindex every part of the given chapters."""
+    if not chapter_ids:
+        return 0
+    return index_parts(models.Part.objects.filter(chapter_id__in=chapter_ids))
+
+
+# ---- querying ----
+
+def match_expression(query: str):
+    """Turn free text into an FTS5 query: every term required, the last one as a prefix."""
+    terms = normalize(query).split()
+    if not terms:
+        return None
+    quoted = ['"' + term.replace('"', '""') + '"' for term in terms]
+    quoted[-1] += '*'
+    return ' '.join(quoted)
+
+
+SEARCH_SQL = f"""
+    SELECT p.id, p.number, p.title,
+           c.id, c.number, c.title,
+           l.id, l.title,
+           g.id, g.code, g.name,
+           snippet({FTS_TABLE}, 1, char(2), char(3), '…', %s),
+           rank
+    FROM {FTS_TABLE}
+    JOIN content_partsearchdocument d ON d.id = {FTS_TABLE}.rowid
+    JOIN content_part p ON p.id = d.part_id
+    JOIN content_chapter c ON c.id = p.chapter_id
+    JOIN content_lesson l ON l.id = c.lesson_id
+    JOIN content_grade g ON g.id = l.grade_id
+    WHERE {FTS_TABLE} MATCH %s {{grade_filter}}
+    ORDER BY rank
+    LIMIT %s
+"""
+
+
+def render_snippet(snippet: str) -> str:
+    """Escape the snippet text and turn the match markers into <mark> tags."""
+    return html.escape(snippet or '').replace(SNIPPET_START, '<mark>').replace(SNIPPET_END, '</mark>')
+
+
+def search(query: str, limit=20, grade_id=None, snippet_tokens=16):
+    """Ranked hits for `query`, with snippets and grade/lesson/chapter context, in one query."""
+    expression = match_expression(query)
+    if expression is None:
+        return []
+
+    params = [snippet_tokens, expression]
+    grade_filter = ''
+    if grade_id is not None:
+        grade_filter = 'AND g.id = %s'
+        params.append(uuid.UUID(str(grade_id)).hex)
+    params.append(limit)
+
+    with connections[router.db_for_read(models.PartSearchDocument)].cursor() as cursor:
+        cursor.execute(SEARCH_SQL.format(grade_filter=grade_filter), params)
+        rows = cursor.fetchall()
+
+    return [
+        {
+            'part': {'id': str(uuid.UUID(part_id)), 'number': part_number, 'title': part_title},
+            'chapter': {'id': str(uuid.UUID(chapter_id)), 'number': chapter_number, 'title': chapter_title},
+            'lesson': {'id': str(uuid.UUID(lesson_id)), 'title': lesson_title},
+            'grade': {'id': str(uuid.UUID(grade_pk)), 'code': grade_code, 'name': grade_name},
+            'snippet': render_snippet(snippet),
+            'score': -rank,
+        }
+        for (part_id, part_number, part_title, chapter_id, chapter_number, chapter_title,
+             lesson_id, lesson_title, grade_pk, grade_code, grade_name, snippet, rank) in rows
+    ]
@@ -1,39 +1,50 @@
-from rest_framework import serializers
+from django.utils.functional import cached_property
+from rest_framework import ISO_8601, serializers
+from rest_framework.settings import api_settings
+from dante_library_project.timing import measure
 from . import models
 
 
-class PartSerializer(serializers.ModelSerializer):
+class TimedModelSerializer(serializers.ModelSerializer):
+    """ModelSerializer whose work is reported as `serialize` in Server-Timing."""
+
+    def to_representation(self, instance):
+        with measure('serialize'):
+            return super().to_representation(instance)
+
+
+class PartSerializer(TimedModelSerializer):
     class Meta:
         model = models.Part
         fields = ['id', 'chapter', 'number', 'title', 'mime', 'content_type', 'content_url', 'html', 'size_bytes', 'created_at', 'updated_at']
 
 
-class ChapterSerializer(serializers.ModelSerializer):
+class ChapterSerializer(TimedModelSerializer):
     class Meta:
         model = models.Chapter
         fields = ['id', 'lesson', 'number', 'title', 'summary', 'created_at', 'updated_at']
 
 
-class LessonSerializer(serializers.ModelSerializer):
+class LessonSerializer(TimedModelSerializer):
     class Meta:
         model = models.Lesson
         fields = ['id', 'grade', 'subject', 'title', 'description', 'created_at', 'updated_at']
 
 
-class SubjectSerializer(serializers.ModelSerializer):
+class SubjectSerializer(TimedModelSerializer):
     class Meta:
         model = models.Subject
         fields = ['id', 'code', 'title', 'language', 'created_at', 'updated_at']
 
 
-class GradeSerializer(serializers.ModelSerializer):
+class GradeSerializer(TimedModelSerializer):
     class Meta:
         model = models.Grade
         fields = ['id', 'code', 'name', 'created_at', 'updated_at']
 
 
 # Create serializers
-class LessonCreateSerializer(serializers.ModelSerializer):
+class LessonCreateSerializer(TimedModelSerializer):
     grade_id = serializers.UUIDField(write_only=True)
     subject_id = serializers.UUIDField(write_only=True)
 
@@ -42,7 +53,7 @@ class LessonCreateSerializer(serializers.ModelSerializer):
         fields = ['id', 'grade_id', 'subject_id', 'title', 'description']
 
 
-class ChapterCreateSerializer(serializers.ModelSerializer):
+class ChapterCreateSerializer(TimedModelSerializer):
     lesson_id = serializers.UUIDField(write_only=True)
 
     class Meta:
@@ -50,9 +61,114 @@ class ChapterCreateSerializer(serializers.ModelSerializer):
         fields = ['id', 'lesson_id', 'number', 'title', 'summary']
 
 
-class PartCreateSerializer(serializers.ModelSerializer):
+class PartCreateSerializer(TimedModelSerializer):
     chapter_id = serializers.UUIDField(write_only=True)
 
     class Meta:
         model = models.Part
         fields = ['id', 'chapter_id', 'number', 'title', 'mime', 'content_type', 'content_url', 'html', 'size_bytes']
+
+
+# Catalog (navigation tree) serializers
+class CatalogPartSerializer(TimedModelSerializer):
+    class Meta:
+        model = models.Part
+        fields = ['id', 'number', 'title', 'mime', 'content_type', 'content_url', 'size_bytes', 'updated_at']
+
+
+class CatalogChapterSerializer(TimedModelSerializer):
+    parts = CatalogPartSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = models.Chapter
+        fields = ['id', 'number', 'title', 'summary', 'updated_at', 'parts']
+
+
+class CatalogLessonSerializer(TimedModelSerializer):
+    subject = SubjectSerializer(read_only=True)
+    chapters = CatalogChapterSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = models.Lesson
+        fields = ['id', 'title', 'description', 'subject', 'updated_at', 'chapters']
+
+
+class CatalogGradeSerializer(TimedModelSerializer):
+    lessons = CatalogLessonSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = models.Grade
+        fields = ['id', 'code', 'name', 'updated_at', 'lessons']
+
+
+# Read-only list rendering without model instances
+class ValuesSerializer:
+    """Render a flat ModelSerializer's list output straight from `.values()`.
+
+    Only the serializer's own columns are fetched, no model instances are
+    built, and each value goes through the conversion DRF would apply
+    (UUIDs to strings, datetimes to ISO 8601 in the current timezone), so
+    the rendered JSON is identical to `serializer_class(qs, many=True)`.
+    Fields without a fast conversion fall back to `field.to_representation`.
+    """
+
+    passthrough_fields = (serializers.CharField, serializers.ChoiceField, serializers.IntegerField)
+
+    def __init__(self, serializer_class):
+        self.serializer_class = serializer_class
+
+    @cached_property
+    def fields(self):
+        """(output name, values() column, serializer field) per readable field."""
+        opts = self.serializer_class.Meta.model._meta
+        return [
+            (name, opts.get_field(field.source).attname, field)
+            for name, field in self.serializer_class().fields.items()
+            if not field.write_only
+        ]
+
+    @property
+    def field_names(self):
+        return [name for name, _, _ in self.fields]
+
+    def select(self, names=None):
+        if names is None:
+            return self.fields
+        return [entry for entry in self.fields if entry[0] in names]
+
+    def values(self, queryset, names=None, extra=()):
+        """`.values()` for the selected fields plus any `extra` columns (e.g. a cursor key)."""
+        columns = [column for _, column, _ in self.select(names)]
+        columns += [column for column in extra if column not in columns]
+        return queryset.values(*columns)
+
+    def get_converter(self, field):
+        if isinstance(field, self.passthrough_fields):
+            return None
+        if isinstance(field, serializers.PrimaryKeyRelatedField) and field.pk_field is None:
+            return None
+        if isinstance(field, serializers.UUIDField) and field.uuid_format == 'hex_verbose':
+            return str
+        if isinstance(field, serializers.DateTimeField):
+            output_format = getattr(field, 'format', api_settings.DATETIME_FORMAT)
+            tz = field.timezone if hasattr(field, 'timezone') else field.default_timezone()
+            if output_format is not None and output_format.lower() == ISO_8601 and tz is not None:
+                return lambda value: iso_datetime(value, tz) if value.tzinfo else field.to_representation(value)
+        return field.to_representation
+
+    def to_representation(self, rows, names=None):
+        converters = [(name, column, self.get_converter(field)) for name, column, field in self.select(names)]
+        with measure('serialize'):
+            return [
+                {
+                    name: row[column] if convert is None or row[column] is None else convert(row[column])
+                    for name, column, convert in converters
+                }
+                for row in rows
+            ]
+
+
+def iso_datetime(value, tz):
+    """DateTimeField.to_representation for aware datetimes and ISO 8601 output."""
+    text = value.astimezone(tz).isoformat()
+    return text[:-6] + 'Z' if text.endswith('+00:00') else text
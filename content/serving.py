@@ -0,0 +1,341 @@
+"""Serve files from the content tree and part bodies without buffering.
+
+`compress_static` writes `.br`/`.gz` siblings next to compressible files;
+these views pick the best one the client accepts, so nothing is compressed
+per request. File bodies are streamed (or handed to the front proxy with
+X-Accel-Redirect/X-Sendfile) and single byte ranges are honoured. Part
+pages are no exception: seed_all_grades points parts at a copy of their
+page with absolute references (see assets.py), which works as it is from
+`parts/<id>/content`.
+
+Part bodies carry a `Link` header preloading the stylesheets, fonts and
+scripts the page needs and prefetching the chapter's next part, from the
+list stored by the asset index (content/dependencies.py). Neither Django
+handler can send a 103 Early Hints response; front proxies and CDNs that
+turn `rel=preload` links into 103 (e.g. Cloudflare, H2O) do it from this
+header.
+"""
+import mimetypes
+import re
+from urllib.parse import quote
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import (
+    FileResponse, Http404, HttpResponse, HttpResponseRedirect, StreamingHttpResponse,
+)
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date, parse_http_date_safe, quote_etag
+from django.views.decorators.http import require_safe
+
+from . import assets, bundles, dependencies, models
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+def parse_accept_encoding(header):
+    """Return {coding: q} for an Accept-Encoding header value."""
+    accepted = {}
+    for item in (header or '').split(','):
+        coding, _, params = item.strip().partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        for param in params.split(';'):
+            name, _, value = param.strip().partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        accepted[coding] = q
+    return accepted
+
+
+def select_variant(request, source):
+    """Return (path, encoding) of the best representation of `source`.
+
+    Siblings older than the source are ignored so an outdated build never
+    serves stale content.
+    """
+    if not assets.is_compressible(source):
+        return source, None
+
+    accepted = parse_accept_encoding(request.META.get('HTTP_ACCEPT_ENCODING'))
+    wildcard = accepted.get('*', 0.0)
+    source_mtime = source.stat().st_mtime
+    best = (source, None, 0.0)
+    for encoding, _ in assets.ENCODING_SUFFIXES:
+        q = accepted.get(encoding, wildcard)
+        if q <= best[2]:
+            continue
+        sibling = assets.encoded_sibling(source, encoding)
+        try:
+            if sibling.stat().st_mtime < source_mtime:
+                continue
+        except FileNotFoundError:
+            continue
+        best = (sibling, encoding, q)
+    return best[0], best[1]
+
+
+def file_etag(stat, encoding=None):
+    """Strong ETag for one representation of a file (size + mtime + coding)."""
+    tag = f'{stat.st_size:x}-{stat.st_mtime_ns:x}'
+    return quote_etag(f'{tag}-{encoding}' if encoding else tag)
+
+
+def if_range_matches(request, etag, last_modified):
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if not if_range:
+        return True
+    if if_range.startswith(('"', 'W/')):
+        # If-Range requires a strong comparison; weak tags never match.
+        return if_range == etag
+    return parse_http_date_safe(if_range) == last_modified
+
+
+def parse_byte_range(request, size):
+    """Return the (start, end) of a single requested byte range, or None.
+
+    Multiple ranges and malformed headers are ignored (the full body is sent,
+    as RFC 9110 allows); a range starting past the end raises
+    RangeNotSatisfiable.
+    """
+    match = RANGE_RE.match(request.META.get('HTTP_RANGE', '').strip())
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        length = int(last)
+        if length == 0:
+            raise RangeNotSatisfiable
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size:
+        raise RangeNotSatisfiable
+    if end < start:
+        return None
+    return start, end
+
+
+def iter_file_range(path, start, length, block_size=FileResponse.block_size):
+    with open(path, 'rb') as fh:
+        fh.seek(start)
+        while length > 0:
+            chunk = fh.read(min(block_size, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+async def aiter_file_range(path, start, length, block_size=64 * 1024):
+    """`iter_file_range()` for ASGI: each read runs in a worker thread.
+
+    Blocks are larger than FileResponse's, as every read is a thread hop.
+    """
+    fh = await sync_to_async(open, thread_sensitive=False)(path, 'rb')
+    try:
+        fh.seek(start)
+        while length > 0:
+            chunk = await sync_to_async(fh.read, thread_sensitive=False)(min(block_size, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+    finally:
+        fh.close()
+
+
+def offload_response(source, content_type):
+    """Let the front proxy send the file, if CONTENT_SENDFILE_BACKEND is set."""
+    backend = getattr(settings, 'CONTENT_SENDFILE_BACKEND', None)
+    if not backend:
+        return None
+
+    if backend == 'x-accel-redirect' and assets.inside_root(source) is None:
+        # Only CONTENT_ROOT is aliased for the proxy.
+        return None
+
+    response = HttpResponse(content_type=content_type)
+    if backend == 'x-accel-redirect':
+        rel = source.relative_to(assets.content_root().resolve())
+        prefix = getattr(settings, 'CONTENT_ACCEL_REDIRECT_PREFIX', '/protected-content/')
+        response['X-Accel-Redirect'] = prefix.rstrip('/') + '/' + '/'.join(quote(seg) for seg in rel.parts)
+    elif backend == 'x-sendfile':
+        response['X-Sendfile'] = str(source)
+    else:
+        raise ValueError(f'Unknown CONTENT_SENDFILE_BACKEND: {backend!r}')
+    return response
+
+
+def file_response(request, source, stat, content_type, etag, last_modified, stream=None, variant=None,
+                  encoding=None):
+    """Body of `serve_file()`.
+
+    `variant` is the file sent for a full response, precompressed with
+    `encoding` (default: `source` itself); byte ranges always address the
+    identity `source`. `stream(path, start, length)` replaces the default
+    file iteration; async views pass `aiter_file_range` so ASGI never
+    buffers a sync file body.
+    """
+    offload = offload_response(source, content_type)
+    if offload is not None:
+        # The proxy handles ranges and precompressed variants itself.
+        return offload
+
+    ranged = (
+        encoding is None and 'HTTP_RANGE' in request.META and if_range_matches(request, etag, last_modified)
+    )
+    if ranged:
+        try:
+            byte_range = parse_byte_range(request, stat.st_size)
+        except RangeNotSatisfiable:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{stat.st_size}'
+            return response
+        if byte_range is not None:
+            start, end = byte_range
+            length = end - start + 1
+            response = StreamingHttpResponse(
+                (stream or iter_file_range)(source, start, length), status=206, content_type=content_type
+            )
+            response['Content-Range'] = f'bytes {start}-{end}/{stat.st_size}'
+            response['Content-Length'] = length
+            response['Accept-Ranges'] = 'bytes'
+            return response
+
+    variant = variant or source
+    if stream is None:
+        # The filename is the source's, not that of a `.br`/`.gz` sibling.
+        response = FileResponse(variant.open('rb'), content_type=content_type, filename=source.name)
+    else:
+        size = stat.st_size if variant == source else variant.stat().st_size
+        response = StreamingHttpResponse(stream(variant, 0, size), content_type=content_type)
+        response['Content-Length'] = size
+    if encoding:
+        response['Content-Encoding'] = encoding
+    else:
+        response['Accept-Ranges'] = 'bytes'
+    return response
+
+
+def serve_file(request, source, content_type=None, stream=None):
+    """Stream `source` with validators, byte ranges and precompressed variants."""
+    stat = source.stat()
+    if content_type is None:
+        content_type = mimetypes.guess_type(source.name)[0] or 'application/octet-stream'
+
+    # Range requests address the identity body, so only full responses are
+    # negotiated (a Range whose If-Range fails gets the identity body too);
+    # each encoding gets its own strong ETag.
+    variant, encoding = source, None
+    if 'HTTP_RANGE' not in request.META:
+        variant, encoding = select_variant(request, source)
+    etag = file_etag(stat, encoding)
+    last_modified = int(stat.st_mtime)
+
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        response = file_response(
+            request, source, stat, content_type, etag, last_modified, stream, variant=variant, encoding=encoding
+        )
+
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    if assets.is_compressible(source):
+        patch_vary_headers(response, ('Accept-Encoding',))
+    return response
+
+
+@require_safe
+def serve_content(request, path):
+    source = assets.inside_root(assets.content_root() / path)
+    if source is None or not source.is_file() or assets.is_junk(source):
+        raise Http404('File not found')
+    return serve_file(request, source)
+
+
+@require_safe
+def part_content(request, pk):
+    """Deliver a part's body directly instead of inside the JSON envelope."""
+    part = get_object_or_404(dependencies.with_preload(models.Part.objects.defer('html')), pk=pk)
+    return part_response(request, part)
+
+
+def add_preload_links(request, part, response):
+    """Set `Link` on a part body from the `with_preload()` annotations, if loaded."""
+    if response.status_code not in (200, 206):
+        return response
+    next_url = None
+    next_part_id = getattr(part, 'next_part_id', None)
+    if next_part_id is not None:
+        # Prefetch through the same route (sync or async) as this request.
+        match = request.resolver_match
+        view_name = match.view_name if match is not None else 'part-content'
+        next_url = reverse(view_name, kwargs={'pk': next_part_id})
+    links = dependencies.link_header(getattr(part, 'preload', None), next_url)
+    if links:
+        response['Link'] = links
+    return response
+
+
+def part_response(request, part, stream=None):
+    if part.content_type == models.Part.CONTENT_TYPE_URL:
+        url = part.content_url or ''
+        if url.startswith(('http://', 'https://')):
+            return HttpResponseRedirect(url)
+        source = assets.url_to_path(url)
+        if source is None or not source.is_file():
+            raise Http404('Part content not found')
+        response = serve_file(request, source, content_type=part.mime, stream=stream)
+        return add_preload_links(request, part, response)
+
+    etag = quote_etag(f'{part.pk.hex}-{part.updated_at.timestamp():f}')
+    last_modified = int(part.updated_at.timestamp())
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        body = part.html.encode('utf-8')
+        response = HttpResponse(body, content_type=f'{part.mime}; charset=utf-8')
+        response['Content-Length'] = len(body)
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    return add_preload_links(request, part, response)
+
+
+@require_safe
+def lesson_bundle(request, lesson_id):
+    """Zip of a lesson's parts and assets for offline use (see content/bundles.py).
+
+    The bundle key is the ETag. It comes from timestamps and file stats, so a
+    304 or a bundle already in the bundle cache (sent from disk, with byte
+    ranges) reads no content; otherwise the bundle is streamed while it is
+    built.
+    """
+    try:
+        bundle = bundles.lesson_bundle(lesson_id)
+    except models.Lesson.DoesNotExist:
+        raise Http404('Lesson not found')
+
+    etag = quote_etag(bundle.key)
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        cached = bundle.cached_path()
+        if cached is not None and cached.is_file():
+            response = file_response(request, cached, cached.stat(), bundles.CONTENT_TYPE, etag, None)
+        else:
+            response = StreamingHttpResponse(bundle.iter_and_store(), content_type=bundles.CONTENT_TYPE)
+        response['Content-Disposition'] = f'attachment; filename="lesson-{lesson_id}.zip"'
+    response['ETag'] = etag
+    return response
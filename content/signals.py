@@ -0,0 +1,114 @@
+import threading
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from . import dependencies, models, search, sync
+from .cache import bump_versions, scope_for
+
+
+# Each change invalidates the cached lists of the row's parent scope, and
+# of its previous parent when it moved.
+
+# model -> (parent foreign key attname, parent scope kind)
+PARENTS = {
+    models.Lesson: ('grade_id', 'grade'),
+    models.Chapter: ('lesson_id', 'lesson'),
+    models.Part: ('chapter_id', 'chapter'),
+}
+
+
+@receiver(post_init, sender=models.Lesson)
+@receiver(post_init, sender=models.Chapter)
+@receiver(post_init, sender=models.Part)
+def remember_parent(sender, instance, **kwargs):
+    # None when the field was deferred: the old parent is then unknown.
+    instance._loaded_parent_id = instance.__dict__.get(PARENTS[sender][0])
+
+
+@receiver([post_save, post_delete], sender=models.Grade)
+def grade_changed(sender, instance, using, **kwargs):
+    bump_versions(scope_for('grades'), using=using)
+
+
+@receiver([post_save, post_delete], sender=models.Lesson)
+@receiver([post_save, post_delete], sender=models.Chapter)
+@receiver([post_save, post_delete], sender=models.Part)
+def child_changed(sender, instance, using, **kwargs):
+    attname, kind = PARENTS[sender]
+    parent_id = getattr(instance, attname)
+    scopes = {scope_for(kind, parent_id)}
+    previous = getattr(instance, '_loaded_parent_id', None)
+    if previous is not None and previous != parent_id:
+        scopes.add(scope_for(kind, previous))
+    instance._loaded_parent_id = parent_id
+    bump_versions(*scopes, using=using)
+
+
+# Indexing reads the part's page, so it waits for the saving transaction to
+# commit and then covers every part saved in it in one batch: a seed saving
+# thousands of parts does not parse pages under the write lock.
+
+pending = threading.local()
+
+
+def index_after_commit(index, part_id, using):
+    """Queue `part_id` for `index(part ids)`, run once the current transaction commits."""
+    queue = pending.__dict__.setdefault('queues', {}).setdefault((index, using), set())
+    queue.add(part_id)
+
+    def run():
+        # The first callback of the transaction takes the whole queue. Ids
+        # left by a rolled-back transaction go with the next commit.
+        part_ids = set(queue)
+        queue.clear()
+        if part_ids:
+            index(part_ids)
+
+    transaction.on_commit(run, using=using)
+
+
+# Search documents are refreshed when a part's text may have changed;
+# deleting a part cascades to its document (and the FTS triggers).
+
+SEARCHED_PART_FIELDS = {'title', 'html', 'content_type', 'content_url'}
+
+
+def index_part_text(part_ids):
+    search.index_parts(models.Part.objects.filter(pk__in=part_ids).only(*search.INDEXED_PART_FIELDS))
+
+
+@receiver(post_save, sender=models.Part)
+def part_text_changed(sender, instance, using, update_fields=None, raw=False, **kwargs):
+    if raw or (update_fields and not SEARCHED_PART_FIELDS & set(update_fields)):
+        return
+    index_after_commit(index_part_text, instance.pk, using)
+
+
+# The asset index follows the part's page.
+
+PAGE_PART_FIELDS = {'html', 'content_type', 'content_url'}
+
+
+def index_part_assets(part_ids):
+    dependencies.index_parts(models.Part.objects.filter(pk__in=part_ids))
+
+
+@receiver(post_save, sender=models.Part)
+def part_page_changed(sender, instance, using, update_fields=None, raw=False, **kwargs):
+    if raw or (update_fields and not PAGE_PART_FIELDS & set(update_fields)):
+        return
+    index_after_commit(index_part_assets, instance.pk, using)
+
+
+# Deletions are logged for /api/sync. Cascades send post_delete for every
+# row they remove, so deleting a lesson also logs its chapters and parts.
+
+@receiver(post_delete, sender=models.Grade)
+@receiver(post_delete, sender=models.Subject)
+@receiver(post_delete, sender=models.Lesson)
+@receiver(post_delete, sender=models.Chapter)
+@receiver(post_delete, sender=models.Part)
+def catalog_row_deleted(sender, instance, using, **kwargs):
+    models.SyncTombstone.objects.using(using).create(model=sync.TRACKED_MODELS[sender], object_id=instance.pk)
@@ -0,0 +1,196 @@
+"""Delta sync: the catalog rows created, changed or deleted since a cursor.
+
+Grades, subjects, lessons, chapters and parts are reported from their own
+tables through `updated_at`; deletions are reported from `SyncTombstone`
+rows, which the post_delete receivers in signals.py write in the deleting
+transaction (cascades included). Changes are ordered by (timestamp, model,
+id) and the cursor holds the position of the last change sent, so a page is
+one `(stamp, id) > position ORDER BY stamp, id LIMIT n` range scan per table
+over its (updated_at, id) index. A client that is up to date costs a single
+query: one UNION ALL of those scans that stops at the first row.
+
+Only changes older than CONTENT_SYNC_SETTLE_SECONDS (the horizon) are
+reported. A row's timestamp is taken when it is written, not when its
+transaction commits, so it can become visible after a newer row. The cursor
+skips no such row as long as every write transaction commits within the
+horizon of the first timestamp it takes, waiting for the write lock
+included. A transaction that runs longer can have its rows skipped by
+clients that synced in the meantime, so writers keep their transactions to
+the row writes: the bulk and incremental seeds and the rewrite commands
+read files and index pages outside them. The sequential seed holds one
+transaction per grade and should not run while clients sync.
+
+Tombstones older than CONTENT_SYNC_TOMBSTONE_DAYS are pruned
+(prune_sync_tombstones). The cursor also records the horizon the client was
+last fully caught up to; once that is older than the pruning cutoff, some of
+the deletions it has not seen may be gone, so the cursor is refused and the
+client starts again without one.
+"""
+import base64
+import binascii
+import json
+import uuid
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import APIException, NotFound
+
+from . import models, serializers
+
+
+class Source:
+    """One kind of change: its table, timestamp column and representation."""
+
+    def __init__(self, name, queryset, stamp, values_serializer=None, omit=()):
+        self.name = name
+        self.queryset = queryset
+        self.stamp = stamp
+        self.values_serializer = values_serializer
+        if values_serializer is not None:
+            self.names = [name for name in values_serializer.field_names if name not in omit]
+
+    def after(self, rank, position):
+        """Rows whose (stamp, rank, id) comes after `position`."""
+        if position is None:
+            return Q()
+        stamp, cursor_rank, cursor_id = position
+        if rank > cursor_rank:
+            return Q(**{f'{self.stamp}__gte': stamp})
+        if rank < cursor_rank:
+            return Q(**{f'{self.stamp}__gt': stamp})
+        # Spelled as a range plus a filter so SQLite seeks the index.
+        return Q(**{f'{self.stamp}__gte': stamp}) & (Q(**{f'{self.stamp}__gt': stamp}) | Q(pk__gt=cursor_id))
+
+    def pending(self, rank, position, horizon):
+        return self.queryset.filter(self.after(rank, position), **{f'{self.stamp}__lte': horizon})
+
+    def changes(self, rank, position, horizon, limit):
+        """Up to `limit` ((stamp, rank, id), change) pairs in change order."""
+        queryset = self.pending(rank, position, horizon).order_by(self.stamp, 'pk')
+        if self.values_serializer is None:
+            return [
+                ((row.deleted_at, rank, row.pk), {'model': row.model, 'op': 'delete', 'id': str(row.object_id)})
+                for row in queryset[:limit]
+            ]
+
+        rows = list(self.values_serializer.values(queryset, self.names, extra=('id', self.stamp))[:limit])
+        data = self.values_serializer.to_representation(rows, self.names)
+        return [
+            ((row[self.stamp], rank, row['id']), {'model': self.name, 'op': 'upsert', 'data': item})
+            for row, item in zip(rows, data)
+        ]
+
+
+# Parts are sent without `html`, as in the catalog; clients fetch a part's
+# body from `parts/<id>/content`.
+SOURCES = (
+    Source('grade', models.Grade.objects.all(), 'updated_at',
+           serializers.ValuesSerializer(serializers.GradeSerializer)),
+    Source('subject', models.Subject.objects.all(), 'updated_at',
+           serializers.ValuesSerializer(serializers.SubjectSerializer)),
+    Source('lesson', models.Lesson.objects.all(), 'updated_at',
+           serializers.ValuesSerializer(serializers.LessonSerializer)),
+    Source('chapter', models.Chapter.objects.all(), 'updated_at',
+           serializers.ValuesSerializer(serializers.ChapterSerializer)),
+    Source('part', models.Part.objects.all(), 'updated_at',
+           serializers.ValuesSerializer(serializers.PartSerializer), omit=('html',)),
+    Source('deleted', models.SyncTombstone.objects.all(), 'deleted_at'),
+)
+
+TOMBSTONE_RANK = len(SOURCES) - 1
+
+# Model class -> the name tombstones and changes use for it.
+TRACKED_MODELS = {
+    models.Grade: 'grade',
+    models.Subject: 'subject',
+    models.Lesson: 'lesson',
+    models.Chapter: 'chapter',
+    models.Part: 'part',
+}
+
+
+class CursorExpired(APIException):
+    status_code = status.HTTP_410_GONE
+    default_detail = 'Cursor has expired; sync again without one.'
+    default_code = 'cursor_expired'
+
+
+def settle_horizon():
+    return timezone.now() - timedelta(seconds=getattr(settings, 'CONTENT_SYNC_SETTLE_SECONDS', 15))
+
+
+def tombstone_cutoff():
+    return timezone.now() - timedelta(days=getattr(settings, 'CONTENT_SYNC_TOMBSTONE_DAYS', 90))
+
+
+def encode_cursor(position, synced):
+    values = [synced.isoformat(), None, None, None]
+    if position is not None:
+        stamp, rank, pk = position
+        values[1:] = [stamp.isoformat(), rank, pk if isinstance(pk, int) else str(pk)]
+    raw = json.dumps(values, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(encoded):
+    """(position of the last change sent or None, horizon last caught up to)."""
+    try:
+        padded = encoded + '=' * (-len(encoded) % 4)
+        synced, stamp, rank, pk = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        synced = parse_stamp(synced)
+        if stamp is None:
+            return None, synced
+        if not 0 <= rank < len(SOURCES):
+            raise ValueError(rank)
+        pk = int(pk) if rank == TOMBSTONE_RANK else uuid.UUID(pk)
+        return (parse_stamp(stamp), rank, pk), synced
+    except (binascii.Error, ValueError, TypeError, UnicodeError):
+        raise NotFound('Invalid cursor')
+
+
+def parse_stamp(value):
+    stamp = datetime.fromisoformat(value)
+    if timezone.is_naive(stamp):
+        raise ValueError(value)
+    return stamp
+
+
+def has_changes(position, horizon):
+    """One query: does any table hold a change after `position`?"""
+    first, *rest = [
+        source.pending(rank, position, horizon).order_by().values_list(source.stamp)
+        for rank, source in enumerate(SOURCES)
+    ]
+    return first.union(*rest, all=True).exists()
+
+
+def changes_since(encoded_cursor=None, limit=500):
+    """The next `limit` changes after `encoded_cursor` (None: from the start)."""
+    position, synced = decode_cursor(encoded_cursor) if encoded_cursor else (None, None)
+    if synced is not None and synced < tombstone_cutoff():
+        raise CursorExpired()
+
+    horizon = settle_horizon()
+    changes = []
+    if has_changes(position, horizon):
+        for rank, source in enumerate(SOURCES):
+            # Each table's first limit+1 changes hold the first limit+1 overall.
+            changes += source.changes(rank, position, horizon, limit + 1)
+        changes.sort(key=lambda change: change[0])
+
+    has_more = len(changes) > limit
+    changes = changes[:limit]
+    if changes:
+        position = changes[-1][0]
+    if not has_more or synced is None:
+        # Everything up to the horizon has been sent (or the client holds
+        # nothing older than what it was just sent).
+        synced = horizon
+    return {
+        'changes': [change for _, change in changes],
+        'cursor': encode_cursor(position, synced),
+        'has_more': has_more,
+    }
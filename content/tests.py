@@ -0,0 +1,194 @@
+import tempfile
+import threading
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import mock
+
+from django.conf import settings
+from django.db import OperationalError
+from django.db.utils import load_backend
+from django.http import HttpResponse, QueryDict
+from django.test import RequestFactory, SimpleTestCase, TestCase
+from dante_library_project import database
+from dante_library_project.renderers import CustomJSONRenderer
+from . import models, serializers
+from .mixins import select_field_names
+
+
+class ValuesSerializerTests(TestCase):
+    """ValuesSerializer must render exactly what the ModelSerializer it mirrors renders."""
+
+    SERIALIZERS = [
+        serializers.GradeSerializer,
+        serializers.SubjectSerializer,
+        serializers.LessonSerializer,
+        serializers.ChapterSerializer,
+        serializers.PartSerializer,
+    ]
+
+    @classmethod
+    def setUpTestData(cls):
+        grade = models.Grade.objects.create(code='10', name='پایه دهم')
+        other_grade = models.Grade.objects.create(code='x', name='')
+        subject = models.Subject.objects.create(code='math', title='ریاضی', language='fa')
+        bare_subject = models.Subject.objects.create(code='art', title='Art')
+        lesson = models.Lesson.objects.create(grade=grade, subject=subject, title='ریاضی ۱', description='فصل‌ها')
+        models.Lesson.objects.create(grade=other_grade, subject=bare_subject, title='"Quoted" \\ title')
+        chapter = models.Chapter.objects.create(lesson=lesson, number=1, title='مجموعه‌ها', summary='first line\nsecond line\u2028')
+        models.Chapter.objects.create(lesson=lesson, number=2, title='Empty')
+        models.Part.objects.create(
+            chapter=chapter, number=1, title='URL part', content_type=models.Part.CONTENT_TYPE_URL,
+            content_url='/static/grade10/math/1/1.html', size_bytes=2048,
+        )
+        # content_url and size_bytes left null, html empty.
+        models.Part.objects.create(chapter=chapter, number=2, title='Inline part', html='')
+        models.Part.objects.create(
+            chapter=chapter, number=3, title='Inline\tmarkup', mime='text/plain', html='<p>x &amp; y</p> ',
+            size_bytes=0,
+        )
+
+    def setUp(self):
+        self.renderer = CustomJSONRenderer()
+
+    def expected(self, serializer_class, queryset, names=None):
+        """What the serializer-backed views render for the same selection (SparseFieldsMixin)."""
+        serializer = serializer_class(queryset, many=True)
+        if names is not None:
+            fields = serializer.child.fields
+            for name in list(fields):
+                if name not in names:
+                    fields.pop(name)
+        return self.renderer.render(serializer.data)
+
+    def actual(self, serializer_class, queryset, names=None):
+        values_serializer = serializers.ValuesSerializer(serializer_class)
+        rows = values_serializer.values(queryset, names)
+        return self.renderer.render(values_serializer.to_representation(rows, names))
+
+    def selections(self, serializer_class):
+        """Every `?fields=`/`?omit=` selection of a single field, plus the full field list."""
+        available = serializers.ValuesSerializer(serializer_class).field_names
+        yield ''
+        for name in available:
+            yield f'fields={name}'
+            yield f'omit={name}'
+        yield f'fields={available[-1]},{available[0]}'
+
+    def test_rows_render_identically(self):
+        for serializer_class in self.SERIALIZERS:
+            queryset = serializer_class.Meta.model.objects.order_by('pk')
+            with self.subTest(model=queryset.model.__name__):
+                self.assertEqual(self.actual(serializer_class, queryset), self.expected(serializer_class, queryset))
+
+    def test_sparse_fields_render_identically(self):
+        for serializer_class in self.SERIALIZERS:
+            queryset = serializer_class.Meta.model.objects.order_by('pk')
+            available = serializers.ValuesSerializer(serializer_class).field_names
+            for query in self.selections(serializer_class):
+                names = select_field_names(QueryDict(query), available)
+                with self.subTest(model=queryset.model.__name__, query=query):
+                    self.assertEqual(
+                        self.actual(serializer_class, queryset, names),
+                        self.expected(serializer_class, queryset, names),
+                    )
+
+    def test_null_columns_render_as_null(self):
+        part = models.Part.objects.filter(content_url__isnull=True)
+        rendered = self.actual(serializers.PartSerializer, part)
+        self.assertIn(b'"content_url":null', rendered)
+        self.assertIn(b'"size_bytes":null', rendered)
+
+
+class ReadOnlyAliasTests(SimpleTestCase):
+    """Reads through the production read-only alias keep working while a writer holds the database."""
+
+    READERS = 4
+    READS = 25
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.name = str(Path(directory.name) / 'db.sqlite3')
+        self.writer = self.connect('default', {'pragmas': settings.SQLITE_WRITE_PRAGMAS})
+        self.addCleanup(self.writer.close)
+        with self.writer.cursor() as cursor:
+            cursor.execute('CREATE TABLE item (id INTEGER PRIMARY KEY, title TEXT)')
+            cursor.execute("INSERT INTO item (title) VALUES ('committed')")
+
+    def connect(self, alias, options):
+        """A connection configured like the alias of the production database profile."""
+        return load_backend('dante_library_project.sqlite_backend').DatabaseWrapper({
+            'ENGINE': 'dante_library_project.sqlite_backend',
+            'NAME': self.name,
+            'OPTIONS': options,
+            'CONN_MAX_AGE': 0,
+            'CONN_HEALTH_CHECKS': False,
+            'AUTOCOMMIT': True,
+            'ATOMIC_REQUESTS': False,
+            'TIME_ZONE': None,
+            'USER': '', 'PASSWORD': '', 'HOST': '', 'PORT': '',
+            'TEST': {},
+        }, alias)
+
+    def read_only(self):
+        return self.connect('readonly', {'pragmas': settings.SQLITE_READ_PRAGMAS, 'read_only': True})
+
+    def count_items(self, connection):
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT COUNT(*) FROM item')
+                return cursor.fetchone()[0]
+        finally:
+            connection.close()
+
+    def test_reads_succeed_while_writer_is_active(self):
+        results, errors = [], []
+        start = threading.Barrier(self.READERS + 1)
+
+        def read():
+            start.wait()
+            try:
+                for _ in range(self.READS):
+                    results.append(self.count_items(self.read_only()))
+            except OperationalError as exc:
+                errors.append(exc)
+
+        with self.writer.cursor() as cursor:
+            cursor.execute('PRAGMA journal_mode')
+            self.assertEqual(cursor.fetchone()[0], 'wal')
+            # Hold the write lock with uncommitted rows while the readers run.
+            cursor.execute('BEGIN IMMEDIATE')
+            cursor.execute("INSERT INTO item (title) VALUES ('pending')")
+            readers = [threading.Thread(target=read) for _ in range(self.READERS)]
+            for reader in readers:
+                reader.start()
+            start.wait()
+            for reader in readers:
+                reader.join()
+            cursor.execute('COMMIT')
+
+        self.assertEqual(errors, [])
+        self.assertEqual(results, [1] * self.READERS * self.READS)
+        self.assertEqual(self.count_items(self.read_only()), 2)
+
+    def test_read_only_alias_rejects_writes(self):
+        connection = self.read_only()
+        self.addCleanup(connection.close)
+        with self.assertRaises(OperationalError), connection.cursor() as cursor:
+            cursor.execute("INSERT INTO item (title) VALUES ('rejected')")
+
+    def test_safe_requests_read_through_read_only_alias(self):
+        router = database.ReadOnlyRouter()
+        aliases = {}
+
+        def view(request):
+            aliases[request.method] = router.db_for_read(models.Part)
+            return HttpResponse()
+
+        middleware = database.ReadOnlyRequestMiddleware(view)
+        # Only the production profile defines the alias.
+        profile = SimpleNamespace(DATABASES={**settings.DATABASES, database.READ_ONLY_ALIAS: {}})
+        with mock.patch.object(database, 'settings', profile):
+            for method in ('get', 'head', 'post'):
+                middleware(getattr(RequestFactory(), method)('/'))
+        self.assertEqual(aliases, {'GET': 'readonly', 'HEAD': 'readonly', 'POST': 'default'})
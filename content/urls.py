@@ -1,13 +1,33 @@
 from django.urls import path
-from . import views
+from . import async_views, serving, views
 
 urlpatterns = [
     path('grades', views.GradeListAPIView.as_view(), name='grades-list'),
     path('lessons', views.LessonsByGradeAPIView.as_view(), name='lessons-list'),
     path('grades/<uuid:grade_id>/lessons', views.LessonsByGradeAPIView.as_view(), name='lessons-by-grade'),
+    path('lessons/batch', views.LessonsByGradesAPIView.as_view(), name='lessons-batch'),
+    path('lessons/<uuid:lesson_id>/bundle', serving.lesson_bundle, name='lesson-bundle'),
     path('chapters', views.ChaptersByLessonAPIView.as_view(), name='chapters-list'),
     path('lessons/<uuid:lesson_id>/chapters', views.ChaptersByLessonAPIView.as_view(), name='chapters-by-lesson'),
+    path('chapters/batch', views.ChaptersByLessonsAPIView.as_view(), name='chapters-batch'),
+    path('chapters/<uuid:chapter_id>/assets', views.ChapterAssetsAPIView.as_view(), name='chapter-assets'),
     path('parts', views.PartsByChapterAPIView.as_view(), name='parts-list'),
     path('chapters/<uuid:chapter_id>/parts', views.PartsByChapterAPIView.as_view(), name='parts-by-chapter'),
+    path('parts/batch', views.PartsByChaptersAPIView.as_view(), name='parts-batch'),
     path('parts/<uuid:pk>', views.PartDetailAPIView.as_view(), name='part-detail'),
+    path('parts/<uuid:pk>/content', serving.part_content, name='part-content'),
+    path('parts/<uuid:pk>/assets', views.PartAssetsAPIView.as_view(), name='part-assets'),
+    path('catalog', views.CatalogAPIView.as_view(), name='catalog'),
+    path('grades/<uuid:grade_id>/catalog', views.CatalogAPIView.as_view(), name='catalog-by-grade'),
+    path('search', views.SearchAPIView.as_view(), name='search'),
+    path('sync', views.SyncAPIView.as_view(), name='sync'),
+    # Async versions of the read endpoints (content/async_views.py), for ASGI.
+    path('async/grades', async_views.GradeListView.as_view(), name='async-grades-list'),
+    path('async/grades/<uuid:grade_id>/lessons', async_views.LessonsByGradeView.as_view(), name='async-lessons-by-grade'),
+    path('async/lessons/<uuid:lesson_id>/chapters', async_views.ChaptersByLessonView.as_view(),
+         name='async-chapters-by-lesson'),
+    path('async/chapters/<uuid:chapter_id>/parts', async_views.PartsByChapterView.as_view(),
+         name='async-parts-by-chapter'),
+    path('async/parts/<uuid:pk>', async_views.PartDetailView.as_view(), name='async-part-detail'),
+    path('async/parts/<uuid:pk>/content', async_views.PartContentView.as_view(), name='async-part-content'),
 ]
@@ -1,73 +1,323 @@
+import uuid
+
 from rest_framework import generics, status
 from rest_framework.response import Response
-from rest_framework.exceptions import ValidationError
+from django.db.models import Prefetch
 from django.shortcuts import get_object_or_404
-from . import models, serializers
-from .mixins import MessageResponseMixin
+from rest_framework.exceptions import NotFound, ValidationError
 from rest_framework.views import APIView
+from . import dependencies, models, search, serializers, sync
+from .conditional import collect_validators, not_modified_response, set_validators
+from .mixins import (
+    BatchLookupMixin, CachedResponseMixin, ConditionalGetMixin, MessageResponseMixin, ParentLookupMixin, SparseFieldsMixin,
+    ValuesListMixin,
+)
+from .pagination import KeysetPagination
 
 
-class GradeListAPIView(MessageResponseMixin, generics.ListAPIView):
+class GradeListAPIView(CachedResponseMixin, MessageResponseMixin, ConditionalGetMixin, SparseFieldsMixin, generics.ListAPIView):
     queryset = models.Grade.objects.all()
     serializer_class = serializers.GradeSerializer
     message = 'grade find success'
+    pagination_class = KeysetPagination
+    keyset_ordering = ('code',)
+    cache_endpoint = 'grades'
+    cache_scope_kind = 'grades'
 
+    def get_cache_scope(self):
+        return self.cache_scope_kind
 
-class LessonsByGradeAPIView(APIView):
-    def post(self, request, *args, **kwargs):
-        grade_id = request.data.get('grade_id')
-        if not grade_id:
-            raise ValidationError({'detail': 'grade_id is required'})
+    def list(self, request, *args, **kwargs):
+        return self.cached_response() or super().list(request, *args, **kwargs)
+
+
+class LessonsByGradeAPIView(CachedResponseMixin, ConditionalGetMixin, ValuesListMixin, ParentLookupMixin, generics.GenericAPIView):
+    parent_lookup = 'grade_id'
+    # (grade, subject) is unique, so subject_id alone orders a grade's lessons.
+    keyset_ordering = ('subject_id',)
+    values_serializer = serializers.ValuesSerializer(serializers.LessonSerializer)
+    cache_endpoint = 'lessons'
+    cache_scope_kind = 'grade'
+
+    def get_queryset(self):
+        return models.Lesson.objects.filter(grade_id=self.get_parent_id())
 
-        lessons = models.Lesson.objects.filter(grade_id=grade_id)
-        serializer = serializers.LessonSerializer(lessons, many=True)
-        return Response({'message': 'lessons find success', 'data': serializer.data})
+    def list_response(self, lessons):
+        return Response({'message': 'lessons find success', 'data': self.list_data(lessons)})
 
+    def get(self, request, *args, **kwargs):
+        lessons = self.get_queryset()
+        return self.cached_response() or self.not_modified(lessons) or self.list_response(lessons)
 
-class ChaptersByLessonAPIView(generics.GenericAPIView):
+    def post(self, request, *args, **kwargs):
+        return self.cached_response() or self.list_response(self.get_queryset())
+
+
+class ChaptersByLessonAPIView(CachedResponseMixin, ConditionalGetMixin, ValuesListMixin, ParentLookupMixin, generics.GenericAPIView):
     
     serializer_class = serializers.ChapterSerializer  # Serializer اصلی Chapter
+    values_serializer = serializers.ValuesSerializer(serializers.ChapterSerializer)
+    parent_lookup = 'lesson_id'
+    keyset_ordering = ('number', 'id')
+    cache_endpoint = 'chapters'
+    cache_scope_kind = 'lesson'
 
-    def post(self, request, *args, **kwargs):
-        lesson_id = request.data.get('lesson_id')
-        if not lesson_id:
-            raise ValidationError({'detail': 'lesson_id is required'})
+    def get_queryset(self):
+        return models.Chapter.objects.filter(lesson_id=self.get_parent_id()).order_by('number')
 
-        chapters = models.Chapter.objects.filter(lesson_id=lesson_id).order_by('number')
-        serializer = self.get_serializer(chapters, many=True)
+    def list_response(self, chapters):
+        data = self.list_data(chapters)
 
         return Response(
             {
                 "status_code": 200,
                 "message": "OK",
-                "data": serializer.data
+                "data": data
             },
             status=200
         )
 
+    def get(self, request, *args, **kwargs):
+        chapters = self.get_queryset()
+        return self.cached_response() or self.not_modified(chapters) or self.list_response(chapters)
 
-
-class PartsByChapterAPIView(APIView):
     def post(self, request, *args, **kwargs):
-        chapter_id = request.data.get('chapter_id')
+        return self.cached_response() or self.list_response(self.get_queryset())
+
 
-        if not chapter_id:
-            raise ValidationError({'detail': 'chapter_id is required'})
+class PartsByChapterAPIView(CachedResponseMixin, ConditionalGetMixin, ValuesListMixin, ParentLookupMixin, generics.GenericAPIView):
+    parent_lookup = 'chapter_id'
+    values_serializer = serializers.ValuesSerializer(serializers.PartSerializer)
+    # Tables of contents rarely need the inline HTML; `?fields=` or `?omit=` brings it back.
+    default_omit = ('html',)
+    keyset_ordering = ('number', 'id')
+    cache_endpoint = 'parts'
+    cache_scope_kind = 'chapter'
 
-        parts = models.Part.objects.filter(chapter_id=chapter_id).order_by('number')
+    def get_queryset(self):
+        return models.Part.objects.filter(chapter_id=self.get_parent_id()).order_by('number')
 
-        serializer = serializers.PartSerializer(parts, many=True)
+    def list_response(self, parts):
+        data = self.list_data(parts)
 
         return Response(
             {
                 "status_code": 200,
                 "message": "OK",
-                "data": serializer.data
+                "data": data
             },
             status=200
         )
 
+    def get(self, request, *args, **kwargs):
+        parts = self.get_queryset()
+        return self.cached_response() or self.not_modified(parts) or self.list_response(parts)
+
+    def post(self, request, *args, **kwargs):
+        return self.cached_response() or self.list_response(self.get_queryset())
+
+
+class LessonsByGradesAPIView(ConditionalGetMixin, BatchLookupMixin, generics.GenericAPIView):
+    batch_lookup = 'grade_ids'
+    parent_field = 'grade_id'
+    values_serializer = serializers.ValuesSerializer(serializers.LessonSerializer)
+
+    def get_queryset(self):
+        return models.Lesson.objects.filter(grade_id__in=self.get_parent_ids())
+
+    def batch_response(self, lessons):
+        return Response({'message': 'lessons find success', 'data': self.grouped_data(lessons)})
+
+    def get(self, request, *args, **kwargs):
+        lessons = self.get_queryset()
+        return self.not_modified(lessons) or self.batch_response(lessons)
+
+    def post(self, request, *args, **kwargs):
+        return self.batch_response(self.get_queryset())
+
+
+class ChaptersByLessonsAPIView(ConditionalGetMixin, BatchLookupMixin, generics.GenericAPIView):
+    batch_lookup = 'lesson_ids'
+    parent_field = 'lesson_id'
+    values_serializer = serializers.ValuesSerializer(serializers.ChapterSerializer)
+
+    def get_queryset(self):
+        return models.Chapter.objects.filter(lesson_id__in=self.get_parent_ids()).order_by('number')
+
+    def batch_response(self, chapters):
+        return Response({"status_code": 200, "message": "OK", "data": self.grouped_data(chapters)}, status=200)
+
+    def get(self, request, *args, **kwargs):
+        chapters = self.get_queryset()
+        return self.not_modified(chapters) or self.batch_response(chapters)
+
+    def post(self, request, *args, **kwargs):
+        return self.batch_response(self.get_queryset())
+
+
+class PartsByChaptersAPIView(ConditionalGetMixin, BatchLookupMixin, generics.GenericAPIView):
+    batch_lookup = 'chapter_ids'
+    parent_field = 'chapter_id'
+    values_serializer = serializers.ValuesSerializer(serializers.PartSerializer)
+    default_omit = ('html',)
+
+    def get_queryset(self):
+        return models.Part.objects.filter(chapter_id__in=self.get_parent_ids()).order_by('number')
+
+    def batch_response(self, parts):
+        return Response({"status_code": 200, "message": "OK", "data": self.grouped_data(parts)}, status=200)
+
+    def get(self, request, *args, **kwargs):
+        parts = self.get_queryset()
+        return self.not_modified(parts) or self.batch_response(parts)
+
+    def post(self, request, *args, **kwargs):
+        return self.batch_response(self.get_queryset())
+
 
-class PartDetailAPIView(generics.RetrieveAPIView):
+class PartDetailAPIView(ConditionalGetMixin, SparseFieldsMixin, generics.RetrieveAPIView):
     queryset = models.Part.objects.all()
     serializer_class = serializers.PartSerializer
+
+
+class CatalogAPIView(MessageResponseMixin, generics.GenericAPIView):
+    """Full grade -> lesson -> chapter -> part tree (or one grade's subtree).
+
+    The tree is loaded with one query per level regardless of its size, and
+    the response carries an ETag so an unchanged catalog costs a single 304.
+    """
+    serializer_class = serializers.CatalogGradeSerializer
+    message = 'catalog find success'
+
+    def get_queryset(self):
+        parts = models.Part.objects.defer('html').order_by('number')
+        chapters = models.Chapter.objects.order_by('number').prefetch_related(
+            Prefetch('parts', queryset=parts)
+        )
+        lessons = models.Lesson.objects.select_related('subject').order_by('subject__code').prefetch_related(
+            Prefetch('chapters', queryset=chapters)
+        )
+        return models.Grade.objects.order_by('code').prefetch_related(
+            Prefetch('lessons', queryset=lessons)
+        )
+
+    def get_validators(self, grade_id=None):
+        if grade_id is None:
+            return collect_validators(
+                'catalog',
+                models.Grade.objects.all(),
+                models.Subject.objects.all(),
+                models.Lesson.objects.all(),
+                models.Chapter.objects.all(),
+                models.Part.objects.all(),
+            )
+        return collect_validators(
+            f'catalog:{grade_id}',
+            models.Grade.objects.filter(pk=grade_id),
+            models.Subject.objects.filter(lessons__grade_id=grade_id),
+            models.Lesson.objects.filter(grade_id=grade_id),
+            models.Chapter.objects.filter(lesson__grade_id=grade_id),
+            models.Part.objects.filter(chapter__lesson__grade_id=grade_id),
+        )
+
+    def get(self, request, grade_id=None, *args, **kwargs):
+        etag, last_modified = self.get_validators(grade_id)
+        not_modified = not_modified_response(request, etag, last_modified)
+        if not_modified is not None:
+            return not_modified
+
+        queryset = self.get_queryset()
+        if grade_id is None:
+            serializer = self.get_serializer(queryset, many=True)
+        else:
+            serializer = self.get_serializer(get_object_or_404(queryset, pk=grade_id))
+
+        return set_validators(Response(serializer.data), etag, last_modified)
+
+
+class SearchAPIView(MessageResponseMixin, APIView):
+    """Ranked full-text search over part content (see content/search.py).
+
+    `?q=` is required; `limit` (1-100, default 20) and `grade_id` are optional.
+    """
+    message = 'search success'
+    default_limit = 20
+    max_limit = 100
+
+    def get_limit(self):
+        try:
+            limit = int(self.request.query_params.get('limit', self.default_limit))
+        except ValueError:
+            raise ValidationError({'detail': 'limit must be an integer'})
+        return max(1, min(limit, self.max_limit))
+
+    def get(self, request, *args, **kwargs):
+        if not search.is_available():
+            raise NotFound('Search is not available')
+
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            raise ValidationError({'detail': 'q is required'})
+
+        grade_id = request.query_params.get('grade_id') or None
+        if grade_id is not None:
+            try:
+                grade_id = uuid.UUID(grade_id)
+            except ValueError:
+                raise ValidationError({'detail': 'grade_id must be a valid UUID'})
+
+        return Response(search.search(query, limit=self.get_limit(), grade_id=grade_id))
+
+
+class SyncAPIView(MessageResponseMixin, APIView):
+    """Catalog changes since `?since=<cursor>`, deletions included (see content/sync.py).
+
+    Without `since` the whole catalog is sent. Each response carries the
+    cursor for the next call and `has_more` while changes remain; `limit`
+    (1-1000, default 500) caps the changes per response.
+    """
+    message = 'sync success'
+    default_limit = 500
+    max_limit = 1000
+
+    def get_limit(self):
+        try:
+            limit = int(self.request.query_params.get('limit', self.default_limit))
+        except ValueError:
+            raise ValidationError({'detail': 'limit must be an integer'})
+        return max(1, min(limit, self.max_limit))
+
+    def get(self, request, *args, **kwargs):
+        since = request.query_params.get('since') or None
+        return Response(sync.changes_since(since, limit=self.get_limit()))
+
+
+class PartAssetsAPIView(MessageResponseMixin, ConditionalGetMixin, APIView):
+    """Files a part's page loads, with sizes and hashes (see content/dependencies.py).
+
+    `transfer_bytes` is the page plus every asset, before compression.
+    """
+    message = 'part assets find success'
+
+    def get(self, request, pk, *args, **kwargs):
+        not_modified = self.not_modified(models.PartAssetScan.objects.filter(part_id=pk))
+        if not_modified is not None:
+            return not_modified
+
+        data = dependencies.part_summary(pk)
+        if data is None:
+            raise NotFound('No asset index for this part')
+        return Response(data)
+
+
+class ChapterAssetsAPIView(MessageResponseMixin, ConditionalGetMixin, APIView):
+    """Transfer size of each part of a chapter, and of the whole chapter with shared assets counted once."""
+    message = 'chapter assets find success'
+
+    def get(self, request, chapter_id, *args, **kwargs):
+        not_modified = self.not_modified(models.PartAssetScan.objects.filter(part__chapter_id=chapter_id))
+        if not_modified is not None:
+            return not_modified
+
+        get_object_or_404(models.Chapter.objects.only('pk'), pk=chapter_id)
+        return Response(dependencies.chapter_summary(chapter_id))
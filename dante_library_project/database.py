@@ -0,0 +1,63 @@
+"""Send the reads of safe (GET/HEAD/OPTIONS) requests to the read-only alias.
+
+Used by the production database profile in settings.py. The middleware marks
+safe requests; while a request is marked, `ReadOnlyRouter` points reads at
+READ_ONLY_ALIAS. Writes always go to `default`, including writes of objects
+that were loaded through the read-only alias. Management commands and unsafe
+requests read from `default`, so a write transaction sees its own changes.
+"""
+import contextvars
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+
+READ_ONLY_ALIAS = 'readonly'
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+_read_only = contextvars.ContextVar('read_only_request', default=False)
+
+
+class ReadOnlyRequestMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        token = _read_only.set(request.method in SAFE_METHODS)
+        try:
+            return self.get_response(request)
+        finally:
+            _read_only.reset(token)
+
+    async def __acall__(self, request):
+        token = _read_only.set(request.method in SAFE_METHODS)
+        try:
+            return await self.get_response(request)
+        finally:
+            _read_only.reset(token)
+
+
+class ReadOnlyRouter:
+    def db_for_read(self, model, **hints):
+        if _read_only.get() and READ_ONLY_ALIAS in settings.DATABASES:
+            return READ_ONLY_ALIAS
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both aliases are the same database file.
+        return {obj1._state.db, obj2._state.db} <= {DEFAULT_DB_ALIAS, READ_ONLY_ALIAS}
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db != READ_ONLY_ALIAS
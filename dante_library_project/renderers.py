@@ -1,6 +1,88 @@
 from rest_framework.renderers import JSONRenderer
+from rest_framework.utils import encoders
+from django.core.exceptions import ImproperlyConfigured
 from http import HTTPStatus
 
+from .timing import measure
+
+try:
+    import orjson
+except ImportError:  # optional: only needed by OrjsonRenderer
+    orjson = None
+
+
+class Envelope(dict):
+    """Marker type for bodies built as `{message, data}` or fully wrapped.
+
+    Its type alone tells the renderer the body is an envelope; plain dicts
+    of the same shape are still recognised by their keys.
+    """
+
+
+def is_wrapped(data):
+    """True for `{status_code, message, data}` bodies."""
+    if type(data) is Envelope:
+        return 'status_code' in data
+    return isinstance(data, dict) and 'status_code' in data and 'message' in data and 'data' in data
+
+
+def is_message_data(data):
+    """True for `{message, data}` bodies that still need a status code."""
+    if type(data) is Envelope:
+        return 'status_code' not in data
+    return isinstance(data, dict) and 'message' in data and 'data' in data and 'status_code' not in data
+
+
+def first_error_message(data):
+    for v in data.values():
+        if isinstance(v, (list, tuple)) and v:
+            return v[0]
+        if isinstance(v, str):
+            return v
+        if isinstance(v, dict):
+            for vv in v.values():
+                if isinstance(vv, (list, tuple)) and vv:
+                    return vv[0]
+                if isinstance(vv, str):
+                    return vv
+    return None
+
+
+def wrap(data, status_code=None):
+    """Return `data` in the `{status_code, message, data}` shape."""
+    if is_wrapped(data):
+        return data
+
+    # If the view provided {'message': ..., 'data': ...} allow that
+    if is_message_data(data):
+        return {'status_code': status_code, 'message': data['message'], 'data': data['data']}
+
+    # Determine default status_code if not available
+    if status_code is None:
+        status_code = 200 if data is not None else 204
+
+    # Derive a friendly message
+    if isinstance(data, dict):
+        if 'detail' in data:
+            message = data.get('detail')
+        elif status_code >= 400:
+            message = first_error_message(data) or HTTPStatus(status_code).phrase
+        else:
+            message = 'OK'
+    else:
+        message = HTTPStatus(status_code).phrase if status_code >= 400 else 'OK'
+
+    return {'status_code': status_code, 'message': message, 'data': data}
+
+
+def response_status(renderer_context):
+    # If renderer_context available, try to get status code from response
+    if renderer_context:
+        resp = renderer_context.get('response')
+        if resp is not None:
+            return getattr(resp, 'status_code', None)
+    return None
+
 
 class CustomJSONRenderer(JSONRenderer):
     """
@@ -14,59 +96,34 @@ class CustomJSONRenderer(JSONRenderer):
     charset = 'utf-8'
 
     def render(self, data, accepted_media_type=None, renderer_context=None):
-        # If renderer_context available, try to get status code from response
-        status_code = None
-        if renderer_context:
-            resp = renderer_context.get('response')
-            if resp is not None:
-                status_code = getattr(resp, 'status_code', None)
-
-        # If the view already provided the final wrapped format, return as-is
-        if isinstance(data, dict) and {'status_code', 'message', 'data'}.issubset(set(data.keys())):
-            return super().render(data, accepted_media_type, renderer_context)
-
-        # If the view provided {'message': ..., 'data': ...} allow that
-        if isinstance(data, dict) and 'message' in data and 'data' in data and 'status_code' not in data:
-            message = data.get('message')
-            data = data.get('data')
-        else:
-            # Determine default status_code if not available
-            if status_code is None:
-                status_code = 200 if data is not None else 204
-
-            # Derive a friendly message
-            if isinstance(data, dict):
-                if 'detail' in data:
-                    message = data.get('detail')
-                elif status_code >= 400:
-                    first_msg = None
-                    for v in data.values():
-                        if isinstance(v, (list, tuple)) and v:
-                            first_msg = v[0]
-                            break
-                        if isinstance(v, str):
-                            first_msg = v
-                            break
-                        if isinstance(v, dict):
-                            for vv in v.values():
-                                if isinstance(vv, (list, tuple)) and vv:
-                                    first_msg = vv[0]
-                                    break
-                                if isinstance(vv, str):
-                                    first_msg = vv
-                                    break
-                            if first_msg:
-                                break
-                    message = first_msg if first_msg else HTTPStatus(status_code).phrase
-                else:
-                    message = 'OK'
-            else:
-                message = HTTPStatus(status_code).phrase if status_code >= 400 else 'OK'
-
-        payload = {
-            'status_code': status_code,
-            'message': message,
-            'data': data
-        }
-
-        return super().render(payload, accepted_media_type, renderer_context)
+        with measure('render'):
+            payload = wrap(data, response_status(renderer_context))
+            return super().render(payload, accepted_media_type, renderer_context)
+
+
+class OrjsonRenderer(CustomJSONRenderer):
+    """Same envelope as CustomJSONRenderer, encoded with orjson.
+
+    Serializer output (`ReturnList`/`ReturnDict`), UUIDs and datetimes are
+    encoded natively; anything else falls back to DRF's JSON encoder.
+    Enable it through `API_RENDERER` in settings.
+    """
+
+    options = orjson.OPT_UTC_Z if orjson is not None else 0
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None:
+            raise ImproperlyConfigured('OrjsonRenderer requires the orjson package')
+
+        with measure('render'):
+            payload = wrap(data, response_status(renderer_context))
+            options = self.options
+            if self.get_indent(accepted_media_type, renderer_context or {}):
+                options |= orjson.OPT_INDENT_2
+
+            ret = orjson.dumps(payload, default=encoders.JSONEncoder().default, option=options)
+            # Match JSONRenderer, which escapes the two line separators that are
+            # valid JSON but break JavaScript string literals.
+            if b'\xe2\x80' in ret:
+                ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+            return ret
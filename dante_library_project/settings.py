@@ -24,6 +24,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'dante_library_project.timing.ServerTimingMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -53,6 +54,7 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'dante_library_project.wsgi.application'
+ASGI_APPLICATION = 'dante_library_project.asgi.application'
 
 # Database - use sqlite3 for convenience
 DATABASES = {
@@ -62,6 +64,47 @@ DATABASES = {
     }
 }
 
+# Production database profile, opt-in with DANTE_DATABASE_PROFILE=production.
+# WAL lets readers keep going while a reseed writes; GET/HEAD requests read
+# through a separate read-only connection (dante_library_project/database.py)
+# and connections are kept open between requests.
+DATABASE_PROFILE = os.environ.get('DANTE_DATABASE_PROFILE', 'development')
+
+SQLITE_READ_PRAGMAS = {
+    'mmap_size': 256 * 1024 * 1024,
+    'cache_size': -32 * 1024,  # KiB
+    'busy_timeout': 5000,  # ms
+    'temp_store': 'MEMORY',
+}
+SQLITE_WRITE_PRAGMAS = {
+    # journal_mode is stored in the database file, so the read-only
+    # connection picks it up without setting it.
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    **SQLITE_READ_PRAGMAS,
+}
+
+if DATABASE_PROFILE == 'production':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'dante_library_project.sqlite_backend',
+            'NAME': DATABASES['default']['NAME'],
+            'CONN_MAX_AGE': 600,
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {'pragmas': SQLITE_WRITE_PRAGMAS},
+        },
+        'readonly': {
+            'ENGINE': 'dante_library_project.sqlite_backend',
+            'NAME': DATABASES['default']['NAME'],
+            'CONN_MAX_AGE': 600,
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {'pragmas': SQLITE_READ_PRAGMAS, 'read_only': True},
+            'TEST': {'MIRROR': 'default'},
+        },
+    }
+    DATABASE_ROUTERS = ['dante_library_project.database.ReadOnlyRouter']
+    MIDDLEWARE.insert(1, 'dante_library_project.database.ReadOnlyRequestMiddleware')
+
 AUTH_PASSWORD_VALIDATORS = []
 
 LANGUAGE_CODE = 'en-us'
@@ -74,10 +117,83 @@ USE_TZ = True
 
 STATIC_URL = '/static/'
 
+# On-disk content tree (grade folders with part HTML and their assets),
+# served under STATIC_URL.
+CONTENT_ROOT = os.path.join(BASE_DIR, 'static')
+
+# Hand content file bodies to the front proxy instead of streaming them from
+# Python: None, 'x-accel-redirect' (nginx) or 'x-sendfile' (Apache/lighttpd).
+# With nginx, CONTENT_ACCEL_REDIRECT_PREFIX is an `internal` location aliased
+# to CONTENT_ROOT.
+CONTENT_SENDFILE_BACKEND = None
+CONTENT_ACCEL_REDIRECT_PREFIX = '/protected-content/'
+
+# Finished offline lesson bundles (`api/lessons/<id>/bundle`), the latest
+# `<lesson id>-<content hash>.zip` of each lesson (the directory is
+# git-ignored). None streams every download afresh.
+CONTENT_BUNDLE_CACHE_DIR = os.path.join(BASE_DIR, 'bundle_cache')
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    # Shared by the web workers and the management commands that invalidate
+    # it; Memcached or Redis in a multi-host deployment.
+    'content': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(BASE_DIR, 'content_cache'),
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+}
+
+# Rendered response cache for the content list endpoints (content/cache.py).
+# Entries are invalidated by model signals once the write commits; the
+# timeouts only bound how long an entry is served before a rebuild and how
+# long a stale copy is kept. The alias must be visible to every process.
+CONTENT_CACHE_ENABLED = True
+CONTENT_CACHE_ALIAS = 'content'
+CONTENT_CACHE_TIMEOUT = 300
+CONTENT_CACHE_STALE_TIMEOUT = 60 * 60 * 24
+CONTENT_CACHE_LOCK_TIMEOUT = 30
+
+# Most parent ids accepted by one batch lookup (`parts/batch` and friends).
+CONTENT_BATCH_MAX_IDS = 100
+
+# Delta sync (`api/sync`, content/sync.py). Changes are reported once they are
+# this old, which must exceed the longest write transaction, from its first
+# row write to its commit, wait for the SQLite write lock (busy_timeout)
+# included; rows of longer transactions can be missed. Deletion records are
+# kept for CONTENT_SYNC_TOMBSTONE_DAYS.
+CONTENT_SYNC_SETTLE_SECONDS = 15
+CONTENT_SYNC_TOMBSTONE_DAYS = 90
+
+# Send per-request SQL/serialize/render timings in a Server-Timing header.
+# The same numbers are always logged on `dante_library_project.timing`.
+SERVER_TIMING_HEADER = DEBUG
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'dante_library_project.timing': {
+            'handlers': ['console'],
+            'level': 'INFO' if DEBUG else 'WARNING',
+            'propagate': False,
+        },
+    },
+}
+
 # Use a custom renderer so API returns wrapped JSON by default
+# Set to 'dante_library_project.renderers.OrjsonRenderer' to encode the same
+# envelope with orjson (compare with `manage.py benchmark_renderers`).
+API_RENDERER = 'dante_library_project.renderers.CustomJSONRenderer'
+
 REST_FRAMEWORK = {
     'DEFAULT_RENDERER_CLASSES': (
-        'dante_library_project.renderers.CustomJSONRenderer',
+        API_RENDERER,
     ),
 }
 
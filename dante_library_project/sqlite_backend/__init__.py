@@ -0,0 +1,8 @@
+"""SQLite backend that applies tuned pragmas and can open a database read-only.
+
+Use it as `ENGINE: 'dante_library_project.sqlite_backend'` with these extra
+OPTIONS (everything else goes to `sqlite3.connect()` as usual):
+
+    'pragmas':   {name: value} run on every new connection, in order
+    'read_only': open with `mode=ro` and `PRAGMA query_only = ON`
+"""
@@ -0,0 +1,21 @@
+from pathlib import Path
+
+from django.db.backends.sqlite3 import base
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def get_connection_params(self):
+        kwargs = super().get_connection_params()
+        kwargs.pop('pragmas', None)
+        if kwargs.pop('read_only', False) and not self.is_in_memory_db():
+            kwargs['database'] = Path(kwargs['database']).resolve().as_uri() + '?mode=ro'
+        return kwargs
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        options = self.settings_dict['OPTIONS']
+        for name, value in options.get('pragmas', {}).items():
+            conn.execute(f'PRAGMA {name} = {value}')
+        if options.get('read_only'):
+            conn.execute('PRAGMA query_only = ON')
+        return conn
@@ -0,0 +1,161 @@
+"""Per-request timing: SQL, serialization and rendering.
+
+`ServerTimingMiddleware` installs a `RequestTimings` for the request and
+reports its totals in a `Server-Timing` header and a structured log record.
+Every database connection carries `record_query` from the moment it is
+created, so queries are counted in whichever thread runs them (async views
+run the ORM in worker threads; the context variable follows them there).
+Code that serializes or renders wraps itself in `measure('serialize')` /
+`measure('render')`; outside a request those are no-ops. SQL run inside a
+measured block is booked as SQL, not as serialization or rendering.
+"""
+import contextvars
+import logging
+import time
+from contextlib import contextmanager
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+
+logger = logging.getLogger(__name__)
+
+_current = contextvars.ContextVar('request_timings', default=None)
+
+
+class RequestTimings:
+    def __init__(self):
+        self.sql_count = 0
+        self.sql_time = 0.0
+        self.durations = {}
+        self.active = set()
+
+    def sql_wrapper(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.sql_time += time.perf_counter() - start
+            self.sql_count += 1
+
+
+def current_timings():
+    return _current.get()
+
+
+def record_query(execute, sql, params, many, context):
+    timings = _current.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    return timings.sql_wrapper(execute, sql, params, many, context)
+
+
+def instrument(connection):
+    if record_query not in connection.execute_wrappers:
+        # First in line: `execute_wrapper()` blocks pop the last wrapper on exit.
+        connection.execute_wrappers.insert(0, record_query)
+
+
+@receiver(connection_created)
+def instrument_new_connection(sender, connection, **kwargs):
+    instrument(connection)
+
+
+@contextmanager
+def measure(name):
+    """Add the time spent in the block (minus its SQL) to the `name` bucket.
+
+    Nested blocks of the same name are only counted once, so serializers can
+    measure themselves without double-counting their nested serializers.
+    """
+    timings = _current.get()
+    if timings is None or name in timings.active:
+        yield
+        return
+
+    timings.active.add(name)
+    start = time.perf_counter()
+    sql_start = timings.sql_time
+    try:
+        yield
+    finally:
+        timings.active.discard(name)
+        elapsed = time.perf_counter() - start - (timings.sql_time - sql_start)
+        timings.durations[name] = timings.durations.get(name, 0.0) + elapsed
+
+
+class ServerTimingMiddleware:
+    """Report SQL count/time, serialization and render time for each request.
+
+    Install it first in MIDDLEWARE so `total` covers the whole stack. The
+    header is sent when SERVER_TIMING_HEADER is true (default: DEBUG); the
+    log record on the `dante_library_project.timing` logger is always written.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+        # Connections opened before this module was imported.
+        for connection in connections.all(initialized_only=True):
+            instrument(connection)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        timings = RequestTimings()
+        token = _current.set(timings)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.report(request, response, timings, time.perf_counter() - start)
+
+    async def __acall__(self, request):
+        timings = RequestTimings()
+        token = _current.set(timings)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.report(request, response, timings, time.perf_counter() - start)
+
+    def report(self, request, response, timings, total):
+        metrics = {
+            'sql': timings.sql_time,
+            'serialize': timings.durations.get('serialize', 0.0),
+            'render': timings.durations.get('render', 0.0),
+        }
+        metrics['app'] = max(total - sum(metrics.values()), 0.0)
+        metrics['total'] = total
+
+        if getattr(settings, 'SERVER_TIMING_HEADER', settings.DEBUG):
+            entries = [
+                f'{name};dur={seconds * 1000:.2f}' + (f';desc="{timings.sql_count} queries"' if name == 'sql' else '')
+                for name, seconds in metrics.items()
+            ]
+            existing = response.get('Server-Timing')
+            response['Server-Timing'] = ', '.join(([existing] if existing else []) + entries)
+
+        fields = {f'{name}_ms': round(seconds * 1000, 2) for name, seconds in metrics.items()}
+        fields.update({
+            'method': request.method,
+            'path': request.path,
+            'status_code': response.status_code,
+            'sql_queries': timings.sql_count,
+        })
+        logger.info(
+            '%s %s %s %d queries sql=%.2fms serialize=%.2fms render=%.2fms total=%.2fms',
+            request.method, request.path, response.status_code, timings.sql_count,
+            fields['sql_ms'], fields['serialize_ms'], fields['render_ms'], fields['total_ms'],
+            extra={'timing': fields},
+        )
+        return response
@@ -1,7 +1,15 @@
+import re
+
+from django.conf import settings
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, include, re_path
+
+from content.serving import serve_content
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/', include('content.urls')),
+    # Content tree with precompressed variants. Under `runserver` the
+    # staticfiles handler claims STATIC_URL first; use `--nostatic`.
+    re_path(r'^%s(?P<path>.*)$' % re.escape(settings.STATIC_URL.lstrip('/')), serve_content),
 ]